@@ -0,0 +1,134 @@
+"""Benchmark the single pass compositor against the previous Pillow path.
+
+Usage::
+
+    python benchmarks/bench_compositor.py [--width 6000] [--height 4000] [--repeat 3]
+
+``legacy`` is the split/paste flatten followed by ``ImageOps.expand`` and a
+second paste that ``process_single_image`` used before. ``numpy`` is a
+vectorized reference implementation (canvas views plus an integer alpha
+blend) and is skipped when NumPy is not installed.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image, ImageOps
+
+from borderframe.compositor import (
+    HIGH_BIT_DEPTH_MODES,
+    composite,
+    fill_value,
+    frame_geometry,
+    prepare_source,
+)
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+BORDER_COLOR = "#FFFFFF"
+USER_BORDER_PX = 20
+ASPECT_RATIO = (4, 5)
+
+
+def synthetic(mode, width, height):
+    base = Image.effect_mandelbrot((width, height), (-2.2, -1.4, 0.8, 1.4), 64)
+    if mode == "I;16":
+        return base.convert("I").point(lambda v: v * 257).convert("I;16")
+    if mode in ("RGBA", "LA"):
+        img = base.convert(mode[:-1])
+        img.putalpha(Image.linear_gradient("L").resize((width, height)))
+        return img
+    return base.convert(mode)
+
+
+def legacy(img):
+    if img.mode in ("RGBA", "LA"):
+        background = Image.new("RGB", img.size, BORDER_COLOR)
+        background.paste(img, mask=img.split()[-1])
+        img = background
+    elif img.mode != "RGB":
+        img = img.convert("RGB")
+    geometry = frame_geometry(img.width, img.height, USER_BORDER_PX, ASPECT_RATIO)
+    border = int(USER_BORDER_PX * min(img.size) / 1000)
+    if border > 0:
+        img = ImageOps.expand(img, border=border, fill=BORDER_COLOR)
+    result = Image.new("RGB", (geometry.width, geometry.height), BORDER_COLOR)
+    result.paste(img, ((geometry.width - img.width) // 2, (geometry.height - img.height) // 2))
+    return result
+
+
+def single_pass(img):
+    keep = img.mode in HIGH_BIT_DEPTH_MODES
+    img = prepare_source(img, keep)
+    geometry = frame_geometry(img.width, img.height, USER_BORDER_PX, ASPECT_RATIO)
+    return composite(img, geometry, BORDER_COLOR, keep)
+
+
+def numpy_reference(img):
+    geometry = frame_geometry(img.width, img.height, USER_BORDER_PX, ASPECT_RATIO)
+    high = img.mode in HIGH_BIT_DEPTH_MODES
+    source = np.asarray(img)
+    if high:
+        canvas = np.empty((geometry.height, geometry.width), source.dtype)
+        color = fill_value(BORDER_COLOR, img.mode)
+    else:
+        canvas = np.empty((geometry.height, geometry.width, 3), np.uint8)
+        color = np.array(fill_value(BORDER_COLOR, "RGB"), np.uint16)
+    x, y = geometry.paste_x, geometry.paste_y
+    h, w = source.shape[:2]
+    canvas[:y] = canvas[y + h:] = color
+    canvas[y:y + h, :x] = canvas[y:y + h, x + w:] = color
+    view = canvas[y:y + h, x:x + w]
+    if img.mode in ("RGBA", "LA"):
+        for row in range(0, h, 256):
+            block = source[row:row + 256]
+            alpha = block[..., -1:].astype(np.uint16)
+            blended = block[..., :-1] * alpha + color * (255 - alpha) + 127
+            view[row:row + 256] = blended // 255
+    elif img.mode == "L":
+        view[...] = source[..., None]
+    else:
+        view[...] = source
+    return Image.fromarray(canvas)
+
+
+def timed(func, img, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(img)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--width", type=int, default=6000)
+    parser.add_argument("--height", type=int, default=4000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    engines = [("legacy", legacy), ("single pass", single_pass)]
+    if np is not None:
+        engines.append(("numpy", numpy_reference))
+
+    print(f"Canvas for a {args.width}x{args.height} source, best of {args.repeat}\n")
+    print("| Mode | " + " | ".join(f"{name} (s)" for name, _ in engines) + " |")
+    print("|---|" + "---:|" * len(engines))
+    for mode in ("RGB", "RGBA", "LA", "L", "I;16"):
+        img = synthetic(mode, args.width, args.height)
+        img.load()
+        times = [timed(func, img, args.repeat) for _, func in engines]
+        print(f"| {mode} | " + " | ".join(f"{t:.3f}" for t in times) + " |")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Benchmark encode time against output size for each encoder effort preset.
+
+Usage::
+
+    python benchmarks/bench_encoders.py [--width 4000] [--height 3000] [--repeat 3]
+
+Prints a Markdown table with one row per format and preset.
+"""
+
+import argparse
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image, ImageFilter
+
+from borderframe.encoders import ENCODER_EFFORTS, build_save_args
+
+try:
+    import pillow_heif
+
+    pillow_heif.register_heif_opener()
+    _HAS_HEIF = True
+except ImportError:  # pragma: no cover - optional dependency
+    _HAS_HEIF = False
+
+FORMATS = (("JPEG", 95), ("PNG", None), ("TIFF", None), ("HEIF", 80))
+
+
+def synthetic_photo(width, height):
+    """Create a photo-like image with smooth regions, edges and noise."""
+    base = Image.effect_mandelbrot((width, height), (-2.2, -1.4, 0.8, 1.4), 64)
+    noise = Image.effect_noise((width, height), 24)
+    gradient = Image.linear_gradient("L").resize((width, height))
+    img = Image.merge("RGB", (base, gradient, Image.blend(base, noise, 0.35)))
+    return img.filter(ImageFilter.SMOOTH)
+
+
+def bench(img, save_format, quality, effort, repeat):
+    save_args = build_save_args(save_format, quality, effort)
+    best = None
+    size = 0
+    for _ in range(repeat):
+        buffer = io.BytesIO()
+        start = time.perf_counter()
+        img.save(buffer, **save_args)
+        elapsed = time.perf_counter() - start
+        size = buffer.tell()
+        best = elapsed if best is None else min(best, elapsed)
+    return best, size
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--width", type=int, default=4000)
+    parser.add_argument("--height", type=int, default=3000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    img = synthetic_photo(args.width, args.height)
+    print(f"Image: {args.width}x{args.height} RGB, best of {args.repeat}\n")
+    print("| Format | Effort | Encode time (s) | Size (MB) |")
+    print("|---|---|---:|---:|")
+    for save_format, quality in FORMATS:
+        if save_format == "HEIF" and not _HAS_HEIF:
+            continue
+        for effort in ENCODER_EFFORTS:
+            elapsed, size = bench(img, save_format, quality, effort, args.repeat)
+            label = f"{save_format} ({quality}%)" if quality else save_format
+            print(f"| {label} | {effort} | {elapsed:.2f} | {size / 1e6:.2f} |")
+
+
+if __name__ == "__main__":
+    main()
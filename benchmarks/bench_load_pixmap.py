@@ -0,0 +1,121 @@
+"""Compare decode-to-pixmap time and peak memory of ``load_pixmap`` paths.
+
+Usage::
+
+    QT_QPA_PLATFORM=offscreen python benchmarks/bench_load_pixmap.py [--width 6000] [--height 4000]
+
+Every measurement runs in a fresh interpreter so the peak RSS of one path
+does not hide the next. ``rgba`` is the previous implementation (convert to
+RGBA, export, wrap), ``rgbx`` wraps ``Format_RGBX8888`` and ``current`` is
+``utils.load_pixmap``.
+"""
+
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+PATHS = ("rgba", "rgbx", "current")
+
+
+def _max_rss_mb():
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+
+
+def run_worker(path_name, image_path, repeat):
+    from PyQt5.QtWidgets import QApplication
+    from PyQt5.QtGui import QImage, QPixmap
+    from PIL import Image, ImageOps
+
+    from borderframe.utils import load_pixmap
+
+    def rgba(path):
+        with Image.open(path) as img:
+            img = ImageOps.exif_transpose(img).convert("RGBA")
+            data = img.tobytes("raw", "RGBA")
+            qimage = QImage(data, img.width, img.height, QImage.Format_RGBA8888)
+            return QPixmap.fromImage(qimage)
+
+    def rgbx(path):
+        with Image.open(path) as img:
+            img = ImageOps.exif_transpose(img)
+            if img.mode != "RGB":
+                img = img.convert("RGB")
+            data = img.tobytes("raw", "RGBX")
+            qimage = QImage(
+                data, img.width, img.height, img.width * 4, QImage.Format_RGBX8888
+            )
+            return QPixmap.fromImage(qimage)
+
+    load = {"rgba": rgba, "rgbx": rgbx, "current": load_pixmap}[path_name]
+    app = QApplication.instance() or QApplication([])
+    baseline = _max_rss_mb()
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        pixmap = load(image_path)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+        del pixmap
+    print(f"{best:.4f} {_max_rss_mb() - baseline:.1f}")
+    app.quit()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--width", type=int, default=6000)
+    parser.add_argument("--height", type=int, default=4000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--worker", nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        run_worker(args.worker[0], args.worker[1], args.repeat)
+        return
+
+    from PIL import Image
+
+    with tempfile.TemporaryDirectory() as tmp:
+        base = Image.effect_mandelbrot(
+            (args.width, args.height), (-2.2, -1.4, 0.8, 1.4), 64
+        )
+        opaque = os.path.join(tmp, "opaque.jpg")
+        base.convert("RGB").save(opaque, quality=90)
+        alpha = os.path.join(tmp, "alpha.png")
+        rgba = base.convert("RGB")
+        rgba.putalpha(base)
+        rgba.save(alpha, compress_level=1)
+        del base, rgba
+
+        print(f"{args.width}x{args.height}, best of {args.repeat}\n")
+        print("| Input | Path | Time (s) | Peak RSS increase (MB) |")
+        print("|---|---|---:|---:|")
+        for label, image_path in (("JPEG (opaque)", opaque), ("PNG (alpha)", alpha)):
+            for path_name in PATHS:
+                output = subprocess.run(
+                    [
+                        sys.executable,
+                        os.path.abspath(__file__),
+                        "--repeat",
+                        str(args.repeat),
+                        "--worker",
+                        path_name,
+                        image_path,
+                    ],
+                    capture_output=True,
+                    text=True,
+                    check=True,
+                ).stdout.split()
+                print(f"| {label} | {path_name} | {output[0]} | {output[1]} |")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,259 @@
+"""Measure peak memory per image and fail when a committed ceiling is exceeded.
+
+Usage::
+
+    QT_QPA_PLATFORM=offscreen python benchmarks/bench_memory.py [--sizes 12,45,100]
+        [--paths process,load_pixmap,preview] [--ceilings FILE] [--update]
+
+Three paths are measured on a synthetic JPEG of each size (in megapixels):
+
+``process``
+    ``ProcessWorker.process_single_image`` framing to a 4:5 JPEG.
+``load_pixmap``
+    ``utils.load_pixmap``, the decode used by the preview and thumbnails.
+``preview``
+    The composition ``update_preview`` hands to the preview worker:
+    ``PreviewWorker.reduced_source`` followed by ``render_preview`` at
+    800x640, starting from the already loaded ``QImage``.
+
+Every measurement runs in a fresh interpreter. Peak RSS above the level
+before the measured call is sampled from ``/proc/self/statm`` every
+millisecond (``ru_maxrss`` elsewhere) and catches Pillow and Qt pixel
+buffers; the ``tracemalloc`` peak catches copies made through Python objects
+such as ``tobytes()``. Both are compared with the ceilings in
+``benchmarks/baselines/memory.json`` and the script exits with status 1 when
+any is exceeded. ``--update`` rewrites the ceilings as 125% of the measured
+values.
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+PATHS = ("process", "load_pixmap", "preview")
+CEILINGS = os.path.join(ROOT, "benchmarks", "baselines", "memory.json")
+# Headroom over the measured peak when ceilings are rewritten with --update
+CEILING_MARGIN = 1.25
+SETTINGS = {
+    "aspect_ratio": "4:5 (Instagram Portrait)",
+    "user_border_px": 40,
+    "border_color": "#FFFFFF",
+    "save_format": "JPEG",
+    "quality": 95,
+    "preserve_metadata": False,
+    "base_filename": "",
+}
+PREVIEW_SIZE = (800, 640)
+
+
+class RssSampler:
+    """Track the peak resident set size above the level at start."""
+
+    def __init__(self, interval=0.001):
+        self.interval = interval
+        self._page = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+        self._statm = os.path.exists("/proc/self/statm")
+        self._stop = threading.Event()
+        self.start_bytes = self.peak_bytes = self.current()
+
+    def current(self):
+        if self._statm:
+            with open("/proc/self/statm", "rb") as f:
+                return int(f.read().split()[1]) * self._page
+        # ru_maxrss is in kilobytes on Linux and bytes on macOS
+        scale = 1 if sys.platform == "darwin" else 1024
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.peak_bytes = max(self.peak_bytes, self.current())
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak_bytes = max(self.peak_bytes, self.current())
+
+    @property
+    def peak_mb(self):
+        return (self.peak_bytes - self.start_bytes) / 1e6
+
+
+def synthetic_jpeg(megapixels, directory):
+    """Write (once) and return a photo-like JPEG of about ``megapixels``."""
+    from PIL import Image
+
+    path = os.path.join(directory, f"memory-{megapixels:g}mp.jpg")
+    if os.path.exists(path):
+        return path
+    width = int((megapixels * 1e6 * 3 / 2) ** 0.5)
+    height = int(width * 2 / 3)
+    gradient = Image.linear_gradient("L").resize((width, height))
+    noise = Image.effect_noise((width, height), 32)
+    img = Image.merge("RGB", (gradient, noise, gradient.transpose(Image.FLIP_LEFT_RIGHT)))
+    img.save(path + ".tmp", "JPEG", quality=90)
+    os.replace(path + ".tmp", path)
+    return path
+
+
+def run_child(path_name, image_path):
+    """Measure one path in this interpreter and print the result as JSON."""
+    import warnings
+
+    from PIL import Image
+    from PyQt5.QtWidgets import QApplication
+
+    warnings.simplefilter("ignore", Image.DecompressionBombWarning)
+    app = QApplication.instance() or QApplication([])
+    output_dir = tempfile.mkdtemp(prefix="borderframe-memory-")
+
+    if path_name == "process":
+        from borderframe.pipeline import FramingPipeline
+        from borderframe.process_worker import ProcessWorker
+
+        worker = ProcessWorker([image_path], output_dir, dict(SETTINGS))
+        worker.pipeline = FramingPipeline(SETTINGS, output_dir)
+
+        def measured():
+            error = worker.process_single_image(image_path, 0, 1)
+            if error:
+                raise RuntimeError(error)
+
+    elif path_name == "load_pixmap":
+        from borderframe.utils import load_pixmap
+
+        def measured():
+            if load_pixmap(image_path).isNull():
+                raise RuntimeError("load_pixmap returned a null pixmap")
+
+    else:
+        from borderframe.preview_worker import PreviewRequest, PreviewWorker, render_preview
+        from borderframe.utils import load_qimage
+
+        request = PreviewRequest(
+            0, load_qimage(image_path), SETTINGS["user_border_px"], (4, 5),
+            SETTINGS["border_color"], *PREVIEW_SIZE,
+        )
+        preview_worker = PreviewWorker()
+
+        def measured():
+            render_preview(request, preview_worker.reduced_source(request))
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    with RssSampler() as sampler:
+        measured()
+    elapsed = time.perf_counter() - start
+    traced_peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    for name in os.listdir(output_dir):
+        os.remove(os.path.join(output_dir, name))
+    os.rmdir(output_dir)
+    del app
+    print(json.dumps({
+        "rss_mb": round(sampler.peak_mb, 1),
+        "tracemalloc_mb": round(traced_peak / 1e6, 1),
+        "seconds": round(elapsed, 3),
+    }))
+
+
+def measure(path_name, image_path):
+    env = dict(os.environ)
+    env.setdefault("QT_QPA_PLATFORM", "offscreen")
+    output = subprocess.run(
+        [sys.executable, __file__, "--child", path_name, image_path],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    if output.returncode != 0:
+        raise RuntimeError(f"{path_name} failed:\n{output.stderr}")
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="12,45,100", help="comma separated megapixels")
+    parser.add_argument("--paths", default=",".join(PATHS))
+    parser.add_argument("--ceilings", default=CEILINGS)
+    parser.add_argument(
+        "--update", action="store_true", help="rewrite the ceilings from this run"
+    )
+    parser.add_argument(
+        "--input-dir",
+        default=os.path.join(tempfile.gettempdir(), "borderframe-memory"),
+        help="where the synthetic inputs are generated and kept",
+    )
+    parser.add_argument("--child", nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        run_child(*args.child)
+        return 0
+
+    os.makedirs(args.input_dir, exist_ok=True)
+    ceilings = {}
+    if os.path.exists(args.ceilings):
+        with open(args.ceilings, "r", encoding="utf-8") as f:
+            ceilings = json.load(f)
+
+    failures = []
+    measured = {}
+    print("| Path | Size | Peak RSS (MB) | Ceiling | tracemalloc (MB) | Ceiling | Time (s) |")
+    print("|---|---:|---:|---:|---:|---:|---:|")
+    for megapixels in (float(size) for size in args.sizes.split(",")):
+        image_path = synthetic_jpeg(megapixels, args.input_dir)
+        for path_name in args.paths.split(","):
+            key = f"{path_name}/{megapixels:g}MP"
+            result = measure(path_name, image_path)
+            measured[key] = result
+            limit = ceilings.get(key, {})
+            marks = {}
+            for metric in ("rss_mb", "tracemalloc_mb"):
+                ceiling = limit.get(metric)
+                over = ceiling is not None and result[metric] > ceiling
+                marks[metric] = f"{ceiling:g}{' EXCEEDED' if over else ''}" if ceiling else "-"
+                if over and not args.update:
+                    failures.append(f"{key} {metric} {result[metric]:g} > {ceiling:g}")
+            print(
+                f"| {path_name} | {megapixels:g} MP | {result['rss_mb']:.1f} "
+                f"| {marks['rss_mb']} | {result['tracemalloc_mb']:.1f} "
+                f"| {marks['tracemalloc_mb']} | {result['seconds']:.2f} |"
+            )
+
+    if args.update:
+        for key, result in measured.items():
+            ceilings[key] = {
+                # Small peaks get an absolute floor so noise cannot fail a run
+                metric: max(round(result[metric] * CEILING_MARGIN), floor)
+                for metric, floor in (("rss_mb", 16), ("tracemalloc_mb", 2))
+            }
+        with open(args.ceilings, "w", encoding="utf-8") as f:
+            json.dump(dict(sorted(ceilings.items())), f, indent=1)
+        print(f"\nCeilings written to {args.ceilings}")
+        return 0
+
+    if failures:
+        print("\nMemory ceilings exceeded:\n  " + "\n  ".join(failures))
+        return 1
+    print("\nAll paths within their memory ceilings")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,240 @@
+"""Measure how ProcessWorker throughput scales with worker count and batch size.
+
+Usage::
+
+    python benchmarks/bench_scaling.py [--files 1000,10000] [--workers 1,2,4,8]
+        [--corpus-dir DIR] [--json scaling.json]
+
+For every corpus size a synthetic corpus of mixed sizes and formats (JPEG,
+PNG and TIFF from 0.3 to 6 MP) is written to ``--corpus-dir`` once and
+reused by later runs. Each corpus is then framed by the real
+``ProcessWorker.run`` once per value of ``BORDERFRAME_WORKERS``, with
+PyQt5's ``QThread`` replaced by a plain class so no display or Qt install is
+needed. Outputs go to a scratch folder that is emptied after every run.
+
+The table reports images/s, input MB/s, CPU use (CPU seconds per wall
+second, so 4.0 means four cores busy) and scaling efficiency: throughput
+relative to the smallest worker count, divided by the increase in workers.
+``--json`` writes the same rows together with the machine description.
+A 100k corpus takes about 70 GB of disk and roughly 2 CPU hours per run.
+"""
+
+import argparse
+import io
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import types
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from PIL import Image, ImageFilter
+
+
+def _stub_qt():
+    """Let ``borderframe.process_worker`` import without PyQt5."""
+
+    class QThread:
+        def __init__(self, *args, **kwargs):
+            pass
+
+    class _Signal:
+        def emit(self, *args):
+            pass
+
+    qtcore = types.ModuleType("PyQt5.QtCore")
+    qtcore.QThread = QThread
+    qtcore.pyqtSignal = lambda *args, **kwargs: _Signal()
+    sys.modules["PyQt5"] = types.ModuleType("PyQt5")
+    sys.modules["PyQt5.QtCore"] = qtcore
+
+
+_stub_qt()
+
+from borderframe.process_worker import ProcessWorker
+
+# (width, height, format, share of the corpus)
+CORPUS_MIX = (
+    (640, 480, "JPEG", 0.35),
+    (2000, 1500, "JPEG", 0.35),
+    (3000, 2000, "JPEG", 0.10),
+    (1200, 900, "PNG", 0.15),
+    (2000, 1500, "TIFF", 0.05),
+)
+# Distinct images generated per entry of CORPUS_MIX; files repeat them
+VARIANTS_PER_ENTRY = 4
+SETTINGS = {
+    "aspect_ratio": "4:5 (Instagram Portrait)",
+    "user_border_px": 40,
+    "border_color": "#FFFFFF",
+    "save_format": "JPEG",
+    "quality": 90,
+    "preserve_metadata": False,
+    "base_filename": "",
+}
+EXTENSIONS = {"JPEG": ".jpg", "PNG": ".png", "TIFF": ".tif"}
+
+
+def synthetic_photo(width, height, seed):
+    base = Image.effect_mandelbrot(
+        (width, height), (-2.2 + seed * 0.1, -1.4, 0.8, 1.4), 48
+    )
+    noise = Image.effect_noise((width, height), 16 + seed)
+    gradient = Image.linear_gradient("L").resize((width, height))
+    img = Image.merge("RGB", (base, gradient, Image.blend(base, noise, 0.3)))
+    return img.filter(ImageFilter.SMOOTH)
+
+
+def encode(img, save_format):
+    buffer = io.BytesIO()
+    if save_format == "JPEG":
+        img.save(buffer, "JPEG", quality=90)
+    elif save_format == "PNG":
+        img.save(buffer, "PNG", compress_level=1)
+    else:
+        img.save(buffer, "TIFF")
+    return buffer.getvalue()
+
+
+def build_corpus(directory, count, log=print):
+    """Write ``count`` files to ``directory`` unless it is already complete."""
+    marker = os.path.join(directory, ".complete")
+    if os.path.exists(marker):
+        return
+    log(f"Generating {count} files in {directory}")
+    os.makedirs(directory, exist_ok=True)
+    templates = []
+    for width, height, save_format, share in CORPUS_MIX:
+        encoded = [
+            encode(synthetic_photo(width, height, seed), save_format)
+            for seed in range(VARIANTS_PER_ENTRY)
+        ]
+        templates.append((EXTENSIONS[save_format], encoded, share))
+
+    index = 0
+    for ext, encoded, share in templates:
+        for n in range(max(1, round(count * share))):
+            if index >= count:
+                break
+            # 1000 files per subfolder keeps directory listings fast
+            folder = os.path.join(directory, f"{index // 1000:04d}")
+            os.makedirs(folder, exist_ok=True)
+            with open(os.path.join(folder, f"img{index:06d}{ext}"), "wb") as f:
+                f.write(encoded[n % len(encoded)])
+            index += 1
+    with open(marker, "w") as f:
+        f.write(str(index))
+
+
+def corpus_files(directory):
+    files = []
+    for folder, _, names in os.walk(directory):
+        files.extend(os.path.join(folder, name) for name in names if name[0] != ".")
+    files.sort()
+    return files
+
+
+def run_once(files, workers, output_dir):
+    """Frame ``files`` with ``workers`` threads and return the measurements."""
+    os.environ["BORDERFRAME_WORKERS"] = str(workers)
+    worker = ProcessWorker(files, output_dir, dict(SETTINGS))
+    errors = []
+    worker.finished = types.SimpleNamespace(emit=errors.extend)
+
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    worker.run()
+    cpu = time.process_time() - cpu_start
+    wall = time.perf_counter() - wall_start
+    return wall, cpu, errors
+
+
+def main(argv=None):
+    cpus = os.cpu_count() or 1
+    default_workers = sorted({1, 2, 4, 8, cpus} & set(range(1, cpus + 1)))
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", default="1000", help="comma separated corpus sizes")
+    parser.add_argument(
+        "--workers",
+        default=",".join(map(str, default_workers)),
+        help="comma separated BORDERFRAME_WORKERS values",
+    )
+    parser.add_argument(
+        "--corpus-dir",
+        default=os.path.join(tempfile.gettempdir(), "borderframe-corpus"),
+        help="where corpora are generated and kept between runs",
+    )
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args(argv)
+
+    counts = [int(value) for value in args.files.split(",")]
+    sweep = sorted({int(value) for value in args.workers.split(",")})
+    rows = []
+    for count in counts:
+        directory = os.path.join(args.corpus_dir, str(count))
+        build_corpus(directory, count)
+        files = corpus_files(directory)
+        megabytes = sum(os.path.getsize(path) for path in files) / 1e6
+        reference = None
+        for workers in sweep:
+            output_dir = tempfile.mkdtemp(prefix="borderframe-scaling-")
+            try:
+                wall, cpu, errors = run_once(files, workers, output_dir)
+            finally:
+                shutil.rmtree(output_dir, ignore_errors=True)
+            images_per_s = len(files) / wall
+            if reference is None:
+                reference = (workers, images_per_s)
+            efficiency = (images_per_s / reference[1]) / (workers / reference[0])
+            row = {
+                "files": len(files),
+                "input_mb": round(megabytes, 1),
+                "workers": workers,
+                "seconds": round(wall, 3),
+                "images_per_s": round(images_per_s, 2),
+                "mb_per_s": round(megabytes / wall, 2),
+                "cpu_cores": round(cpu / wall, 2),
+                "efficiency": round(efficiency, 3),
+                "errors": len(errors),
+            }
+            rows.append(row)
+            print(
+                f"{row['files']} files, {workers} workers: "
+                f"{row['images_per_s']} images/s, {row['errors']} errors"
+            )
+
+    print("\n| Files | Workers | Time (s) | Images/s | MB/s | CPU (cores) | Efficiency |")
+    print("|---:|---:|---:|---:|---:|---:|---:|")
+    for row in rows:
+        print(
+            f"| {row['files']} | {row['workers']} | {row['seconds']:.1f} "
+            f"| {row['images_per_s']:.1f} | {row['mb_per_s']:.1f} "
+            f"| {row['cpu_cores']:.2f} | {row['efficiency']:.0%} |"
+        )
+
+    if args.json:
+        import PIL
+
+        report = {
+            "meta": {
+                "python": platform.python_version(),
+                "pillow": PIL.__version__,
+                "platform": platform.platform(),
+                "cpu_count": cpus,
+                "settings": SETTINGS,
+                "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            },
+            "results": rows,
+        }
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=1)
+    return 1 if any(row["errors"] for row in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
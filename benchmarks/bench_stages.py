@@ -0,0 +1,232 @@
+"""Time each stage of ``process_single_image`` and compare against baselines.
+
+Usage::
+
+    python benchmarks/bench_stages.py run [--sizes 1,12] [--repeat 5] [--output FILE]
+    python benchmarks/bench_stages.py compare BASELINE CURRENT [--threshold 0.25]
+    python benchmarks/bench_stages.py run --compare benchmarks/baselines/stages.json
+
+Synthetic images are generated for every size (in megapixels) and mode
+(RGB, RGBA, LA, P and 16-bit grayscale). RGB inputs are JPEGs with an EXIF
+orientation tag so ``exif_transpose`` has work to do; the other modes are
+PNGs. The stages are decode, ``exif_transpose``, flatten
+(``prepare_source``), framing (``render_border``: expand and paste in one
+pass) and one encode per entry of ``encoders.SAVE_FORMATS``. Every mode is
+composited onto an RGB canvas, so encodes are timed for the RGB and the
+16-bit cases only; HEIF is skipped when pillow-heif is not installed.
+
+Results are keyed ``"<size>MP/<mode>/<stage>"`` with the best and median
+time of ``--repeat`` runs. ``compare`` flags every stage whose best time grew
+by more than ``--threshold`` (a fraction) and by at least 2 ms, and exits
+with status 1. Baselines
+are only meaningful on the machine that produced them; regenerate
+``benchmarks/baselines/stages.json`` when the reference machine changes.
+"""
+
+import argparse
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from PIL import Image, ImageOps
+
+from borderframe.compositor import HIGH_BIT_DEPTH_FORMATS, prepare_source
+from borderframe.encoders import SAVE_FORMATS, build_save_args
+from borderframe.framing import render_border
+
+MODES = ("RGB", "RGBA", "LA", "P", "I;16")
+ENCODED_MODES = ("RGB", "I;16")
+BORDER_COLOR = "#FFFFFF"
+USER_BORDER_PX = 20
+ASPECT_RATIO = (4, 5)
+DEFAULT_THRESHOLD = 0.25
+# Slowdowns smaller than this (seconds) are timer noise, whatever the ratio
+MIN_REGRESSION = 0.002
+BASELINE = os.path.join(ROOT, "benchmarks", "baselines", "stages.json")
+
+try:
+    from borderframe.heif import register_heif
+
+    register_heif()
+    _HAS_HEIF = True
+except RuntimeError:  # pragma: no cover - optional dependency
+    _HAS_HEIF = False
+
+
+def synthetic(mode, megapixels):
+    """Deterministic test image of about ``megapixels`` in ``mode``."""
+    width = int((megapixels * 1e6 * 4 / 3) ** 0.5)
+    height = int(width * 3 / 4)
+    base = Image.effect_mandelbrot((width, height), (-2.2, -1.4, 0.8, 1.4), 64)
+    if mode == "I;16":
+        return base.convert("I").point(lambda v: v * 257).convert("I;16")
+    if mode == "P":
+        return base.convert("RGB").quantize(64)
+    if mode in ("RGBA", "LA"):
+        img = base.convert(mode[:-1])
+        img.putalpha(Image.linear_gradient("L").resize((width, height)))
+        return img
+    return base.convert(mode)
+
+
+def encoded_input(mode, megapixels):
+    """Return the encoded bytes the decode stage starts from."""
+    img = synthetic(mode, megapixels)
+    buffer = io.BytesIO()
+    if mode == "RGB":
+        exif = Image.Exif()
+        exif[0x0112] = 6  # Orientation: rotate 90 degrees
+        img.save(buffer, "JPEG", quality=90, exif=exif)
+    else:
+        img.save(buffer, "PNG", compress_level=1)
+    return buffer.getvalue()
+
+
+def timed(func, repeat):
+    """Return ``(best, median, last result)`` of ``repeat`` calls."""
+    times = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - start)
+    return min(times), statistics.median(times), result
+
+
+def decode(data):
+    with Image.open(io.BytesIO(data)) as img:
+        img.load()
+        return img.copy()
+
+
+def run(sizes, repeat, log=print):
+    results = {}
+
+    def record(key, func):
+        best, median, result = timed(func, repeat)
+        results[key] = {"best": round(best, 6), "median": round(median, 6)}
+        log(f"{key:<40} {best * 1000:9.2f} ms")
+        return result
+
+    for megapixels in sizes:
+        for mode in MODES:
+            prefix = f"{megapixels:g}MP/{mode}"
+            data = encoded_input(mode, megapixels)
+            img = record(f"{prefix}/decode", lambda: decode(data))
+            img = record(f"{prefix}/exif_transpose", lambda: ImageOps.exif_transpose(img))
+            keep = mode == "I;16"
+            flat = record(f"{prefix}/flatten", lambda: prepare_source(img, keep))
+            framed = record(
+                f"{prefix}/frame",
+                lambda: render_border(flat, USER_BORDER_PX, ASPECT_RATIO, BORDER_COLOR, keep),
+            )
+            if mode not in ENCODED_MODES:
+                continue
+            for label, (save_format, quality) in SAVE_FORMATS.items():
+                if save_format == "HEIF" and not _HAS_HEIF:
+                    continue
+                output = framed
+                if keep and save_format not in HIGH_BIT_DEPTH_FORMATS:
+                    output = render_border(
+                        prepare_source(img), USER_BORDER_PX, ASPECT_RATIO, BORDER_COLOR
+                    )
+                save_args = build_save_args(save_format, quality)
+
+                def encode():
+                    buffer = io.BytesIO()
+                    output.save(buffer, **save_args)
+                    return buffer
+
+                record(f"{prefix}/encode {label}", encode)
+    return results
+
+
+def metadata():
+    import PIL
+
+    return {
+        "python": platform.python_version(),
+        "pillow": PIL.__version__,
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def compare(baseline, current, threshold, log=print):
+    """Print a comparison table and return the keys that regressed."""
+    regressions = []
+    log("| Stage | Baseline (ms) | Current (ms) | Change |")
+    log("|---|---:|---:|---:|")
+    for key, base in baseline["results"].items():
+        if key not in current["results"]:
+            continue
+        now = current["results"][key]["best"]
+        change = now / base["best"] - 1 if base["best"] else 0.0
+        regressed = change > threshold and now - base["best"] > MIN_REGRESSION
+        flag = " REGRESSION" if regressed else ""
+        if flag:
+            regressions.append(key)
+        log(f"| {key} | {base['best'] * 1000:.2f} | {now * 1000:.2f} | {change:+.0%}{flag} |")
+    for field in ("machine", "cpu_count", "pillow", "python"):
+        if baseline["meta"].get(field) != current["meta"].get(field):
+            log(
+                f"\nNote: {field} differs ({baseline['meta'].get(field)} vs "
+                f"{current['meta'].get(field)}); timings may not be comparable"
+            )
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    run_parser = commands.add_parser("run", help="time every stage")
+    run_parser.add_argument(
+        "--sizes", default="1,12", help="comma separated megapixel sizes"
+    )
+    run_parser.add_argument("--repeat", type=int, default=5)
+    run_parser.add_argument("--output", help="write results as JSON")
+    run_parser.add_argument("--compare", nargs="?", const=BASELINE, help="baseline JSON")
+    run_parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    compare_parser = commands.add_parser("compare", help="compare two result files")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        sizes = [float(size) for size in args.sizes.split(",")]
+        current = {"meta": metadata(), "results": run(sizes, args.repeat)}
+        if args.output:
+            os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+            with open(args.output, "w", encoding="utf-8") as f:
+                json.dump(current, f, indent=1, sort_keys=True)
+        if not args.compare:
+            return 0
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+    else:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        with open(args.current, "r", encoding="utf-8") as f:
+            current = json.load(f)
+
+    print()
+    regressions = compare(baseline, current, args.threshold)
+    if regressions:
+        print(f"\n{len(regressions)} stages regressed by more than {args.threshold:.0%}")
+        return 1
+    print(f"\nNo stage regressed by more than {args.threshold:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
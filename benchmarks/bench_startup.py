@@ -0,0 +1,79 @@
+"""Measure cold import time of the GUI entry point and enforce a budget.
+
+Usage::
+
+    python benchmarks/bench_startup.py [--repeat 5] [--budget-ms 150]
+
+Each run is a fresh ``python -X importtime`` interpreter importing
+``borderframe.image_processor``, which is what ``main.py`` needs before the
+window appears. The median cumulative import time is compared against
+``--budget-ms`` and the script exits with status 1 when it is exceeded or
+when a module that should load lazily (Pillow, piexif, pillow-heif) is
+imported at startup, so CI can run it as a check.
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODULE = "borderframe.image_processor"
+# Top-level packages that must not be imported before the window is shown
+LAZY_MODULES = ("PIL", "piexif", "pillow_heif")
+
+
+def import_profile(module):
+    """Return ``{module: (self_us, cumulative_us)}`` for one cold import."""
+    env = dict(os.environ, QT_QPA_PLATFORM="offscreen")
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stderr
+    profile = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        profile[name.strip()] = (int(self_us), int(cumulative_us))
+    return profile
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=150.0)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    runs = [import_profile(MODULE) for _ in range(args.repeat)]
+    median_ms = statistics.median(run[MODULE][1] for run in runs) / 1000
+    last = runs[-1]
+
+    print(f"import {MODULE}: median {median_ms:.1f} ms of {args.repeat} runs "
+          f"(budget {args.budget_ms:.0f} ms)\n")
+    print("| Module | Self (ms) |")
+    print("|---|---:|")
+    slowest = sorted(last.items(), key=lambda item: -item[1][0])[: args.top]
+    for name, (self_us, _) in slowest:
+        print(f"| {name} | {self_us / 1000:.1f} |")
+
+    failures = []
+    eager = sorted(name for name in LAZY_MODULES if name in last)
+    if eager:
+        failures.append(f"imported at startup: {', '.join(eager)}")
+    if median_ms > args.budget_ms:
+        failures.append(f"{median_ms:.1f} ms exceeds the {args.budget_ms:.0f} ms budget")
+    for failure in failures:
+        print(f"\nFAIL: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
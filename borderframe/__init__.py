@@ -1,7 +1,36 @@
-"""BorderFrame application package."""
+"""BorderFrame application package.
 
-from .image_processor import ImageProcessor
-from .thumbnail_dialog import ThumbnailDialog
-from .process_worker import ProcessWorker
+The public classes are imported on first access so that importing the
+package (or a Qt-free submodule) does not load PyQt5, Pillow or piexif.
+"""
 
-__all__ = ["ImageProcessor", "ThumbnailDialog", "ProcessWorker"]
+import importlib
+
+_EXPORTS = {
+    "ImageProcessor": ".image_processor",
+    "ThumbnailDialog": ".thumbnail_dialog",
+    "ProcessWorker": ".process_worker",
+    "iter_process": ".streaming",
+    "aprocess": ".streaming",
+}
+
+__all__ = [
+    "ImageProcessor",
+    "ThumbnailDialog",
+    "ProcessWorker",
+    "iter_process",
+    "aprocess",
+]
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -0,0 +1,392 @@
+"""Read inputs from and write outputs to ZIP and TAR archives.
+
+Images inside an archive are addressed as ``<archive path>!/<member name>``,
+so they travel through batch lists, manifests and the GUI image list like
+ordinary paths. :func:`open_member` returns a seekable file object for the
+decoder instead of unpacking the archive to disk: members stored without
+compression (the usual case for ZIPs of photos, and every member of a plain
+TAR) are read straight from their byte range in the archive and deflated
+ZIP members are inflated into memory. Compressed TARs cannot be read that
+way: reaching a member means decompressing everything before it, once per
+member, so they are refused as inputs with a ValueError.
+
+:class:`ArchiveWriter` is a drop-in :class:`~borderframe.writer.OutputWriter`
+that appends encoded outputs to one ZIP or TAR file or stream, compressed
+TARs included, instead of writing a temporary file per image.
+"""
+
+import contextlib
+import functools
+import io
+import os
+import shutil
+import struct
+import tarfile
+import threading
+import time
+import zipfile
+import zlib
+from typing import List, Optional, Sequence
+
+from .writer import DEFAULT_MAX_QUEUED_BYTES, OutputWriter, create_temp_file, fsync_directory
+
+# Joins an archive path and a member name in input paths
+MEMBER_SEPARATOR = "!/"
+# Archive file extensions and the format each one is written as
+ARCHIVE_FORMATS = {
+    ".zip": "zip",
+    ".tar": "tar",
+    ".tar.gz": "gz",
+    ".tgz": "gz",
+    ".tar.bz2": "bz2",
+    ".tbz2": "bz2",
+    ".tar.xz": "xz",
+    ".txz": "xz",
+}
+# Formats whose members can be read in place
+INPUT_FORMATS = ("zip", "tar")
+COPY_CHUNK_SIZE = 8 * 1024 * 1024
+# Member indexes kept in memory, one per archive
+MAX_INDEXED_ARCHIVES = 16
+
+# ZIP local file header; the name and extra field lengths are the last two
+_LOCAL_HEADER = struct.Struct("<4s2B4HL2L2H")
+
+
+def archive_extension(path: str) -> Optional[str]:
+    """Return the archive extension ``path`` ends with, or None."""
+    lower = path.lower()
+    for ext in sorted(ARCHIVE_FORMATS, key=len, reverse=True):
+        if lower.endswith(ext):
+            return ext
+    return None
+
+
+def archive_format(path: str) -> Optional[str]:
+    """Return ``"zip"``, ``"tar"``, ``"gz"``, ``"bz2"`` or ``"xz"`` for ``path``."""
+    ext = archive_extension(path)
+    return ARCHIVE_FORMATS[ext] if ext else None
+
+
+def member_path(archive_path: str, name: str) -> str:
+    return archive_path + MEMBER_SEPARATOR + name
+
+
+def split_member(path: str):
+    """Return ``(archive_path, member_name)`` for a member path, else None."""
+    start = 0
+    while True:
+        position = path.find(MEMBER_SEPARATOR, start)
+        if position < 0:
+            return None
+        archive_path = path[:position]
+        if archive_format(archive_path) and os.path.isfile(archive_path):
+            return archive_path, path[position + len(MEMBER_SEPARATOR):]
+        start = position + 1
+
+
+def is_member(path: str) -> bool:
+    return MEMBER_SEPARATOR in path and split_member(path) is not None
+
+
+class _Entry:
+    __slots__ = ("offset", "size", "compressed_size", "method", "crc", "data_offset")
+
+    def __init__(self, offset, size, compressed_size=None, method=None, crc=None):
+        self.offset = offset
+        self.size = size
+        self.compressed_size = compressed_size
+        self.method = method
+        self.crc = crc
+        # ZIP data offsets are found by reading the local header on first use
+        self.data_offset = offset if method is None else None
+
+
+def _index(archive_path: str):
+    stat = os.stat(archive_path)
+    return _cached_index(archive_path, stat.st_mtime_ns, stat.st_size)
+
+
+@functools.lru_cache(maxsize=MAX_INDEXED_ARCHIVES)
+def _cached_index(archive_path: str, mtime_ns: int, size: int):
+    """Map the regular file members of an archive to their location.
+
+    Raises:
+        ValueError: if the archive is damaged, not an archive at all or a
+            compressed TAR.
+    """
+    if archive_format(archive_path) not in INPUT_FORMATS:
+        raise ValueError(
+            f"cannot read {os.path.basename(archive_path)}: images in compressed "
+            "TAR archives cannot be read in place; unpack it or use a .zip or .tar"
+        )
+    try:
+        return _read_index(archive_path)
+    except (zipfile.BadZipFile, tarfile.TarError, EOFError) as e:
+        raise ValueError(f"cannot read {os.path.basename(archive_path)}: {e}") from e
+
+
+def _read_index(archive_path: str):
+    entries = {}
+    if archive_format(archive_path) == "zip":
+        with zipfile.ZipFile(archive_path) as archive:
+            for info in archive.infolist():
+                if info.is_dir() or info.flag_bits & 0x1:
+                    continue
+                entries[info.filename] = _Entry(
+                    info.header_offset,
+                    info.file_size,
+                    info.compress_size,
+                    info.compress_type,
+                    info.CRC,
+                )
+    else:
+        with tarfile.open(archive_path, "r:") as archive:
+            for info in archive:
+                if info.isreg() and not info.issparse():
+                    entries[info.name] = _Entry(info.offset_data, info.size)
+    return entries
+
+
+def _safe_name(name: str) -> bool:
+    parts = name.replace("\\", "/").split("/")
+    return not name.startswith(("/", "\\")) and ".." not in parts and ":" not in parts[0]
+
+
+def archive_members(archive_path: str, extensions: Sequence[str]) -> List[str]:
+    """Return the sorted member paths of ``archive_path`` ending in ``extensions``.
+
+    Names that would escape the archive (absolute or containing ``..``) are
+    skipped. Raises ValueError for damaged archives and compressed TARs.
+    """
+    archive_path = os.path.abspath(archive_path)
+    extensions = tuple(extensions)
+    return [
+        member_path(archive_path, name)
+        for name in sorted(_index(archive_path))
+        if name.lower().endswith(extensions) and _safe_name(name)
+    ]
+
+
+class _MemberRange(io.RawIOBase):
+    """Seekable read-only view of ``size`` bytes at ``offset`` in a file."""
+
+    def __init__(self, file, offset: int, size: int):
+        self._file = file
+        self._offset = offset
+        self._size = size
+        self._position = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._position
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self._position
+        elif whence == io.SEEK_END:
+            offset += self._size
+        self._position = max(0, offset)
+        return self._position
+
+    def readinto(self, buffer):
+        count = min(len(buffer), self._size - self._position)
+        if count <= 0:
+            return 0
+        self._file.seek(self._offset + self._position)
+        count = self._file.readinto(memoryview(buffer)[:count])
+        self._position += count
+        return count
+
+    def close(self):
+        if not self.closed:
+            self._file.close()
+        super().close()
+
+
+def open_member(path: str):
+    """Open the archive member ``path`` as a seekable binary file object.
+
+    Raises:
+        FileNotFoundError: if the archive has no such member.
+        ValueError: if the archive is damaged or a compressed TAR.
+    """
+    archive_path, name = split_member(path)
+    entry = _index(archive_path).get(name)
+    if entry is None:
+        raise FileNotFoundError(f"{name} not found in {os.path.basename(archive_path)}")
+    if archive_format(archive_path) == "zip":
+        return _open_zip_member(archive_path, name, entry)
+    return io.BufferedReader(
+        _MemberRange(open(archive_path, "rb"), entry.data_offset, entry.size)
+    )
+
+
+def _open_zip_member(archive_path: str, name: str, entry: _Entry):
+    if entry.method not in (zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED):
+        with zipfile.ZipFile(archive_path) as archive:
+            return io.BytesIO(archive.read(name))
+    file = open(archive_path, "rb")
+    try:
+        if entry.data_offset is None:
+            file.seek(entry.offset)
+            header = _LOCAL_HEADER.unpack(file.read(_LOCAL_HEADER.size))
+            if header[0] != b"PK\x03\x04":
+                raise zipfile.BadZipFile(f"bad local header for {name}")
+            entry.data_offset = entry.offset + _LOCAL_HEADER.size + header[10] + header[11]
+        if entry.method == zipfile.ZIP_STORED:
+            return io.BufferedReader(_MemberRange(file, entry.data_offset, entry.size))
+        file.seek(entry.data_offset)
+        data = zlib.decompressobj(-15).decompress(file.read(entry.compressed_size))
+    except BaseException:
+        file.close()
+        raise
+    file.close()
+    if len(data) != entry.size or zlib.crc32(data) != entry.crc:
+        raise zipfile.BadZipFile(f"bad CRC for {name}")
+    return io.BytesIO(data)
+
+
+def member_size(path: str) -> int:
+    """Return the uncompressed size of the archive member ``path``."""
+    archive_path, name = split_member(path)
+    return _index(archive_path)[name].size
+
+
+@contextlib.contextmanager
+def image_source(path: str):
+    """Yield what ``Image.open`` should read for ``path``.
+
+    That is ``path`` itself for ordinary files and an open member file for
+    archive members, closed again on exit.
+    """
+    if not is_member(path):
+        yield path
+        return
+    with open_member(path) as member:
+        yield member
+
+
+class ArchiveWriter(OutputWriter):
+    """Append encoded outputs to a ZIP or TAR archive from one writer thread.
+
+    ``target`` is the archive path, written through a temporary file that
+    :meth:`close` renames into place, or a writable binary stream such as a
+    pipe or socket, which is written strictly sequentially. ``root`` is
+    removed from output paths to form member names. ``archive_type`` defaults
+    to the format matching ``target``'s extension. Members are stored without
+    compression; the images already are compressed. Each member name can be
+    written once; writing it again fails with ValueError.
+    """
+
+    is_archive = True
+
+    def __init__(
+        self,
+        target,
+        root: str = "",
+        archive_type: Optional[str] = None,
+        fsync: str = "none",
+        max_queued_bytes: int = DEFAULT_MAX_QUEUED_BYTES,
+    ):
+        archive_type = archive_type or (
+            archive_format(target) if isinstance(target, str) else None
+        )
+        if archive_type not in ARCHIVE_FORMATS.values():
+            raise ValueError(f"Unknown archive type for {target!r}")
+        self.archive_type = archive_type
+        self.root = root
+        self.path = None
+        self._temp_path = None
+        if isinstance(target, str):
+            self.path = target
+            fd, self._temp_path = create_temp_file(target)
+            self._file = os.fdopen(fd, "wb")
+        else:
+            self._file = target
+        if archive_type == "zip":
+            self._archive = zipfile.ZipFile(self._file, "w", zipfile.ZIP_STORED)
+        else:
+            compression = "" if archive_type == "tar" else archive_type
+            stream = "w|" if self.path is None else "w:"
+            self._archive = tarfile.open(fileobj=self._file, mode=stream + compression)
+        self._archive_lock = threading.Lock()
+        self._names = set()
+        super().__init__(writers=1, fsync=fsync, max_queued_bytes=max_queued_bytes)
+
+    def member_name(self, output_path: str) -> str:
+        if self.root:
+            output_path = os.path.relpath(output_path, self.root)
+        return output_path.replace(os.sep, "/")
+
+    def add_file(self, output_path: str, source) -> None:
+        """Copy ``source``, a path or a binary file object, in unchanged."""
+        if isinstance(source, str):
+            with open(source, "rb") as f:
+                self.add_file(output_path, f)
+            return
+        size = source.seek(0, io.SEEK_END)
+        source.seek(0)
+        with self._archive_lock:
+            self._add(self.member_name(output_path), source, size)
+
+    def _write(self, output_path: str, data) -> None:
+        view = memoryview(data).cast("B")
+        with self._archive_lock:
+            if self.cancelled:
+                return
+            self._add(self.member_name(output_path), io.BytesIO(view), len(view))
+
+    def _add(self, name: str, source, size: int) -> None:
+        if name in self._names:
+            raise ValueError(f"{name} is already in the archive")
+        self._names.add(name)
+        if self.archive_type == "zip":
+            info = zipfile.ZipInfo(name, time.localtime()[:6])
+            info.external_attr = 0o644 << 16
+            info.file_size = size
+            with self._archive.open(
+                info, "w", force_zip64=size > zipfile.ZIP64_LIMIT
+            ) as dest:
+                shutil.copyfileobj(source, dest, COPY_CHUNK_SIZE)
+        else:
+            info = tarfile.TarInfo(name)
+            info.size = size
+            info.mtime = time.time()
+            info.mode = 0o644
+            self._archive.addfile(info, source)
+
+    def close(self, cancel: bool = False) -> List[str]:
+        """Finish queued writes and complete the archive.
+
+        Members written before a cancellation are kept, so the archive is
+        always valid. Writing to a stream leaves the stream open.
+        """
+        errors = super().close(cancel)
+        try:
+            self._archive.close()
+            if self.path is None:
+                self._file.flush()
+                return errors
+            if self.fsync != "none":
+                self._file.flush()
+                os.fsync(self._file.fileno())
+            self._file.close()
+            os.replace(self._temp_path, self.path)
+        except Exception as e:
+            errors.append(f"Error writing {os.path.basename(self.path or 'archive')}: {e}")
+            if self._temp_path is not None:
+                self._file.close()
+                try:
+                    os.remove(self._temp_path)
+                except OSError:
+                    pass
+            return errors
+        if self.fsync == "full":
+            fsync_directory(os.path.dirname(self.path) or ".")
+        return errors
@@ -0,0 +1,332 @@
+"""Headless batch runs, optionally split across machines by shard.
+
+Every node lists the same inputs, sorts them by path relative to a common
+root and keeps the ones whose stable hash falls into its shard, so nodes
+sharing storage split an archive without talking to each other. Outputs keep
+each image's folder relative to that root, so equal file names in different
+folders never collide, and ``base_filename`` numbering uses each image's
+index in the full sorted list, so it never collides between shards.
+
+Inputs may be ZIP or TAR archives, whose images are framed without
+unpacking them, and the output may be an archive file instead of a folder;
+shards then write one archive each, named ``<name>-K-of-N.zip``.
+
+Each run writes a JSON Lines manifest: a header line describing the run,
+then one line per image as it finishes. :func:`merge_manifests` combines the
+manifests of all shards into one report and flags missing or duplicated
+shards.
+"""
+
+import concurrent.futures
+import hashlib
+import json
+import os
+import time
+from typing import Iterable, List, Optional, Tuple
+
+from .archive import ArchiveWriter, archive_extension, archive_members
+from .isolation import IsolatedPipeline, isolation_enabled
+from .pipeline import IMAGE_EXTENSIONS, FramingPipeline, worker_count
+from .profiling import SamplingProfiler, profiling_enabled
+from .writer import OutputWriter
+
+MANIFEST_VERSION = 1
+
+
+def parse_shard(value: str) -> Tuple[int, int]:
+    """Parse ``"K/N"`` (1 <= K <= N) into ``(K, N)``."""
+    try:
+        k, n = (int(part) for part in value.split("/"))
+    except ValueError:
+        raise ValueError(f"shard must look like K/N, got {value!r}") from None
+    if not 1 <= k <= n:
+        raise ValueError(f"shard {value!r} is out of range")
+    return k, n
+
+
+def shard_of(relative_path: str, shards: int) -> int:
+    """Return the 1-based shard of ``relative_path`` out of ``shards``.
+
+    The path is hashed with BLAKE2b over its POSIX form, so the result is
+    the same on every machine, operating system and Python version.
+    """
+    key = relative_path.replace(os.sep, "/").encode("utf-8")
+    digest = hashlib.blake2b(key, digest_size=8).digest()
+    return int.from_bytes(digest, "big") % shards + 1
+
+
+def collect_inputs(inputs: Iterable[str], root: Optional[str] = None):
+    """Return ``(root, relative_paths)`` for image files among ``inputs``.
+
+    Folders are walked recursively and archives, given directly or found in
+    folders, contribute their images as member paths. Paths are made
+    relative to ``root``, which defaults to the common folder of the given
+    inputs, and sorted so every node sees the same order.
+    """
+    files = []
+    folders = []
+    for path in inputs:
+        path = os.path.abspath(path)
+        if os.path.isdir(path):
+            folders.append(path)
+            for folder, _, names in os.walk(path):
+                for name in names:
+                    if name.lower().endswith(IMAGE_EXTENSIONS):
+                        files.append(os.path.join(folder, name))
+                    elif archive_extension(name):
+                        files.extend(
+                            archive_members(os.path.join(folder, name), IMAGE_EXTENSIONS)
+                        )
+        elif archive_extension(path) and os.path.isfile(path):
+            files.extend(archive_members(path, IMAGE_EXTENSIONS))
+            folders.append(os.path.dirname(path))
+        else:
+            files.append(path)
+            folders.append(os.path.dirname(path))
+    if root is None:
+        root = os.path.commonpath(folders) if folders else os.getcwd()
+    root = os.path.abspath(root)
+    relative = sorted(
+        {os.path.relpath(path, root).replace(os.sep, "/") for path in files}
+    )
+    return root, relative
+
+
+def shard_archive_path(path: str, shard: Tuple[int, int]) -> str:
+    """Return the archive shard ``(K, N)`` writes for the output ``path``.
+
+    A single shard writes ``path`` itself; otherwise ``-K-of-N`` is added
+    before the archive extension so nodes never write the same file.
+    """
+    k, n = shard
+    if n == 1:
+        return path
+    ext = archive_extension(path)
+    return f"{path[:-len(ext)]}-{k}-of-{n}{ext}"
+
+
+def run_batch(
+    inputs: List[str],
+    output_dir: str,
+    settings,
+    shard: Tuple[int, int] = (1, 1),
+    manifest_path: Optional[str] = None,
+    root: Optional[str] = None,
+    workers: Optional[int] = None,
+    log=print,
+    profile: bool = False,
+    isolate: bool = False,
+    image_timeout: Optional[float] = None,
+    memory_limit: Optional[int] = None,
+) -> dict:
+    """Frame this shard's share of ``inputs`` and return a summary.
+
+    When ``output_dir`` names an archive file (``.zip``, ``.tar``,
+    ``.tar.gz`` ...), the outputs are written into it, see
+    :func:`shard_archive_path`, and the manifest goes next to it. At most a
+    few images per worker are in flight at a time, so memory use does not
+    grow with the size of the input set. With ``profile`` (or
+    ``BORDERFRAME_PROFILE``) the workers are sampled and the profile is
+    written next to the manifest. With ``isolate`` (or
+    ``BORDERFRAME_ISOLATE``) every image is framed in a child process killed
+    after ``image_timeout`` seconds and limited to ``memory_limit`` bytes,
+    see :class:`~borderframe.isolation.IsolatedPipeline`; the workers only
+    wait for the children then, so no profile is written.
+    """
+    k, n = shard
+    root, relative = collect_inputs(inputs, root)
+    total = len(relative)
+    selected = [
+        (index, path)
+        for index, path in enumerate(relative)
+        if n == 1 or shard_of(path, n) == k
+    ]
+    output_archive = None
+    if archive_extension(output_dir):
+        output_archive = shard_archive_path(output_dir, shard)
+        output_dir = os.path.dirname(os.path.abspath(output_archive))
+    if manifest_path is None:
+        manifest_path = os.path.join(output_dir, f"manifest-{k}-of-{n}.jsonl")
+
+    if output_archive:
+        writer = ArchiveWriter(
+            output_archive,
+            root=output_dir,
+            fsync=settings.get("fsync_policy", "none"),
+        )
+    else:
+        writer = OutputWriter.from_settings(settings)
+    isolate = isolate or isolation_enabled()
+    if isolate:
+        pipeline = IsolatedPipeline(
+            settings,
+            output_dir,
+            writer,
+            timeout=image_timeout,
+            memory_limit=memory_limit,
+            input_root=root,
+        )
+    else:
+        pipeline = FramingPipeline(settings, output_dir, writer, input_root=root)
+    workers = workers or worker_count()
+    summary = {"shard": k, "shards": n, "selected": len(selected), "ok": 0, "errors": 0}
+    started = time.time()
+    log(f"Shard {k}/{n}: {len(selected)} of {total} images")
+
+    def process(item):
+        index, path = item
+        return index, path, pipeline.process_file(
+            os.path.join(root, path), index, total
+        )
+
+    profiler = None
+    if (profile or profiling_enabled()) and isolate:
+        log("Profiling is skipped: images are framed in child processes")
+    elif profile or profiling_enabled():
+        profiler = SamplingProfiler()
+        process = profiler.track(process)
+        profiler.start()
+
+    with open(manifest_path, "w", encoding="utf-8") as manifest:
+        header = {
+            "version": MANIFEST_VERSION,
+            "shard": k,
+            "shards": n,
+            "total": total,
+            "selected": len(selected),
+            "root": root,
+            "output_dir": os.path.abspath(output_dir),
+            "output_archive": output_archive,
+            "settings": settings,
+            "started": started,
+        }
+        manifest.write(json.dumps(header) + "\n")
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+            pending = set()
+            items = iter(selected)
+            while True:
+                for item in items:
+                    pending.add(executor.submit(process, item))
+                    if len(pending) >= workers * 4:
+                        break
+                if not pending:
+                    break
+                done, pending = concurrent.futures.wait(
+                    pending, return_when=concurrent.futures.FIRST_COMPLETED
+                )
+                for future in done:
+                    index, path, error = future.result()
+                    record = {"index": index, "path": path, "ok": error is None}
+                    if error:
+                        record["error"] = error
+                        summary["errors"] += 1
+                        log(error)
+                    else:
+                        summary["ok"] += 1
+                    manifest.write(json.dumps(record) + "\n")
+                manifest.flush()
+        if isinstance(pipeline, IsolatedPipeline):
+            pipeline.close()
+            if pipeline.restarts:
+                log(f"{pipeline.restarts} worker processes were killed and replaced")
+        if writer is not None:
+            for error in writer.close():
+                summary["errors"] += 1
+                log(error)
+        summary["copied"] = pipeline.copied
+        footer = {
+            "finished": time.time(),
+            "ok": summary["ok"],
+            "errors": summary["errors"],
+            "copied": pipeline.copied,
+        }
+        manifest.write(json.dumps(footer) + "\n")
+
+    if profiler is not None:
+        profiler.stop()
+        summary["profile"], _ = profiler.write(
+            os.path.dirname(os.path.abspath(manifest_path)),
+            name=f"profile-{k}-of-{n}",
+        )
+        log(f"Profile written to {summary['profile']}")
+    summary["manifest"] = manifest_path
+    summary["archive"] = output_archive
+    summary["seconds"] = time.time() - started
+    return summary
+
+
+def read_manifest(path: str):
+    """Return ``(header, records, footer)``; footer is None if unfinished."""
+    records = []
+    footer = None
+    with open(path, "r", encoding="utf-8") as f:
+        header = json.loads(f.readline())
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                # A node that crashed mid-write leaves a truncated last line
+                break
+            if "index" in entry:
+                records.append(entry)
+            else:
+                footer = entry
+    return header, records, footer
+
+
+def merge_manifests(paths: List[str]) -> dict:
+    """Combine per-shard manifests into one report.
+
+    The report lists every failed image and any shard that is missing,
+    duplicated or did not finish, and whether all shards used the same
+    inputs and settings.
+    """
+    report = {
+        "shards": None,
+        "total": None,
+        "processed": 0,
+        "ok": 0,
+        "errors": [],
+        "missing_shards": [],
+        "duplicate_shards": [],
+        "unfinished_shards": [],
+        "missing_images": 0,
+        "consistent": True,
+    }
+    seen_shards = set()
+    seen_indices = set()
+    reference = None
+    for path in paths:
+        header, records, footer = read_manifest(path)
+        # Roots may differ between machines; the relative paths do not
+        identity = (
+            header["shards"],
+            header["total"],
+            json.dumps(header["settings"], sort_keys=True),
+        )
+        if reference is None:
+            reference = identity
+            report["shards"], report["total"] = header["shards"], header["total"]
+        elif identity != reference:
+            report["consistent"] = False
+        if header["shard"] in seen_shards:
+            report["duplicate_shards"].append(header["shard"])
+        seen_shards.add(header["shard"])
+        if footer is None:
+            report["unfinished_shards"].append(header["shard"])
+        for record in records:
+            if record["index"] in seen_indices:
+                continue
+            seen_indices.add(record["index"])
+            report["processed"] += 1
+            if record["ok"]:
+                report["ok"] += 1
+            else:
+                report["errors"].append({"path": record["path"], "error": record["error"]})
+
+    if reference is not None:
+        report["missing_shards"] = sorted(
+            set(range(1, report["shards"] + 1)) - seen_shards
+        )
+        report["missing_images"] = report["total"] - report["processed"]
+    return report
@@ -0,0 +1,263 @@
+"""Command line entry points for running BorderFrame without the GUI.
+
+``python main.py`` without arguments starts the GUI; with a subcommand the
+request is handled here and PyQt5 is never imported.
+"""
+
+import argparse
+import json
+import os
+import signal
+from typing import List, Optional
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="borderframe", description="Add borders to images."
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    from .server import DEFAULT_HOST, DEFAULT_PORT
+
+    serve = commands.add_parser(
+        "serve", help="run the local HTTP job service with a shared worker pool"
+    )
+    serve.add_argument("--host", default=DEFAULT_HOST)
+    serve.add_argument("--port", type=int, default=DEFAULT_PORT)
+    serve.add_argument(
+        "--workers",
+        type=int,
+        help="worker threads (default: BORDERFRAME_WORKERS or the CPU count)",
+    )
+
+    from .watch import DEFAULT_QUEUE_SIZE, DEFAULT_SETTLE_SECONDS, DEFAULT_POLL_SECONDS
+
+    watch = commands.add_parser(
+        "watch", help="frame images as they are dropped into a folder"
+    )
+    watch.add_argument("input_dir", help="folder to watch")
+    watch.add_argument(
+        "-o", "--output", help="output folder (default: the last one used in the GUI)"
+    )
+    add_settings_argument(watch)
+    watch.add_argument("--workers", type=int)
+    watch.add_argument(
+        "--queue-size",
+        type=int,
+        default=DEFAULT_QUEUE_SIZE,
+        help="files waiting for a worker before the watcher pauses",
+    )
+    watch.add_argument(
+        "--settle",
+        type=float,
+        default=DEFAULT_SETTLE_SECONDS,
+        help="seconds a file must stay unchanged before it is framed",
+    )
+    watch.add_argument("--poll", type=float, default=DEFAULT_POLL_SECONDS)
+    watch.add_argument("--recursive", action="store_true")
+    watch.add_argument(
+        "--polling", action="store_true", help="poll even where inotify is available"
+    )
+    watch.add_argument(
+        "--ignore-existing",
+        action="store_true",
+        help="only frame files that appear after startup",
+    )
+    add_isolation_arguments(watch)
+
+    batch = commands.add_parser(
+        "batch", help="frame a set of files and folders without the GUI"
+    )
+    batch.add_argument(
+        "inputs", nargs="+", help="image files, folders and ZIP or TAR archives"
+    )
+    batch.add_argument(
+        "-o",
+        "--output",
+        required=True,
+        help="output folder, or a .zip or .tar file to write the images into",
+    )
+    add_settings_argument(batch)
+    batch.add_argument("--workers", type=int)
+    batch.add_argument(
+        "--shard",
+        default="1/1",
+        help="process only shard K of N (1-based), split by a stable path hash",
+    )
+    batch.add_argument(
+        "--root",
+        help="folder that input paths are made relative to for sharding "
+        "(default: the common folder of the inputs); must match on every node",
+    )
+    batch.add_argument(
+        "--manifest",
+        help="manifest path (default: OUTPUT/manifest-K-of-N.jsonl)",
+    )
+    batch.add_argument(
+        "--profile",
+        action="store_true",
+        help="sample the workers and write profile-K-of-N.prof and .txt "
+        "next to the manifest (also enabled by BORDERFRAME_PROFILE=1)",
+    )
+    add_isolation_arguments(batch)
+
+    merge = commands.add_parser(
+        "merge", help="combine per-shard batch manifests into one report"
+    )
+    merge.add_argument("manifests", nargs="+")
+    merge.add_argument("-o", "--output", help="write the JSON report here")
+    return parser
+
+
+def add_settings_argument(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--settings",
+        help="JSON file with processing settings "
+        "(default: the settings of the last GUI batch)",
+    )
+
+
+def add_isolation_arguments(parser: argparse.ArgumentParser) -> None:
+    from .isolation import DEFAULT_IMAGE_TIMEOUT, DEFAULT_MEMORY_LIMIT
+
+    parser.add_argument(
+        "--isolate",
+        action="store_true",
+        help="frame every image in a supervised worker process, so a file that "
+        "hangs or exhausts memory fails alone (also enabled by BORDERFRAME_ISOLATE=1)",
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=DEFAULT_IMAGE_TIMEOUT,
+        help="with --isolate, seconds before an image's worker is killed "
+        "(default: %(default)g)",
+    )
+    parser.add_argument(
+        "--memory-limit",
+        type=int,
+        default=DEFAULT_MEMORY_LIMIT // 2 ** 20,
+        metavar="MB",
+        help="with --isolate, address space per worker process; 0 for no limit "
+        "(default: %(default)d)",
+    )
+
+
+def load_settings(path: Optional[str]) -> dict:
+    """Read settings from ``path``, or the last GUI batch, over the defaults."""
+    from .config import load_config
+    from .pipeline import DEFAULT_SETTINGS
+
+    if path:
+        with open(path, "r", encoding="utf-8") as f:
+            settings = json.load(f)
+    else:
+        settings = load_config().get("last_settings") or {}
+    return {**DEFAULT_SETTINGS, **settings}
+
+
+def run_watch(args) -> int:
+    from .config import load_config
+    from .watch import WatchDaemon
+
+    output_dir = args.output or load_config().get("last_output_dir")
+    if not output_dir:
+        print("No output folder given and none saved from the GUI; use --output")
+        return 2
+    daemon = WatchDaemon(
+        args.input_dir,
+        output_dir,
+        load_settings(args.settings),
+        workers=args.workers,
+        queue_size=args.queue_size,
+        settle_seconds=args.settle,
+        poll_seconds=args.poll,
+        recursive=args.recursive,
+        use_inotify=False if args.polling else None,
+        process_existing=not args.ignore_existing,
+        isolate=args.isolate or None,
+        image_timeout=args.timeout,
+        memory_limit=args.memory_limit * 2 ** 20,
+    )
+    signal.signal(signal.SIGTERM, lambda signum, frame: daemon.stop())
+    daemon.run()
+    print(f"Stopped: {daemon.processed} framed, {daemon.failed} failed")
+    return 0
+
+
+def run_batch(args) -> int:
+    from .archive import archive_extension
+    from .batch import parse_shard, run_batch as run
+
+    try:
+        shard = parse_shard(args.shard)
+    except ValueError as e:
+        print(e)
+        return 2
+    if archive_extension(args.output):
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    else:
+        os.makedirs(args.output, exist_ok=True)
+    summary = run(
+        args.inputs,
+        args.output,
+        load_settings(args.settings),
+        shard=shard,
+        manifest_path=args.manifest,
+        root=args.root,
+        workers=args.workers,
+        profile=args.profile,
+        isolate=args.isolate,
+        image_timeout=args.timeout,
+        memory_limit=args.memory_limit * 2 ** 20,
+    )
+    if summary["copied"]:
+        print(f"{summary['copied']} unchanged images were copied without re-encoding")
+    print(
+        f"Shard {summary['shard']}/{summary['shards']}: {summary['ok']} framed, "
+        f"{summary['errors']} failed in {summary['seconds']:.1f} s; "
+        f"manifest {summary['manifest']}"
+    )
+    if summary["archive"]:
+        print(f"Images written to {summary['archive']}")
+    return 1 if summary["errors"] else 0
+
+
+def run_merge(args) -> int:
+    from .batch import merge_manifests
+
+    report = merge_manifests(args.manifests)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    print(
+        f"{report['ok']} of {report['total']} images framed, "
+        f"{len(report['errors'])} failed, {report['missing_images']} missing"
+    )
+    for label in ("missing_shards", "duplicate_shards", "unfinished_shards"):
+        if report[label]:
+            print(f"{label.replace('_', ' ').capitalize()}: {report[label]}")
+    if not report["consistent"]:
+        print("Warning: manifests differ in inputs or settings")
+    complete = (
+        report["consistent"]
+        and not report["missing_images"]
+        and not report["missing_shards"]
+        and not report["errors"]
+    )
+    return 0 if complete else 1
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    if args.command == "serve":
+        from .server import serve
+
+        serve(args.host, args.port, args.workers)
+    elif args.command == "watch":
+        return run_watch(args)
+    elif args.command == "batch":
+        return run_batch(args)
+    elif args.command == "merge":
+        return run_merge(args)
+    return 0
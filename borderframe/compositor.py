@@ -0,0 +1,217 @@
+"""Single pass compositing of images onto their bordered canvas.
+
+The canvas is allocated once, pre-filled with the border color, and the
+source is pasted at its final offset. Alpha is flattened during that paste
+by using the image itself as the mask, so no band images are split off and
+no intermediate expanded copy is created. 16-bit grayscale images keep
+their depth when the output format can store it.
+
+Batches usually hold only a few distinct image shapes, so a
+:class:`FramePlan` (geometry, canvas mode and fill) is computed once per
+shape, and a :class:`CanvasPool` lets a worker thread paste the next image
+of the same shape into its previous canvas instead of allocating and
+filling a new one.
+"""
+
+from collections import OrderedDict
+from typing import NamedTuple, Optional, Tuple, Union
+
+from PIL import Image, ImageColor
+
+from .geometry import calculate_dimensions, BASE_SIZE
+
+HIGH_BIT_DEPTH_MODES = ("I;16", "I;16L", "I;16B", "I")
+# Output formats that can store HIGH_BIT_DEPTH_MODES without conversion.
+HIGH_BIT_DEPTH_FORMATS = ("TIFF", "PNG")
+ALPHA_MODES = ("RGBA", "LA")
+# Canvas bytes a CanvasPool keeps per worker thread, enough for one framed
+# 40 MP RGB image
+DEFAULT_CANVAS_POOL_BYTES = 128 * 1024 * 1024
+_BYTES_PER_PIXEL = {"RGB": 4, "I": 4}
+
+
+class FrameGeometry(NamedTuple):
+    """Canvas size and the offset of the source image inside it."""
+
+    width: int
+    height: int
+    paste_x: int
+    paste_y: int
+
+
+def frame_geometry(
+    img_width: int,
+    img_height: int,
+    user_border_px: int,
+    aspect_ratio: Optional[Tuple[int, int]],
+) -> FrameGeometry:
+    """Return the framed canvas geometry for an image of the given size."""
+    scaled_border = int(user_border_px * min(img_width, img_height) / BASE_SIZE)
+    width, height = calculate_dimensions(
+        img_width, img_height, scaled_border, aspect_ratio
+    )
+    return FrameGeometry(
+        width, height, (width - img_width) // 2, (height - img_height) // 2
+    )
+
+
+class FramePlan(NamedTuple):
+    """Everything needed to frame one image shape, computed once per shape."""
+
+    geometry: FrameGeometry
+    mode: str
+    fill: Union[int, Tuple[int, int, int]]
+
+
+def plan_frame(
+    img_width: int,
+    img_height: int,
+    img_mode: str,
+    user_border_px: int,
+    aspect_ratio: Optional[Tuple[int, int]],
+    border_color: str,
+    keep_high_bit_depth: bool = False,
+) -> FramePlan:
+    """Return the :class:`FramePlan` for a source of the given size and mode."""
+    mode = canvas_mode(img_mode, keep_high_bit_depth)
+    return FramePlan(
+        frame_geometry(img_width, img_height, user_border_px, aspect_ratio),
+        mode,
+        fill_value(border_color, mode),
+    )
+
+
+class CanvasPool:
+    """Pre-filled canvases kept for reuse by a single thread.
+
+    A canvas is keyed by its plan and the pasted image size, so the border
+    area of a reused canvas still holds the fill color and only the pasted
+    rectangle changes. A canvas returned by :func:`composite_plan` is valid
+    until the next call with the same pool; callers must save it first.
+    Canvases larger than ``max_bytes`` are never kept.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_CANVAS_POOL_BYTES):
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._canvases = OrderedDict()
+
+    def __len__(self):
+        return len(self._canvases)
+
+    def acquire(self, plan: FramePlan, size: Tuple[int, int]):
+        """Return ``(canvas, reused)`` for an image of ``size`` framed by ``plan``."""
+        key = (plan, size)
+        entry = self._canvases.get(key)
+        if entry is not None:
+            self._canvases.move_to_end(key)
+            return entry[0], True
+        geometry = plan.geometry
+        canvas = Image.new(plan.mode, (geometry.width, geometry.height), plan.fill)
+        cost = geometry.width * geometry.height * _BYTES_PER_PIXEL.get(plan.mode, 2)
+        if cost <= self.max_bytes:
+            self._canvases[key] = (canvas, cost)
+            self.total_bytes += cost
+            while self.total_bytes > self.max_bytes:
+                _, (_, evicted) = self._canvases.popitem(last=False)
+                self.total_bytes -= evicted
+        return canvas, False
+
+
+def canvas_mode(mode: str, keep_high_bit_depth: bool = False) -> str:
+    """Return the canvas mode used for a source image in ``mode``."""
+    if keep_high_bit_depth and mode in HIGH_BIT_DEPTH_MODES:
+        return mode
+    return "RGB"
+
+
+def fill_value(border_color: str, mode: str):
+    """Convert ``border_color`` to a fill value for a canvas in ``mode``."""
+    if mode in HIGH_BIT_DEPTH_MODES:
+        return ImageColor.getcolor(border_color, "L") * 257
+    return ImageColor.getrgb(border_color)[:3]
+
+
+def to_8bit(img: "Image.Image") -> "Image.Image":
+    """Scale 16-bit grayscale to 8 bits instead of letting Pillow clip it."""
+    if img.mode in HIGH_BIT_DEPTH_MODES:
+        return img.convert("I").point(lambda value: value * (1 / 257)).convert("L")
+    return img
+
+
+def prepare_source(img: "Image.Image", keep_high_bit_depth: bool = False) -> "Image.Image":
+    """Convert ``img`` once into a mode that can be resized and pasted directly.
+
+    RGB, grayscale and alpha images are returned unchanged; alpha is
+    flattened later while pasting onto the canvas.
+    """
+    if img.mode in HIGH_BIT_DEPTH_MODES:
+        return img if keep_high_bit_depth else to_8bit(img)
+    if img.mode in ("RGB", "L") + ALPHA_MODES:
+        return img
+    return img.convert("RGB")
+
+
+def place(canvas: "Image.Image", img: "Image.Image", x: int, y: int) -> None:
+    """Paste ``img`` onto ``canvas``, flattening alpha against the canvas."""
+    if img.mode in ALPHA_MODES and canvas.mode == "RGB":
+        canvas.paste(img, (x, y), img)
+        return
+    if img.mode != canvas.mode:
+        if canvas.mode == "RGB":
+            img = to_8bit(img)
+        img = img.convert(canvas.mode)
+    canvas.paste(img, (x, y))
+
+
+def composite(
+    img: "Image.Image",
+    geometry: FrameGeometry,
+    border_color: str,
+    keep_high_bit_depth: bool = False,
+) -> "Image.Image":
+    """Return ``img`` framed on a canvas described by ``geometry``."""
+    mode = canvas_mode(img.mode, keep_high_bit_depth)
+    return composite_plan(img, FramePlan(geometry, mode, fill_value(border_color, mode)))
+
+
+def composite_plan(
+    img: "Image.Image", plan: FramePlan, pool: Optional[CanvasPool] = None
+) -> "Image.Image":
+    """Return ``img`` framed as described by ``plan``.
+
+    With a ``pool`` the canvas may be one used for an earlier image of the
+    same shape; see :class:`CanvasPool` for how long it stays valid.
+    """
+    geometry = plan.geometry
+    canvas = acquire_canvas(plan, img.size, img.mode in ALPHA_MODES, pool)
+    place(canvas, img, geometry.paste_x, geometry.paste_y)
+    return canvas
+
+
+def acquire_canvas(
+    plan: FramePlan,
+    size: Tuple[int, int],
+    has_alpha: bool = False,
+    pool: Optional[CanvasPool] = None,
+) -> "Image.Image":
+    """Return a canvas for ``plan`` ready to receive an image of ``size``.
+
+    Without a ``pool`` a new canvas is filled with the border color.
+    """
+    geometry = plan.geometry
+    if pool is None:
+        return Image.new(plan.mode, (geometry.width, geometry.height), plan.fill)
+    canvas, reused = pool.acquire(plan, size)
+    if reused and has_alpha:
+        # Alpha is blended with the canvas, so clear the previous image
+        canvas.paste(
+            plan.fill,
+            (
+                geometry.paste_x,
+                geometry.paste_y,
+                geometry.paste_x + size[0],
+                geometry.paste_y + size[1],
+            ),
+        )
+    return canvas
@@ -0,0 +1,34 @@
+"""Persistent user configuration shared by the GUI and headless modes.
+
+The file holds the chosen theme and the settings and output folder of the
+last batch processed in the GUI, which ``python main.py watch`` reuses.
+"""
+
+import json
+import os
+
+CONFIG_PATH = os.path.join(os.path.expanduser("~"), ".borderframe_config.json")
+
+
+def load_config() -> dict:
+    """Return the saved configuration, or an empty dict if there is none."""
+    if os.path.exists(CONFIG_PATH):
+        try:
+            with open(CONFIG_PATH, "r", encoding="utf-8") as f:
+                data = json.load(f)
+                if isinstance(data, dict):
+                    return data
+        except Exception:
+            pass
+    return {}
+
+
+def save_config(**values) -> None:
+    """Merge ``values`` into the saved configuration."""
+    data = load_config()
+    data.update(values)
+    try:
+        with open(CONFIG_PATH, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+    except Exception:
+        pass
@@ -0,0 +1,85 @@
+"""Encoder settings for BorderFrame output formats."""
+
+from typing import Optional
+
+# Effort presets trade encoding time against output size. ``standard``
+# keeps the encoder options BorderFrame used before presets existed and is
+# the default when the settings do not specify an effort, so existing
+# settings produce the same files.
+ENCODER_EFFORTS = ("standard", "fast", "balanced", "smallest")
+DEFAULT_ENCODER_EFFORT = "standard"
+
+ENCODER_PRESETS = {
+    "standard": {
+        "PNG": {"optimize": True},
+        "JPEG": {"optimize": True, "subsampling": 0},
+        "TIFF": {"compression": "raw"},
+        "HEIF": {},
+    },
+    "fast": {
+        "PNG": {"compress_level": 1},
+        "JPEG": {"optimize": False, "progressive": False, "subsampling": 0},
+        "TIFF": {"compression": "raw"},
+        "HEIF": {"chroma": 420, "enc_params": {"preset": "ultrafast"}},
+    },
+    "balanced": {
+        "PNG": {"compress_level": 6},
+        "JPEG": {"optimize": True, "progressive": False, "subsampling": 0},
+        "TIFF": {"compression": "tiff_lzw"},
+        "HEIF": {"chroma": 420, "enc_params": {"preset": "medium"}},
+    },
+    "smallest": {
+        "PNG": {"compress_level": 9, "optimize": True},
+        "JPEG": {"optimize": True, "progressive": True, "subsampling": 2},
+        "TIFF": {"compression": "tiff_adobe_deflate"},
+        "HEIF": {"chroma": 420, "enc_params": {"preset": "slow"}},
+    },
+}
+
+# Output choices offered in the GUI: label -> (Pillow format, quality).
+SAVE_FORMATS = {
+    "JPEG (80% quality)": ("JPEG", 80),
+    "JPEG (95% quality)": ("JPEG", 95),
+    "JPEG (100% quality)": ("JPEG", 100),
+    "TIFF": ("TIFF", None),
+    "PNG": ("PNG", None),
+    "HEIF (80% quality)": ("HEIF", 80),
+    "HEIF (95% quality)": ("HEIF", 95),
+    "HEIF (100% quality)": ("HEIF", 100),
+}
+
+FORMAT_EXTENSIONS = {
+    "JPEG": ".jpg",
+    "TIFF": ".tiff",
+    "PNG": ".png",
+    "HEIF": ".heif",
+}
+
+
+def build_save_args(
+    save_format: str,
+    quality: Optional[int],
+    effort: Optional[str] = None,
+    icc_profile: Optional[bytes] = None,
+    exif_bytes: Optional[bytes] = None,
+) -> dict:
+    """Return keyword arguments for ``Image.save`` for the given format."""
+    preset = ENCODER_PRESETS.get(effort or DEFAULT_ENCODER_EFFORT)
+    if preset is None:
+        raise ValueError(f"Unknown encoder effort: {effort}")
+
+    save_args = {"format": save_format}
+    if icc_profile:
+        save_args["icc_profile"] = icc_profile
+
+    options = preset.get(save_format, {})
+    for key, value in options.items():
+        # Copy nested dicts so callers can't mutate the presets
+        save_args[key] = dict(value) if isinstance(value, dict) else value
+
+    if save_format in ("JPEG", "HEIF") and quality is not None:
+        save_args["quality"] = quality
+    if save_format == "JPEG" and exif_bytes:
+        save_args["exif"] = exif_bytes
+
+    return save_args
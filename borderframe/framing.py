@@ -0,0 +1,17 @@
+"""Image framing helpers shared by the processing paths."""
+
+from .compositor import composite, frame_geometry
+
+
+def render_border(img, user_border_px, aspect_ratio, border_color, keep_high_bit_depth=False):
+    """Add the scaled border and pad ``img`` to ``aspect_ratio`` in one pass."""
+    geometry = frame_geometry(img.width, img.height, user_border_px, aspect_ratio)
+    return composite(img, geometry, border_color, keep_high_bit_depth)
+
+
+def variant_suffix(variant):
+    """Build a filename suffix such as ``_4x5`` from a variant's aspect ratio."""
+    aspect_ratio = variant['aspect_ratio']
+    if aspect_ratio is None:
+        return "_original"
+    return f"_{aspect_ratio[0]}x{aspect_ratio[1]}"
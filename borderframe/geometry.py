@@ -0,0 +1,99 @@
+"""Qt-free frame geometry shared by the GUI and the processing pipeline."""
+
+from typing import Optional, Tuple
+
+# Base size used for scaling the user provided border width. This keeps
+# borders visually consistent across images of different resolutions.
+BASE_SIZE = 1000
+
+# Aspect ratio presets offered in the UI and accepted by output variants.
+ASPECT_RATIOS = {
+    "Original": None,
+    "1:1 (Square)": (1, 1),
+    "4:5 (Instagram Portrait)": (4, 5),
+    "5:4 (Instagram Landscape)": (5, 4),
+    "9:16 (Story)": (9, 16),
+    "2:1 (Banner)": (2, 1),
+}
+
+
+def calculate_dimensions(
+    img_width: int,
+    img_height: int,
+    border_size: int,
+    aspect_ratio: Optional[Tuple[int, int]],
+    user_px: Optional[int] = None,
+) -> Tuple[int, int]:
+    """Calculate new dimensions for adding a border while respecting an optional
+    aspect ratio.
+
+    If ``user_px`` is provided, it is scaled to an actual border width using
+    ``BASE_SIZE`` so borders have a consistent appearance regardless of the
+    image resolution.
+    """
+
+    if user_px is not None:
+        border_size = int(user_px * min(img_width, img_height) / BASE_SIZE)
+    if aspect_ratio is None:
+        new_width = img_width + (border_size * 2)
+        new_height = img_height + (border_size * 2)
+    else:
+        target_ratio = aspect_ratio[0] / aspect_ratio[1]
+        min_width = img_width + (border_size * 2)
+        min_height = img_height + (border_size * 2)
+        current_ratio = min_width / min_height
+
+        if current_ratio > target_ratio:
+            new_width = min_width
+            new_height = int(new_width / target_ratio)
+            new_height = max(new_height, min_height)
+        else:
+            new_height = min_height
+            new_width = int(new_height * target_ratio)
+            new_width = max(new_width, min_width)
+
+    return new_width, new_height
+
+
+def scaled_source_size(
+    img_width: int,
+    img_height: int,
+    target_width: int,
+    aspect_ratio: Optional[Tuple[int, int]],
+    user_px: int,
+) -> Tuple[int, int]:
+    """Return the source size whose framed output is ``target_width`` wide.
+
+    The border is recomputed by :func:`calculate_dimensions` for the smaller
+    source, so the border at every output size matches what processing an
+    image of that size would produce. When rounding makes the exact width
+    unreachable the closest candidate is returned.
+    """
+
+    full_width, _ = calculate_dimensions(
+        img_width, img_height, 0, aspect_ratio, user_px
+    )
+    estimate = max(1, round(img_width * target_width / full_width))
+    best = None
+    for width in range(max(1, estimate - 3), estimate + 4):
+        height = max(1, round(width * img_height / img_width))
+        framed_width, _ = calculate_dimensions(
+            width, height, 0, aspect_ratio, user_px
+        )
+        key = (abs(framed_width - target_width), abs(width - estimate))
+        if best is None or key < best[0]:
+            best = (key, (width, height))
+    return best[1]
+
+
+def resolve_aspect_ratio(value) -> Optional[Tuple[int, int]]:
+    """Normalize an aspect ratio given as a preset name, ``"W:H"`` or a pair."""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        if value in ASPECT_RATIOS:
+            return ASPECT_RATIOS[value]
+        width, _, height = value.partition(":")
+        return int(width), int(height)
+    width, height = value
+    return int(width), int(height)
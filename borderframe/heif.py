@@ -0,0 +1,53 @@
+"""Explicit, on-demand registration of the pillow-heif plugin.
+
+Pillow only reads and writes HEIF once ``pillow_heif`` has registered its
+opener. That import is comparatively slow, so it happens the first time a
+HEIF file is opened or HEIF output is requested instead of at startup.
+"""
+
+import os
+import threading
+
+HEIF_EXTENSIONS = (".heif", ".heic")
+# Major brands of the ISO base media "ftyp" box used by HEIF still images
+HEIF_BRANDS = (b"heic", b"heix", b"heim", b"heis", b"hevc", b"hevx", b"mif1", b"msf1")
+
+_lock = threading.Lock()
+_registered = False
+
+
+def register_heif() -> None:
+    """Register the HEIF opener and saver with Pillow, once per process.
+
+    Raises:
+        RuntimeError: if ``pillow-heif`` is not installed.
+    """
+    global _registered
+    if _registered:
+        return
+    with _lock:
+        if _registered:
+            return
+        try:
+            import pillow_heif
+        except ImportError as e:
+            raise RuntimeError(
+                "HEIF support requires the pillow-heif package"
+            ) from e
+        pillow_heif.register_heif_opener()
+        _registered = True
+
+
+def is_heif_path(path: str) -> bool:
+    return os.path.splitext(path)[1].lower() in HEIF_EXTENSIONS
+
+
+def is_heif_header(data) -> bool:
+    """Return True if the encoded image ``data`` starts like a HEIF file."""
+    return bytes(data[4:8]) == b"ftyp" and bytes(data[8:12]) in HEIF_BRANDS
+
+
+def ensure_heif(path: str = "", save_format: str = "") -> None:
+    """Register HEIF support if ``path`` or ``save_format`` needs it."""
+    if save_format == "HEIF" or is_heif_path(path):
+        register_heif()
@@ -17,14 +17,15 @@ from PyQt5.QtWidgets import (
     QScrollArea,
 )
 from PyQt5.QtCore import Qt, QSize, QTimer
-from PyQt5.QtGui import QPixmap, QPainter, QColor, QIntValidator, QFont
-import json
+from PyQt5.QtGui import QPixmap, QIntValidator, QFont
 import os
 
-CONFIG_PATH = os.path.join(os.path.expanduser("~"), ".borderframe_config.json")
+from .encoders import SAVE_FORMATS
+from .config import load_config, save_config
 from .thumbnail_dialog import ThumbnailDialog
-from .process_worker import ProcessWorker
-from .utils import calculate_dimensions, load_pixmap, BASE_SIZE
+from .preview_worker import PreviewCache, PreviewRequest, PreviewWorker
+from .utils import ASPECT_RATIOS, calculate_dimensions, load_qimage, BASE_SIZE
+from .zoom_view import ZOOM_LEVELS, TiledFrameView
 
 
 class ImageProcessor(QMainWindow):
@@ -251,10 +252,18 @@ class ImageProcessor(QMainWindow):
         # Store selected images and current preview
         self.selected_images = []
         self.current_preview_index = 0
-        self.current_pixmap = None
+        self.current_image = None
         self.preview_size = QSize(800, 600)
-        # Cache loaded pixmaps to avoid re-reading images from disk
-        self.pixmap_cache = {}
+        # Cache loaded images to avoid re-reading them from disk
+        self.image_cache = {}
+        # Previews render on a worker thread; only the result matching the
+        # latest generation is shown.
+        self.preview_generation = 0
+        self.preview_key = None
+        self.preview_cache = PreviewCache()
+        self.preview_worker = PreviewWorker(self)
+        self.preview_worker.rendered.connect(self.on_preview_rendered)
+        self.preview_worker.start()
         # Timer for debounced preview loading
         self.preview_timer = QTimer(self)
         self.preview_timer.setSingleShot(True)
@@ -263,6 +272,9 @@ class ImageProcessor(QMainWindow):
         # Main widget and layout
         main_widget = QWidget()
         self.setCentralWidget(main_widget)
+        # Create the status bar up front so showing render times later
+        # does not resize the preview area
+        self.statusBar()
         layout = QHBoxLayout(main_widget)
         layout.setSpacing(20)
         layout.setContentsMargins(20, 20, 20, 20)
@@ -320,14 +332,7 @@ class ImageProcessor(QMainWindow):
         border_section.addWidget(aspect_label)
 
         self.aspect_combo = QComboBox()
-        self.aspect_ratios = {
-            "Original": None,
-            "1:1 (Square)": (1, 1),
-            "4:5 (Instagram Portrait)": (4, 5),
-            "5:4 (Instagram Landscape)": (5, 4),
-            "9:16 (Story)": (9, 16),
-            "2:1 (Banner)": (2, 1),
-        }
+        self.aspect_ratios = dict(ASPECT_RATIOS)
         self.aspect_combo.addItems(self.aspect_ratios.keys())
         self.aspect_combo.setToolTip(
             "Select the desired aspect ratio for the final image"
@@ -380,21 +385,31 @@ class ImageProcessor(QMainWindow):
 
         self.format_combo = QComboBox()
         self.format_combo.setMinimumHeight(30)
-        self.save_formats = {
-            "JPEG (80% quality)": ("JPEG", 80),
-            "JPEG (95% quality)": ("JPEG", 95),
-            "JPEG (100% quality)": ("JPEG", 100),
-            "TIFF": ("TIFF", None),
-            "PNG": ("PNG", None),
-            "HEIF (80% quality)": ("HEIF", 80),
-            "HEIF (95% quality)": ("HEIF", 95),
-            "HEIF (100% quality)": ("HEIF", 100),
-        }
+        self.save_formats = dict(SAVE_FORMATS)
         self.format_combo.addItems(self.save_formats.keys())
         self.format_combo.setCurrentIndex(-1)
         self.format_combo.setToolTip("Select the output image format and quality")
         output_section.addWidget(self.format_combo)
 
+        effort_label = QLabel("Encoder Effort:")
+        effort_label.setFont(QFont("", weight=QFont.Bold))
+        output_section.addWidget(effort_label)
+
+        self.effort_combo = QComboBox()
+        self.effort_combo.setMinimumHeight(30)
+        self.encoder_efforts = {
+            "Standard": "standard",
+            "Fast": "fast",
+            "Balanced": "balanced",
+            "Smallest": "smallest",
+        }
+        self.effort_combo.addItems(self.encoder_efforts.keys())
+        self.effort_combo.setCurrentIndex(0)
+        self.effort_combo.setToolTip(
+            "Trade encoding speed against file size for PNG, JPEG, TIFF and HEIF"
+        )
+        output_section.addWidget(self.effort_combo)
+
         # Metadata control
         self.preserve_metadata = QCheckBox("Preserve Location Metadata")
         self.preserve_metadata.setToolTip(
@@ -403,6 +418,13 @@ class ImageProcessor(QMainWindow):
         self.preserve_metadata.setChecked(True)  # Default to preserving metadata
         output_section.addWidget(self.preserve_metadata)
 
+        self.buffered_output = QCheckBox("Buffered Sequential Writes")
+        self.buffered_output.setToolTip(
+            "Encode in memory and write files sequentially; recommended for "
+            "network shares and spinning disks"
+        )
+        output_section.addWidget(self.buffered_output)
+
         name_label = QLabel("Save Name (optional):")
         name_label.setFont(QFont("", weight=QFont.Bold))
         output_section.addWidget(name_label)
@@ -463,10 +485,17 @@ class ImageProcessor(QMainWindow):
         right_layout = QVBoxLayout(self.right_panel)
         right_layout.setContentsMargins(20, 20, 20, 20)
 
+        preview_header = QHBoxLayout()
         preview_label = QLabel("Preview")
         preview_label.setAlignment(Qt.AlignCenter)
         preview_label.setFont(QFont("", weight=QFont.Bold))
-        right_layout.addWidget(preview_label)
+        preview_header.addWidget(preview_label, stretch=1)
+
+        self.zoom_combo = QComboBox()
+        self.zoom_combo.addItems(list(ZOOM_LEVELS.keys()))
+        self.zoom_combo.setToolTip("Inspect the framed image up to 200%")
+        preview_header.addWidget(self.zoom_combo)
+        right_layout.addLayout(preview_header)
 
         # Preview label in a scroll area
         scroll_area = QScrollArea()
@@ -476,8 +505,18 @@ class ImageProcessor(QMainWindow):
         self.preview_label = QLabel()
         self.preview_label.setAlignment(Qt.AlignCenter)
         scroll_area.setWidget(self.preview_label)
+        self.preview_scroll = scroll_area
         right_layout.addWidget(scroll_area)
 
+        # Zoomed views are rendered tile by tile in a second scroll area
+        self.zoom_view = TiledFrameView()
+        self.zoom_scroll = QScrollArea()
+        self.zoom_scroll.setAlignment(Qt.AlignCenter)
+        self.zoom_scroll.setStyleSheet("QScrollArea { border: none; }")
+        self.zoom_scroll.setWidget(self.zoom_view)
+        self.zoom_scroll.hide()
+        right_layout.addWidget(self.zoom_scroll)
+
         # Add panels to main layout
         layout.addWidget(self.left_panel)
         layout.addWidget(self.right_panel, stretch=1)
@@ -490,6 +529,7 @@ class ImageProcessor(QMainWindow):
         self.border_slider.valueChanged.connect(self.update_border_size_input)
         self.border_size_input.textChanged.connect(self.on_border_size_input)
         self.aspect_combo.currentIndexChanged.connect(self.update_preview)
+        self.zoom_combo.currentIndexChanged.connect(self.change_zoom)
         self.prev_button.clicked.connect(self.prev_image)
         self.next_button.clicked.connect(self.next_image)
         self.process_button.clicked.connect(self.process_images)
@@ -552,15 +592,18 @@ class ImageProcessor(QMainWindow):
             self.format_combo.setCurrentIndex(-1)
 
     def add_images(self):
-        # Supported extensions: PNG, JPG, JPEG, BMP, GIF, TIFF, TIF, HEIF, HEIC
+        from .pipeline import IMAGE_EXTENSIONS
+
+        patterns = " ".join("*" + ext for ext in IMAGE_EXTENSIONS)
         files, _ = QFileDialog.getOpenFileNames(
             self,
             "Select Images",
             "",
-            "Image Files (*.png *.jpg *.jpeg *.bmp *.gif *.tiff *.heif)",
+            f"Image Files ({patterns})",
         )
         if files:
             self.selected_images.extend(files)
+            self.preview_cache.clear()
             self.current_preview_index = len(self.selected_images) - 1
             self.load_current_image()
             self.update_navigation_buttons()
@@ -569,21 +612,27 @@ class ImageProcessor(QMainWindow):
     def add_folder(self):
         folder = QFileDialog.getExistingDirectory(self, "Select Folder")
         if folder:
+            from .archive import archive_extension, archive_members
+            from .pipeline import IMAGE_EXTENSIONS
+
             for root, _, files in os.walk(folder):
                 for file in files:
-                    if file.lower().endswith(
-                        (
-                            ".png",
-                            ".jpg",
-                            ".jpeg",
-                            ".bmp",
-                            ".gif",
-                            ".tiff",
-                            ".heif",
-                        )
-                    ):
+                    if file.lower().endswith(IMAGE_EXTENSIONS):
                         self.selected_images.append(os.path.join(root, file))
+                    elif archive_extension(file):
+                        # Images inside ZIP and TAR files are read in place
+                        try:
+                            self.selected_images.extend(
+                                archive_members(
+                                    os.path.join(root, file), IMAGE_EXTENSIONS
+                                )
+                            )
+                        except (OSError, ValueError) as e:
+                            QMessageBox.warning(
+                                self, "Load Error", f"Unable to read {file}: {e}"
+                            )
             if self.selected_images:
+                self.preview_cache.clear()
                 self.current_preview_index = len(self.selected_images) - 1
                 self.load_current_image()
                 self.update_navigation_buttons()
@@ -608,97 +657,126 @@ class ImageProcessor(QMainWindow):
         if 0 <= self.current_preview_index < len(self.selected_images):
             try:
                 image_path = self.selected_images[self.current_preview_index]
-                if image_path in self.pixmap_cache:
-                    self.current_pixmap = self.pixmap_cache[image_path]
+                if image_path in self.image_cache:
+                    self.current_image = self.image_cache[image_path]
                 else:
-                    pixmap = load_pixmap(image_path)
-                    if pixmap.isNull():
+                    image = load_qimage(image_path)
+                    if image.isNull():
                         QMessageBox.warning(
                             self,
                             "Load Error",
                             f"Unable to load {os.path.basename(image_path)}",
                         )
-                        self.current_pixmap = None
+                        self.current_image = None
                         return
-                    self.pixmap_cache[image_path] = pixmap
-                    self.current_pixmap = pixmap
+                    self.image_cache[image_path] = image
+                    self.current_image = image
                 self.update_preview()
             except Exception as e:
                 QMessageBox.warning(self, "Load Error", f"Error loading image: {e}")
-                self.current_pixmap = None
+                self.current_image = None
 
     def update_preview(self):
-        if not self.current_pixmap:
+        if not self.current_image:
             return
 
-        # Skip complex processing when no border or aspect ratio adjustment is needed
         aspect_ratio = self.aspect_ratios[self.aspect_combo.currentText()]
         user_px = self.border_slider.value()
         if user_px == 0 and aspect_ratio is None:
-            scaled = self.current_pixmap.scaled(
-                self.preview_label.size(),
-                Qt.KeepAspectRatio,
-                Qt.SmoothTransformation,
-            )
-            self.preview_label.setPixmap(scaled)
             self.scaled_value_label.setText("")
+        else:
+            self.update_scaled_label(user_px)
+
+        # A newer generation also discards any render still in flight
+        self.preview_generation += 1
+        zoom = ZOOM_LEVELS[self.zoom_combo.currentText()]
+        if zoom is not None:
+            self.zoom_view.set_frame(
+                self.current_image, user_px, aspect_ratio, self.border_color, zoom
+            )
             return
 
-        try:
+        size = self.preview_label.size()
+        self.preview_key = (
+            self.selected_images[self.current_preview_index],
+            aspect_ratio,
+            user_px,
+            self.border_color,
+            size.width(),
+            size.height(),
+        )
+        pixmap = self.preview_cache.get(self.preview_key)
+        if pixmap is not None:
+            self.preview_label.setPixmap(pixmap)
+            self.statusBar().showMessage("Preview from cache")
+            return
 
-            # Calculate new dimensions based on original image size
-            orig_width = self.current_pixmap.width()
-            orig_height = self.current_pixmap.height()
-            scaled_border = int(
-                user_px * min(orig_width, orig_height) / BASE_SIZE
-            )
-            new_width, new_height = self.calculate_dimensions(
-                orig_width,
-                orig_height,
+        # Hand the render to the worker; older pending requests are dropped
+        self.preview_worker.request(
+            PreviewRequest(
+                self.preview_generation,
+                self.current_image,
                 user_px,
                 aspect_ratio,
-                user_px,
+                self.border_color,
+                max(1, size.width()),
+                max(1, size.height()),
             )
+        )
 
-            # Create new pixmap with border
-            result = QPixmap(new_width, new_height)
-            result.fill(QColor(self.border_color))
-
-            # Draw original image in center
-            painter = QPainter(result)
-            paste_x = (new_width - orig_width) // 2
-            paste_y = (new_height - orig_height) // 2
-            painter.drawPixmap(paste_x, paste_y, self.current_pixmap)
-            painter.end()
-
-            # Scale for preview
-            scaled = result.scaled(
-                self.preview_label.size(), Qt.KeepAspectRatio, Qt.SmoothTransformation
+    def on_preview_rendered(self, generation, image, elapsed_ms):
+        if generation != self.preview_generation or not self.current_image:
+            return
+        pixmap = QPixmap.fromImage(image)
+        self.preview_cache.put(
+            self.preview_key, pixmap, image.width() * image.height() * 4
+        )
+        self.preview_label.setPixmap(pixmap)
+        self.statusBar().showMessage(f"Preview rendered in {elapsed_ms:.0f} ms")
+
+    def change_zoom(self):
+        """Switch between the fitted preview and the tiled zoom view."""
+        zoomed = ZOOM_LEVELS[self.zoom_combo.currentText()] is not None
+        bars = (
+            self.zoom_scroll.horizontalScrollBar(),
+            self.zoom_scroll.verticalScrollBar(),
+        )
+        # Keep the same point of the image centered when changing zoom
+        centers = [
+            (bar.value() + bar.pageStep() / 2) / max(1, bar.maximum() + bar.pageStep())
+            if self.zoom_scroll.isVisible()
+            else 0.5
+            for bar in bars
+        ]
+        self.preview_scroll.setVisible(not zoomed)
+        self.zoom_scroll.setVisible(zoomed)
+        if not zoomed:
+            self.zoom_view.set_frame(None, 0, None, self.border_color, 1.0)
+        self.update_preview()
+        for bar, center in zip(bars, centers):
+            bar.setValue(
+                round(center * (bar.maximum() + bar.pageStep()) - bar.pageStep() / 2)
             )
-            self.preview_label.setPixmap(scaled)
-            self.scaled_value_label.setText(f"\u2192 {scaled_border} px")
-
-        except Exception as e:
-            print(f"Error updating preview: {e}")
 
     def force_preview_update(self):
         """Force update the preview with the current index"""
         if not self.selected_images:
             self.preview_label.clear()
             self.preview_label.setText("No images selected")
+            self.zoom_view.set_frame(None, 0, None, self.border_color, 1.0)
             self.update_navigation_buttons()
             return
 
         if 0 <= self.current_preview_index < len(self.selected_images):
             image_path = self.selected_images[self.current_preview_index]
-            if image_path in self.pixmap_cache:
-                self.current_pixmap = self.pixmap_cache[image_path]
+            if image_path in self.image_cache:
+                self.current_image = self.image_cache[image_path]
                 self.update_preview()
             else:
-                pixmap = load_pixmap(image_path)
-                if not pixmap.isNull():
-                    self.pixmap_cache[image_path] = pixmap
-                    self.current_pixmap = pixmap
+                image = load_qimage(image_path)
+                if not image.isNull():
+                    self.image_cache[image_path] = image
+                    self.current_image = image
                     self.update_preview()
         else:
             self.preview_label.clear()
@@ -762,11 +840,20 @@ class ImageProcessor(QMainWindow):
             "user_border_px": self.border_slider.value(),
             "save_format": chosen_format,
             "quality": quality,
+            "encoder_effort": self.encoder_efforts[self.effort_combo.currentText()],
             "preserve_metadata": self.preserve_metadata.isChecked(),
             "border_color": self.border_color,
+            "buffered_output": self.buffered_output.isChecked(),
         }
 
+        # Remembered for "python main.py watch"; aspect ratios are stored as
+        # lists in JSON and resolved again when loaded
+        save_config(last_settings=settings, last_output_dir=output_dir)
+
         # Create and start worker thread
+        # Imported here: the worker pulls in Pillow and its plugins
+        from .process_worker import ProcessWorker
+
         self.worker = ProcessWorker(self.selected_images, output_dir, settings)
         self.worker.progress.connect(
             lambda count, text: self.update_progress(progress, count, text)
@@ -790,7 +877,10 @@ class ImageProcessor(QMainWindow):
             error_msg = QMessageBox(self)
             error_msg.setIcon(QMessageBox.Warning)
             error_msg.setWindowTitle("Processing Errors")
-            error_msg.setText(f"Completed with {len(errors)} error(s):")
+            text = f"Completed with {len(errors)} error(s):"
+            if self.worker.profile_message:
+                text = f"{self.worker.profile_message}\n\n{text}"
+            error_msg.setText(text)
             error_msg.setDetailedText("\n".join(errors))
             error_msg.setStandardButtons(QMessageBox.Ok)
             error_msg.setStyleSheet(self.msgbox_styles[self.current_theme])
@@ -799,11 +889,23 @@ class ImageProcessor(QMainWindow):
             success_msg = QMessageBox(self)
             success_msg.setIcon(QMessageBox.Information)
             success_msg.setWindowTitle("Success")
-            success_msg.setText("All images processed successfully!")
+            text = "All images processed successfully!"
+            if self.worker.copied:
+                text += (
+                    f"\n{self.worker.copied} image(s) needed no changes and "
+                    "were copied without re-encoding."
+                )
+            if self.worker.profile_message:
+                text += f"\n{self.worker.profile_message}"
+            success_msg.setText(text)
             success_msg.setStandardButtons(QMessageBox.Ok)
             success_msg.setStyleSheet(self.msgbox_styles[self.current_theme])
             success_msg.exec_()
 
+    def closeEvent(self, event):
+        self.preview_worker.stop()
+        super().closeEvent(event)
+
     def resizeEvent(self, event):
         super().resizeEvent(event)
         self.update_preview()
@@ -825,10 +927,10 @@ class ImageProcessor(QMainWindow):
                 pass
 
     def update_scaled_label(self, value):
-        if self.current_pixmap:
+        if self.current_image:
             scaled = int(
                 value
-                * min(self.current_pixmap.width(), self.current_pixmap.height())
+                * min(self.current_image.width(), self.current_image.height())
                 / BASE_SIZE
             )
             self.scaled_value_label.setText(f"\u2192 {scaled} px")
@@ -856,20 +958,8 @@ class ImageProcessor(QMainWindow):
             self.right_panel.setStyleSheet(self.panel_styles[self.current_theme])
 
     def load_theme(self) -> str:
-        if os.path.exists(CONFIG_PATH):
-            try:
-                with open(CONFIG_PATH, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                    if isinstance(data, dict) and "theme" in data:
-                        return data["theme"]
-            except Exception:
-                pass
-        return "Light"
+        theme = load_config().get("theme")
+        return theme if theme else "Light"
 
     def save_theme(self) -> None:
-        try:
-            with open(CONFIG_PATH, "w", encoding="utf-8") as f:
-                json.dump({"theme": self.current_theme}, f)
-        except Exception:
-            pass
-
+        save_config(theme=self.current_theme)
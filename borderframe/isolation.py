@@ -0,0 +1,312 @@
+"""Frame images in supervised worker processes, enabled with BORDERFRAME_ISOLATE.
+
+A malformed TIFF or HEIF can make a decoder hang or allocate without bound.
+In a worker thread that stalls its slot forever, or takes the whole batch
+down with it. :class:`IsolatedPipeline` keeps the thread pool of its callers
+but has every thread hand its image to a child process, which decodes,
+frames and encodes it under an address space limit (``RLIMIT_AS``, where
+the platform has it). The child sends the encoded outputs back and the
+calling thread writes them exactly as :class:`FramingPipeline` would.
+Unchanged copies and strip by strip TIFFs are too large to send and are
+written by the child itself, through temporary files it reports to the
+parent first, so the parent removes them when it kills the child and a
+killed child never leaves a partial output behind.
+
+A child that takes longer than the per-image timeout is killed, as is one
+running when the batch is cancelled. A child that runs out of memory
+reports a ``MemoryError`` like any other failure, and one that crashes is
+reported with its exit status. Either way the image gets an error message
+in the usual list and the next image starts a fresh child.
+"""
+
+import contextlib
+import multiprocessing
+import os
+import signal
+import threading
+import time
+from typing import Callable, Optional
+
+from .passthrough import copy_file
+from .pipeline import FramingPipeline
+from .writer import report_temp_files, write_file
+
+ISOLATE_ENV = "BORDERFRAME_ISOLATE"
+# Wall time allowed per image, in seconds
+DEFAULT_IMAGE_TIMEOUT = 300.0
+# Address space allowed per worker process, in bytes; 0 disables the limit
+DEFAULT_MEMORY_LIMIT = 8 * 1024 ** 3
+# Time a new worker process may take to import the imaging libraries
+STARTUP_TIMEOUT = 60.0
+# Seconds between checks for cancellation while a child works
+POLL_SECONDS = 0.1
+
+
+def isolation_enabled() -> bool:
+    """Return True when ``BORDERFRAME_ISOLATE`` is set to a true value."""
+    value = os.environ.get(ISOLATE_ENV, "").strip().lower()
+    return value not in ("", "0", "false", "no", "off")
+
+
+def limit_memory(limit: int) -> bool:
+    """Cap this process's address space at ``limit`` bytes.
+
+    Returns False where ``resource`` or ``RLIMIT_AS`` is not available.
+    """
+    try:
+        import resource
+    except ImportError:  # pragma: no cover - Windows
+        return False
+    if not hasattr(resource, "RLIMIT_AS"):  # pragma: no cover
+        return False
+    _, hard = resource.getrlimit(resource.RLIMIT_AS)
+    if hard != resource.RLIM_INFINITY:
+        limit = min(limit, hard)
+    resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+    return True
+
+
+class _Collector:
+    """Writer given to the pipeline in a child; outputs go back to the parent.
+
+    With ``is_archive`` unchanged copies are collected too and nothing is
+    written by the child; otherwise copies and strip by strip TIFFs are
+    written by the child itself, through temporary files reported to the
+    parent by :func:`_child_main`.
+    """
+
+    def __init__(self, is_archive: bool):
+        self.is_archive = is_archive
+        self.outputs = []
+
+    def submit(self, output_path: str, data) -> None:
+        self.outputs.append((output_path, bytes(data)))
+
+    def add_file(self, output_path: str, source) -> None:
+        if not isinstance(source, str):
+            source.seek(0)
+            source = source.read()
+        self.outputs.append((output_path, source))
+
+
+def _child_main(
+    conn, settings, output_dir, input_root, archive_output, memory_limit, factory
+):
+    """Frame the images the parent sends over ``conn`` until it sends None."""
+    if memory_limit:
+        limit_memory(memory_limit)
+    # Cancellation is the parent's job: it kills the child
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    collector = _Collector(archive_output)
+    pipeline = factory(settings, output_dir, collector, input_root=input_root)
+    # Sent before any data is written, so the parent can clean up after a kill
+    report_temp_files(lambda temp_path: conn.send(("temp", temp_path)))
+    conn.send("ready")
+    while True:
+        try:
+            task = conn.recv()
+        except EOFError:
+            return
+        if task is None:
+            return
+        image_path, index, total = task
+        collector.outputs = []
+        written = []
+        copied = pipeline.copied
+        error = pipeline.process_file(image_path, index, total, written)
+        conn.send(
+            ("done", (error, collector.outputs, written, pipeline.copied - copied))
+        )
+
+
+class _Child:
+    """One worker process and the parent's end of its pipe."""
+
+    def __init__(self, context, args):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(
+            target=_child_main, args=(child_conn,) + args, daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+
+    def kill(self, temp_paths=()) -> None:
+        """Kill the process and remove the unfinished files in ``temp_paths``."""
+        self.process.kill()
+        self.process.join()
+        self.conn.close()
+        # Finished outputs were renamed away already
+        for temp_path in temp_paths:
+            with contextlib.suppress(OSError):
+                os.remove(temp_path)
+
+    def stop(self, timeout: float = 5.0) -> None:
+        try:
+            self.conn.send(None)
+        except OSError:
+            pass
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.conn.close()
+
+    def exit_status(self) -> str:
+        self.process.join(1.0)
+        code = self.process.exitcode
+        if code is None:
+            return "stopped responding"
+        if code < 0:
+            try:
+                return f"killed by {signal.Signals(-code).name}"
+            except ValueError:
+                return f"killed by signal {-code}"
+        return f"exited with code {code}"
+
+
+class IsolatedPipeline:
+    """Drop-in :class:`~borderframe.pipeline.FramingPipeline` that frames in
+    child processes.
+
+    Each calling thread borrows an idle child, or starts one, so there are
+    never more children than threads calling :meth:`process_file` at once.
+    ``timeout`` (seconds) and ``memory_limit`` (bytes, 0 for none) apply to
+    every image; ``input_root`` names outputs as for ``FramingPipeline``.
+    Outputs sent back by the child are saved by the calling thread through
+    ``writer`` when one is given, else directly. Call :meth:`close` when the
+    batch is done to stop the children.
+    """
+
+    def __init__(
+        self,
+        settings,
+        output_dir: Optional[str] = None,
+        writer=None,
+        should_stop: Optional[Callable[[], bool]] = None,
+        timeout: Optional[float] = None,
+        memory_limit: Optional[int] = None,
+        factory=FramingPipeline,
+        input_root: Optional[str] = None,
+    ):
+        self.settings = settings
+        self.output_dir = output_dir
+        self.writer = writer
+        self.archive_output = getattr(writer, 'is_archive', False)
+        self.should_stop = should_stop or (lambda: False)
+        self.timeout = DEFAULT_IMAGE_TIMEOUT if timeout is None else timeout
+        self.memory_limit = DEFAULT_MEMORY_LIMIT if memory_limit is None else memory_limit
+        self.copied = 0
+        # Children killed after a timeout or crash, for reporting
+        self.restarts = 0
+        self._child_args = (
+            settings,
+            output_dir,
+            input_root,
+            self.archive_output,
+            self.memory_limit,
+            factory,
+        )
+        # A fresh interpreter, since forking a process with running threads
+        # can deadlock the child
+        self._context = multiprocessing.get_context("spawn")
+        self._idle = []
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def process_file(self, image_path, index, total, written=None):
+        """Frame ``image_path`` in a child process, see ``FramingPipeline``."""
+        name = os.path.basename(image_path)
+        if self.should_stop():
+            return None
+        try:
+            child = self._acquire()
+        except (OSError, RuntimeError) as e:
+            return f"Error processing {name}: could not start a worker process: {e}"
+
+        # Files the child is writing itself, removed if it has to be killed
+        temp_paths = []
+        try:
+            child.conn.send((image_path, index, total))
+            deadline = time.monotonic() + self.timeout
+            while True:
+                if child.conn.poll(POLL_SECONDS):
+                    kind, message = child.conn.recv()
+                    if kind == "done":
+                        break
+                    temp_paths.append(message)
+                elif self.should_stop():
+                    self._discard(child, temp_paths, restart=False)
+                    return None
+                elif time.monotonic() >= deadline:
+                    self._discard(child, temp_paths)
+                    return f"Error processing {name}: timed out after {self.timeout:g} s"
+            error, outputs, child_written, copied = message
+        except (EOFError, OSError):
+            status = child.exit_status()
+            self._discard(child, temp_paths)
+            return f"Error processing {name}: worker process {status}"
+        self._release(child)
+
+        for output_path, payload in outputs:
+            if self.should_stop():
+                return None
+            self._save(output_path, payload)
+        if written is not None:
+            written.extend(child_written)
+        with self._lock:
+            self.copied += copied
+        return error
+
+    def _save(self, output_path: str, payload) -> None:
+        if isinstance(payload, str):
+            # A file the child found unchanged; copy it without decoding
+            if self.archive_output:
+                self.writer.add_file(output_path, payload)
+            else:
+                copy_file(payload, output_path, self.settings.get('fsync_policy', 'none'))
+        elif self.writer is not None:
+            self.writer.submit(output_path, payload)
+        else:
+            write_file(output_path, payload, self.settings.get('fsync_policy', 'none'))
+
+    def _acquire(self) -> _Child:
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("pipeline is closed")
+            while self._idle:
+                child = self._idle.pop()
+                if child.process.is_alive():
+                    return child
+                child.conn.close()
+        child = _Child(self._context, self._child_args)
+        if not child.conn.poll(STARTUP_TIMEOUT):
+            child.kill()
+            raise RuntimeError("timed out while starting")
+        try:
+            child.conn.recv()
+        except EOFError:
+            status = child.exit_status()
+            child.conn.close()
+            raise RuntimeError(status) from None
+        return child
+
+    def _release(self, child: _Child) -> None:
+        with self._lock:
+            if not self._closed:
+                self._idle.append(child)
+                return
+        child.stop()
+
+    def _discard(self, child: _Child, temp_paths=(), restart: bool = True) -> None:
+        child.kill(temp_paths)
+        if restart:
+            with self._lock:
+                self.restarts += 1
+
+    def close(self) -> None:
+        """Stop every idle child; busy ones stop when they are released."""
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+        for child in idle:
+            child.stop()
@@ -0,0 +1,158 @@
+"""Frame uncompressed inputs straight from a memory map.
+
+Pillow decodes uncompressed BMP and TIFF files by copying the whole pixel
+payload into a new image, which framing then copies again into the bordered
+canvas. For these layouts the file is mapped instead and pasted into the
+canvas band by band. Pillow only wraps its L, RGBA and 16-bit grayscale
+layouts around foreign memory, so strip TIFFs in those modes are pasted
+from a read-only view of the map and every pixel is copied exactly once.
+Pillow stores RGB and LA pixels padded to four bytes, so those TIFF rows,
+like BMP rows stored as BGR, are unpacked into a band image first: each
+pixel is copied twice, but never into a full size intermediate image.
+
+Mapped pages of bands that were pasted are released as the canvas fills,
+like :mod:`~borderframe.tiff_stream` does for huge TIFFs.
+"""
+
+import mmap
+import os
+import struct
+from typing import Optional
+
+from PIL import Image
+
+from .compositor import (
+    ALPHA_MODES,
+    HIGH_BIT_DEPTH_MODES,
+    CanvasPool,
+    FramePlan,
+    acquire_canvas,
+    place,
+)
+from .tiff_stream import BAND_BYTES, StripSource
+
+# Source modes the compositor can paste without a prior conversion
+MAPPED_MODES = ("RGB", "L") + ALPHA_MODES + HIGH_BIT_DEPTH_MODES
+_TIFF_EXTENSIONS = (".tif", ".tiff")
+_BMP_EXTENSIONS = (".bmp", ".dib")
+_BMP_RAWMODES = {24: "BGR", 32: "BGRX"}
+
+
+class BmpSource:
+    """Row access to an uncompressed 24 or 32-bit BMP through a memory map."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.mode = "RGB"
+        self.icc_profile = None
+        self._file = open(path, "rb")
+        try:
+            header = self._file.read(54)
+            if len(header) < 54 or header[:2] != b"BM":
+                raise ValueError("not a BMP file")
+            (offset,) = struct.unpack_from("<I", header, 10)
+            dib_size, width, height, planes, bits, compression = struct.unpack_from(
+                "<IiiHHI", header, 14
+            )
+            if dib_size < 40 or planes != 1 or compression != 0:
+                raise ValueError("only uncompressed BMP files are mapped")
+            if bits not in _BMP_RAWMODES or width <= 0 or height == 0:
+                raise ValueError(f"unsupported BMP layout: {bits} bits")
+            self.width = width
+            self.height = abs(height)
+            # Positive heights are stored bottom row first
+            self.bottom_up = height > 0
+            self.rawmode = _BMP_RAWMODES[bits]
+            self.stride = (bits * width + 31) // 32 * 4
+            self.offset = offset
+            self.row_bytes = self.stride
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            if offset + self.stride * self.height > len(self._map):
+                self._map.close()
+                raise ValueError("truncated BMP file")
+        except BaseException:
+            self._file.close()
+            raise
+        self._view = memoryview(self._map)
+
+    @classmethod
+    def probe(cls, path: str) -> Optional["BmpSource"]:
+        try:
+            return cls(path)
+        except (OSError, ValueError, struct.error):
+            return None
+
+    def band_limit(self, y: int) -> int:
+        return self.height
+
+    def _span(self, y0: int, y1: int):
+        first = self.height - y1 if self.bottom_up else y0
+        start = self.offset + first * self.stride
+        return start, start + (y1 - y0) * self.stride
+
+    def read_band(self, y0: int, y1: int, copy: bool = True) -> "Image.Image":
+        """Return rows ``y0`` to ``y1`` (top first) as an RGB image."""
+        start, end = self._span(y0, y1)
+        orientation = -1 if self.bottom_up else 1
+        band = Image.frombuffer(
+            "RGB",
+            (self.width, y1 - y0),
+            self._view[start:end],
+            "raw",
+            self.rawmode,
+            self.stride,
+            orientation,
+        )
+        # BGR rows are unpacked into a new image, so nothing refers to the map
+        return band
+
+    def release_rows(self, y0: int, y1: int) -> None:
+        if not hasattr(mmap, "MADV_DONTNEED"):
+            return
+        start, end = self._span(y0, y1)
+        start -= start % mmap.PAGESIZE
+        try:
+            self._map.madvise(mmap.MADV_DONTNEED, start, end - start)
+        except (OSError, ValueError):  # pragma: no cover - best effort
+            pass
+
+    def close(self):
+        self._view.release()
+        self._map.close()
+        self._file.close()
+
+
+def open_mapped(path: str):
+    """Return a mapped source for ``path``, or None to decode it normally."""
+    ext = os.path.splitext(path)[1].lower()
+    if ext in _TIFF_EXTENSIONS:
+        source = StripSource.probe(path)
+    elif ext in _BMP_EXTENSIONS:
+        source = BmpSource.probe(path)
+    else:
+        return None
+    if source is not None and source.mode not in MAPPED_MODES:
+        source.close()
+        return None
+    return source
+
+
+def frame_mapped(
+    source, plan: FramePlan, pool: Optional[CanvasPool] = None
+) -> "Image.Image":
+    """Paste ``source`` band by band onto a canvas described by ``plan``."""
+    geometry = plan.geometry
+    canvas = acquire_canvas(
+        plan, (source.width, source.height), source.mode in ALPHA_MODES, pool
+    )
+    band_rows = max(1, BAND_BYTES // max(1, source.row_bytes))
+    y0 = 0
+    while y0 < source.height:
+        y1 = min(y0 + band_rows, source.band_limit(y0))
+        band = source.read_band(y0, y1, copy=False)
+        place(canvas, band, geometry.paste_x, geometry.paste_y + y0)
+        # The band may be a view of the map; it must go before close()
+        del band
+        source.release_rows(y0, y1)
+        y0 = y1
+    return canvas
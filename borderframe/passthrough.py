@@ -0,0 +1,145 @@
+"""Copy images unchanged when framing would not alter them.
+
+With no border, the original aspect ratio and the input's own format as the
+output format, framing decodes and re-encodes every image for nothing and
+loses quality on lossy formats. :func:`can_copy` recognises these files from
+their headers alone, without decoding pixels, and :func:`copy_file` copies
+the bytes in the kernel where the platform allows it.
+
+A file is only copied when the framed output would look the same: a single
+frame, EXIF orientation absent or 1, no transparency (framing flattens it
+onto the border color) and no CMYK. Framing keeps nothing of the EXIF but
+GPS data, and that only for JPEG output with metadata preserved, so the file
+must carry no EXIF beyond layout tags and that GPS block, and no XMP. The
+tags that lay out a TIFF's pixels are not metadata and do not count.
+"""
+
+import errno
+import os
+import shutil
+
+from PIL import Image
+
+from .compositor import HIGH_BIT_DEPTH_MODES
+from .writer import create_temp_file, fsync_directory
+
+# Pillow format names of inputs that can be copied to the same save format
+COPYABLE_FORMATS = ("JPEG", "PNG", "TIFF", "HEIF")
+# EXIF tags that describe layout only: orientation, resolution and
+# YCbCr positioning
+LAYOUT_EXIF_TAGS = frozenset((0x0112, 0x011A, 0x011B, 0x0128, 0x0213))
+GPS_IFD_TAG = 0x8825
+# Baseline TIFF tags that describe how the pixels are stored, which Pillow
+# reports as EXIF for TIFF files: subfile type, size, samples, compression,
+# photometric interpretation, fill order, strips, sample range, planar
+# configuration, predictor, color map, tiles, extra samples, sample format,
+# YCbCr subsampling, reference black and white, and the ICC profile, which
+# framing keeps
+TIFF_STRUCTURE_TAGS = frozenset(
+    (254, 255, 256, 257, 258, 259, 262, 266, 273, 277, 278, 279, 280, 281, 284,
+     317, 320, 322, 323, 324, 325, 338, 339, 530, 532, 34675)
+)
+# Keys Pillow stores XMP packets under (JPEG, WebP and TIFF; PNG)
+XMP_INFO_KEYS = ("xmp", "XML:com.adobe.xmp")
+COPY_CHUNK_SIZE = 64 * 1024 * 1024
+
+
+def is_noop(settings, variants) -> bool:
+    """Return True when ``settings`` leave every image unchanged but for encoding.
+
+    ``variants`` are the resolved output variants of ``settings``. Set
+    ``settings['passthrough']`` to False to always re-encode.
+    """
+    if not settings.get('passthrough', True) or len(variants) != 1:
+        return False
+    if settings.get('variants') or settings.get('responsive_widths'):
+        return False
+    variant = variants[0]
+    return (
+        variant['user_border_px'] == 0
+        and variant['aspect_ratio'] is None
+        and variant['save_format'] in COPYABLE_FORMATS
+    )
+
+
+def can_copy(img: "Image.Image", save_format: str, preserve_metadata: bool) -> bool:
+    """Return True if the opened, not yet decoded ``img`` can be copied as is."""
+    if img.format != save_format or getattr(img, "n_frames", 1) != 1:
+        return False
+    if img.mode not in ("RGB", "L") and img.mode not in HIGH_BIT_DEPTH_MODES:
+        return False
+    if "transparency" in img.info:
+        return False
+    exif = img.getexif()
+    if exif.get(0x0112, 1) != 1:
+        return False
+    kept = LAYOUT_EXIF_TAGS
+    if img.format == "TIFF":
+        kept = kept | TIFF_STRUCTURE_TAGS
+    if preserve_metadata and save_format == "JPEG":
+        kept = kept | {GPS_IFD_TAG}
+    if set(exif) - kept:
+        return False
+    return not any(img.info.get(key) for key in XMP_INFO_KEYS)
+
+
+def copy_file(source, output_path: str, fsync: str = "none") -> None:
+    """Copy ``source`` to ``output_path`` through a temporary file.
+
+    ``source`` is a path or a binary file object, such as an archive member.
+    Paths are copied with ``os.copy_file_range`` or ``os.sendfile`` so the
+    data does not pass through user space, falling back to a buffered copy
+    where neither works (other platforms, or file systems that refuse them).
+    """
+    directory = os.path.dirname(output_path) or "."
+    fd, temp_path = create_temp_file(output_path)
+    try:
+        with os.fdopen(fd, "wb") as dst:
+            if isinstance(source, str):
+                with open(source, "rb") as src:
+                    size = os.fstat(src.fileno()).st_size
+                    copied = _kernel_copy(src.fileno(), dst.fileno(), size)
+                    if copied < size:
+                        src.seek(copied)
+                        dst.seek(copied)
+                        shutil.copyfileobj(src, dst, COPY_CHUNK_SIZE)
+            else:
+                source.seek(0)
+                shutil.copyfileobj(source, dst, COPY_CHUNK_SIZE)
+            if fsync != "none":
+                dst.flush()
+                os.fsync(dst.fileno())
+        os.replace(temp_path, output_path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+    if fsync == "full":
+        fsync_directory(directory)
+
+
+def _kernel_copy(src_fd: int, dst_fd: int, size: int) -> int:
+    """Copy as much as the kernel allows and return the bytes copied."""
+    offset = 0
+    for name in ("copy_file_range", "sendfile"):
+        call = getattr(os, name, None)
+        if call is None:
+            continue
+        try:
+            while offset < size:
+                if name == "copy_file_range":
+                    sent = call(src_fd, dst_fd, size - offset, offset, offset)
+                else:
+                    os.lseek(dst_fd, offset, os.SEEK_SET)
+                    sent = call(dst_fd, src_fd, offset, min(size - offset, COPY_CHUNK_SIZE))
+                if sent == 0:
+                    break
+                offset += sent
+        except OSError as e:
+            if e.errno not in (errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP):
+                raise
+        if offset >= size:
+            break
+    return offset
@@ -0,0 +1,482 @@
+"""Qt-free framing pipeline shared by the GUI worker and embedding code.
+
+:class:`FramingPipeline` holds the per-image logic that
+:class:`~borderframe.process_worker.ProcessWorker` runs on its thread pool.
+:func:`frame_bytes` runs the same steps on an in-memory image and returns
+the encoded output, without temporary files and without importing PyQt5.
+"""
+
+import io
+import os
+import threading
+from typing import Callable, Iterator, Optional, Tuple
+
+from PIL import Image, ImageOps
+
+from .archive import image_source, is_member, open_member, split_member
+from .compositor import (
+    DEFAULT_CANVAS_POOL_BYTES,
+    HIGH_BIT_DEPTH_FORMATS,
+    CanvasPool,
+    composite_plan,
+    plan_frame,
+    prepare_source,
+)
+from .encoders import DEFAULT_ENCODER_EFFORT, FORMAT_EXTENSIONS, build_save_args
+from .framing import variant_suffix
+from .geometry import resolve_aspect_ratio, scaled_source_size
+from .heif import ensure_heif, is_heif_header, register_heif
+from .mapped_input import frame_mapped, open_mapped
+from .passthrough import can_copy, copy_file, is_noop
+from .tiff_stream import frame_tiff_streaming, should_stream
+
+# Distinct frame plans kept per pipeline before the cache starts over
+MAX_FRAME_PLANS = 1024
+
+# Input file types picked up when scanning folders
+IMAGE_EXTENSIONS = (
+    '.png', '.jpg', '.jpeg', '.bmp', '.gif', '.tiff', '.tif', '.heif', '.heic',
+)
+
+# Settings used by frame_bytes() for keys the caller leaves out. The GUI
+# always passes every key.
+DEFAULT_SETTINGS = {
+    'aspect_ratio': None,
+    'user_border_px': 0,
+    'border_color': '#FFFFFF',
+    'save_format': 'JPEG',
+    'quality': 95,
+    'preserve_metadata': False,
+    'base_filename': '',
+}
+
+
+def worker_count() -> int:
+    """Default number of worker threads, overridable with BORDERFRAME_WORKERS."""
+    env_value = os.environ.get("BORDERFRAME_WORKERS")
+    if env_value and env_value.isdigit():
+        return max(1, int(env_value))
+    return os.cpu_count() or 1
+
+
+def output_variants(settings):
+    """Return the output variants to render for every source image.
+
+    ``settings['variants']`` may list several outputs; keys missing from a
+    variant fall back to the top-level settings. Without variants a single
+    output is produced from the top-level settings.
+
+    Default suffixes that two variants of the same format would share get
+    the variant's 1-based position appended, e.g. ``_1x1_2``.
+
+    Raises:
+        ValueError: if explicit suffixes make two variants write the same file.
+    """
+    defaults = {
+        'aspect_ratio': resolve_aspect_ratio(settings['aspect_ratio']),
+        'user_border_px': settings['user_border_px'],
+        'border_color': settings['border_color'],
+        'save_format': settings['save_format'],
+        'quality': settings['quality'],
+        'encoder_effort': settings.get('encoder_effort', DEFAULT_ENCODER_EFFORT),
+        'suffix': '',
+    }
+    variants = settings.get('variants')
+    if not variants:
+        return [defaults]
+
+    resolved = []
+    outputs = set()
+    for number, variant in enumerate(variants, 1):
+        options = dict(defaults)
+        options.update(variant)
+        options['aspect_ratio'] = resolve_aspect_ratio(options['aspect_ratio'])
+        if 'suffix' not in variant:
+            options['suffix'] = variant_suffix(options)
+            if (options['suffix'], options['save_format']) in outputs:
+                # Variants differing only in border or color
+                options['suffix'] += f"_{number}"
+        output = (options['suffix'], options['save_format'])
+        if output in outputs:
+            raise ValueError(
+                f"Variant {number} writes the same files as an earlier one; "
+                "give it a different suffix"
+            )
+        outputs.add(output)
+        resolved.append(options)
+    return resolved
+
+
+def read_input(image_path: str):
+    """Return what :func:`gps_exif` should read for ``image_path``.
+
+    That is the path of an ordinary file, or the bytes of an archive member.
+    """
+    if is_member(image_path):
+        with open_member(image_path) as member:
+            return member.read()
+    return image_path
+
+
+def gps_exif(source) -> Optional[bytes]:
+    """Return an EXIF block holding only the GPS data of ``source``.
+
+    ``source`` is a file path or the encoded image bytes. Returns None when
+    the image has no EXIF data piexif can read.
+    """
+    try:
+        # piexif is only needed when metadata is kept
+        import piexif
+
+        exif_dict = piexif.load(source)
+        gps_dict = exif_dict.get('GPS', {})
+        new_exif = {'GPS': gps_dict}
+        return piexif.dump(new_exif)
+    except Exception:
+        return None
+
+
+class FramingPipeline:
+    """Render and save the framed outputs for one batch of settings.
+
+    ``writer`` is an optional :class:`~borderframe.writer.OutputWriter`, or
+    an :class:`~borderframe.archive.ArchiveWriter` to collect the outputs in
+    one archive; without it outputs are saved directly. Input paths may name
+    archive members, see :mod:`.archive`. With ``input_root`` each output
+    keeps the input's folder relative to it, so images that share a file
+    name in different folders or archives do not overwrite each other;
+    without it outputs are written flat into ``output_dir``. ``should_stop``
+    is polled between outputs so a cancelled batch stops promptly. Instances
+    hold no per-image state and can be shared by worker threads.
+    """
+
+    def __init__(
+        self,
+        settings,
+        output_dir: Optional[str] = None,
+        writer=None,
+        should_stop: Optional[Callable[[], bool]] = None,
+        input_root: Optional[str] = None,
+    ):
+        self.settings = settings
+        self.output_dir = output_dir
+        self.input_root = input_root
+        self.writer = writer
+        self.archive_output = getattr(writer, 'is_archive', False)
+        self.should_stop = should_stop or (lambda: False)
+        self.variants = output_variants(settings)
+        for variant in self.variants:
+            ensure_heif(save_format=variant['save_format'])
+        self.passthrough = is_noop(settings, self.variants)
+        self.copied = 0
+        self._copied_lock = threading.Lock()
+        self._plans = {}
+        self._local = threading.local()
+        self.canvas_pool_bytes = settings.get(
+            'canvas_pool_bytes', DEFAULT_CANVAS_POOL_BYTES
+        )
+        # Responsive levels are resized from the decoded source
+        self.mapped_inputs = settings.get('mapped_inputs', True) and not settings.get(
+            'responsive_widths'
+        )
+
+    def plan(self, img, index, variant, keep_high_bit_depth):
+        """Return the cached frame plan of ``variants[index]`` for ``img``'s shape."""
+        key = (img.width, img.height, img.mode, index)
+        plan = self._plans.get(key)
+        if plan is None:
+            plan = plan_frame(
+                img.width,
+                img.height,
+                img.mode,
+                variant['user_border_px'],
+                variant['aspect_ratio'],
+                variant['border_color'],
+                keep_high_bit_depth,
+            )
+            if len(self._plans) >= MAX_FRAME_PLANS:
+                self._plans.clear()
+            self._plans[key] = plan
+        return plan
+
+    def canvas_pool(self) -> Optional[CanvasPool]:
+        """Return the calling thread's canvas pool, or None if reuse is off."""
+        if not self.canvas_pool_bytes:
+            return None
+        pool = getattr(self._local, 'pool', None)
+        if pool is None:
+            pool = self._local.pool = CanvasPool(self.canvas_pool_bytes)
+        return pool
+
+    def outputs(
+        self, img, icc_profile=None, exif_bytes=None, pool=None
+    ) -> Iterator[Tuple[str, str, "Image.Image", dict]]:
+        """Yield ``(suffix, extension, image, save_args)`` for every output.
+
+        ``img`` must already be EXIF transposed. Outputs are rendered lazily
+        in order, variants first and each followed by its responsive widths,
+        so a consumer that stops early does no further work. With a canvas
+        ``pool`` each yielded image must be saved before the next is taken.
+        """
+        # Decode and orient once, convert once per bit depth and
+        # render every variant from the in-memory image.
+        sources = {}
+        for index, variant in enumerate(self.variants):
+            keep_high_bit_depth = variant['save_format'] in HIGH_BIT_DEPTH_FORMATS
+            if keep_high_bit_depth not in sources:
+                sources[keep_high_bit_depth] = prepare_source(img, keep_high_bit_depth)
+            source = sources[keep_high_bit_depth]
+
+            result = composite_plan(
+                source, self.plan(source, index, variant, keep_high_bit_depth), pool
+            )
+
+            ext, save_args = self.encoding(variant, icc_profile, exif_bytes)
+            yield variant['suffix'], ext, result, save_args
+
+            for width, level in self.responsive_levels(source, result.width, variant):
+                result = composite_plan(
+                    level, self.plan(level, index, variant, keep_high_bit_depth), pool
+                )
+                yield f"{variant['suffix']}_{width}w", ext, result, save_args
+
+    def encoding(self, variant, icc_profile=None, exif_bytes=None):
+        """Return ``(extension, save_args)`` for writing ``variant``."""
+        save_format = variant['save_format']
+        save_args = build_save_args(
+            save_format,
+            variant['quality'],
+            variant['encoder_effort'],
+            icc_profile=icc_profile,
+            exif_bytes=exif_bytes,
+        )
+        return FORMAT_EXTENSIONS.get(save_format, ".heif"), save_args
+
+    def process_file(self, image_path, index, total, written=None):
+        """Frame ``image_path`` into ``output_dir``.
+
+        Returns an error message, or None on success or cancellation. The
+        path of every output written is appended to the ``written`` list
+        when one is given.
+        """
+        try:
+            if self.should_stop():
+                return None
+
+            member = is_member(image_path)
+            # Strip by strip TIFF framing writes its output file itself
+            if not member and not self.archive_output:
+                source = should_stream(image_path, self.settings)
+                if source is not None:
+                    return self.process_streaming(
+                        source, image_path, index, total, written
+                    )
+
+            ensure_heif(image_path)
+            with image_source(image_path) as source, Image.open(source) as img:
+                if self.passthrough and can_copy(
+                    img,
+                    self.variants[0]['save_format'],
+                    self.settings['preserve_metadata'],
+                ):
+                    return self.copy_unchanged(
+                        image_path, index, total, written, source
+                    )
+                if self.mapped_inputs and not member:
+                    mapped = open_mapped(image_path)
+                    if mapped is not None:
+                        return self.process_mapped(
+                            mapped, image_path, index, total, written
+                        )
+                img = ImageOps.exif_transpose(img)
+                icc_profile = img.info.get('icc_profile')
+                exif_bytes = None
+                if self.settings['preserve_metadata']:
+                    exif_bytes = gps_exif(read_input(image_path))
+
+                for suffix, ext, result, save_args in self.outputs(
+                    img, icc_profile, exif_bytes, self.canvas_pool()
+                ):
+                    if self.should_stop():
+                        return None
+                    output_path = self.output_path(image_path, index, total, suffix + ext)
+                    self.write_output(result, output_path, save_args)
+                    if written is not None:
+                        written.append(output_path)
+
+                return None
+
+        except Exception as e:
+            # MemoryError, raised at a worker's memory limit, has no message
+            return f"Error processing {os.path.basename(image_path)}: {str(e) or type(e).__name__}"
+
+    def copy_unchanged(self, image_path, index, total, written=None, source=None):
+        """Copy ``image_path`` to its output name without decoding it.
+
+        ``source`` is an already open file to copy from instead, such as an
+        archive member.
+        """
+        save_format = self.variants[0]['save_format']
+        output_path = self.output_path(
+            image_path,
+            index,
+            total,
+            self.variants[0]['suffix'] + FORMAT_EXTENSIONS.get(save_format, ".heif"),
+        )
+        if source is None:
+            source = image_path
+        if self.archive_output:
+            self.writer.add_file(output_path, source)
+        else:
+            copy_file(source, output_path, self.settings.get('fsync_policy', 'none'))
+        if written is not None:
+            written.append(output_path)
+        with self._copied_lock:
+            self.copied += 1
+        return None
+
+    def process_mapped(self, source, image_path, index, total, written=None):
+        """Frame an uncompressed input from its memory map, see :mod:`.mapped_input`."""
+        try:
+            exif_bytes = None
+            if self.settings['preserve_metadata']:
+                exif_bytes = gps_exif(image_path)
+            pool = self.canvas_pool()
+            for variant_index, variant in enumerate(self.variants):
+                if self.should_stop():
+                    return None
+                keep_high_bit_depth = variant['save_format'] in HIGH_BIT_DEPTH_FORMATS
+                plan = self.plan(source, variant_index, variant, keep_high_bit_depth)
+                result = frame_mapped(source, plan, pool)
+                ext, save_args = self.encoding(variant, source.icc_profile, exif_bytes)
+                output_path = self.output_path(
+                    image_path, index, total, variant['suffix'] + ext
+                )
+                self.write_output(result, output_path, save_args)
+                if written is not None:
+                    written.append(output_path)
+        finally:
+            source.close()
+        return None
+
+    def responsive_levels(self, img, framed_width, variant):
+        """Yield ``(width, image)`` pairs for ``settings['responsive_widths']``.
+
+        Each level is downscaled from the previous one rather than from the
+        full resolution source. Levels are sized with ``scaled_source_size``
+        so the rendered border matches ``calculate_dimensions`` for that
+        output width. Widths at or above ``framed_width`` are skipped.
+        """
+        widths = sorted(
+            {int(w) for w in self.settings.get('responsive_widths') or ()},
+            reverse=True,
+        )
+        level = img
+        for width in widths:
+            if width >= framed_width or width <= 0:
+                continue
+            size = scaled_source_size(
+                img.width,
+                img.height,
+                width,
+                variant['aspect_ratio'],
+                variant['user_border_px'],
+            )
+            level = level.resize(size, Image.LANCZOS)
+            yield width, level
+
+    def process_streaming(self, source, image_path, index, total, written=None):
+        """Frame a very large uncompressed TIFF strip by strip."""
+        try:
+            output_path = self.output_path(
+                image_path, index, total, FORMAT_EXTENSIONS['TIFF']
+            )
+            _, save_args = self.encoding(self.variants[0])
+            complete = frame_tiff_streaming(
+                source,
+                output_path,
+                self.settings['user_border_px'],
+                resolve_aspect_ratio(self.settings['aspect_ratio']),
+                self.settings['border_color'],
+                fsync=self.settings.get('fsync_policy', 'none'),
+                should_stop=self.should_stop,
+                compression=save_args.get('compression', 'raw'),
+            )
+            if complete and written is not None:
+                written.append(output_path)
+        finally:
+            source.close()
+        return None
+
+    def output_base_name(self, image_path, index, total):
+        """Return the output name of ``image_path`` without suffix and extension.
+
+        With ``base_filename`` outputs are numbered by ``index``. Otherwise
+        the input's name is used, under its folder relative to
+        ``input_root`` when one is set; archive members count as files in a
+        folder named after their archive.
+        """
+        base_filename = self.settings['base_filename']
+        if base_filename:
+            if total > 1:
+                return f"{base_filename}_{index+1}"
+            return base_filename
+        name = os.path.basename(image_path)
+        if self.input_root is not None:
+            member = split_member(image_path) if is_member(image_path) else None
+            path = os.path.join(*member) if member else image_path
+            relative = os.path.relpath(path, self.input_root)
+            if relative != os.pardir and not relative.startswith(os.pardir + os.sep):
+                name = relative
+        return os.path.splitext(name)[0] + "_processed"
+
+    def output_path(self, image_path, index, total, tail):
+        """Return where the output ending in ``tail`` goes, creating its folder."""
+        base_name = self.output_base_name(image_path, index, total)
+        output_path = os.path.join(self.output_dir, base_name + tail)
+        if os.path.dirname(base_name) and not self.archive_output:
+            os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        return output_path
+
+    def write_output(self, result, output_path, save_args):
+        if self.writer is not None:
+            buffer = io.BytesIO()
+            result.save(buffer, **save_args)
+            self.writer.submit(output_path, buffer.getbuffer())
+        else:
+            result.save(output_path, **save_args)
+
+
+def frame_bytes(data, settings) -> bytes:
+    """Frame an encoded image held in memory and return the encoded output.
+
+    ``data`` is ``bytes``, ``bytearray``, a ``memoryview`` or a binary
+    file-like object; ``settings`` uses the same keys as the GUI, with
+    missing keys taken from ``DEFAULT_SETTINGS``. EXIF orientation, alpha
+    flattening, ICC profiles and GPS passthrough behave exactly as for
+    files, and input that framing would not change is returned as is. Only
+    the first output is rendered when ``settings`` lists several variants.
+    Safe to call from several threads at once.
+    """
+    if hasattr(data, 'read'):
+        data = data.read()
+    settings = {**DEFAULT_SETTINGS, **settings}
+    pipeline = FramingPipeline(settings)
+    if is_heif_header(data):
+        register_heif()
+
+    with Image.open(io.BytesIO(data)) as img:
+        if pipeline.passthrough and can_copy(
+            img, settings['save_format'], settings['preserve_metadata']
+        ):
+            return bytes(data)
+        img = ImageOps.exif_transpose(img)
+        icc_profile = img.info.get('icc_profile')
+        exif_bytes = None
+        if settings['preserve_metadata']:
+            exif_bytes = gps_exif(bytes(data))
+        _, _, result, save_args = next(pipeline.outputs(img, icc_profile, exif_bytes))
+
+    buffer = io.BytesIO()
+    result.save(buffer, **save_args)
+    return buffer.getvalue()
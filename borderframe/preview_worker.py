@@ -0,0 +1,175 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import NamedTuple, Optional, Tuple
+
+from PyQt5.QtCore import QThread, Qt, pyqtSignal
+from PyQt5.QtGui import QColor, QImage, QPainter
+
+from .utils import calculate_dimensions
+
+# Upper bound for PreviewCache, about 20 previews at 1000x800
+PREVIEW_CACHE_BYTES = 64 * 1024 * 1024
+
+
+class PreviewRequest(NamedTuple):
+    """Everything needed to render one preview frame."""
+
+    generation: int
+    image: QImage
+    user_px: int
+    aspect_ratio: Optional[Tuple[int, int]]
+    border_color: str
+    width: int
+    height: int
+
+
+def render_preview(request: PreviewRequest, source: Optional[QImage] = None) -> QImage:
+    """Render the framed image scaled to fit ``request.width`` x ``request.height``.
+
+    The border geometry is computed from the full resolution size, but only
+    the preview sized canvas is ever allocated. ``source`` may be a reduced
+    copy of ``request.image`` to scale from.
+    """
+    if source is None:
+        source = request.image
+    orig_width, orig_height = request.image.width(), request.image.height()
+    new_width, new_height = calculate_dimensions(
+        orig_width,
+        orig_height,
+        request.user_px,
+        request.aspect_ratio,
+        request.user_px,
+    )
+    scale = min(request.width / new_width, request.height / new_height)
+    out_width = max(1, round(new_width * scale))
+    out_height = max(1, round(new_height * scale))
+
+    # Smooth scaling keeps the quality of the previous QPixmap.scaled() call
+    scaled = source.scaled(
+        max(1, round(orig_width * scale)),
+        max(1, round(orig_height * scale)),
+        Qt.IgnoreAspectRatio,
+        Qt.SmoothTransformation,
+    )
+
+    result = QImage(out_width, out_height, QImage.Format_RGB32)
+    result.fill(QColor(request.border_color))
+    painter = QPainter(result)
+    painter.drawImage(
+        (out_width - scaled.width()) // 2,
+        (out_height - scaled.height()) // 2,
+        scaled,
+    )
+    painter.end()
+    return result
+
+
+class PreviewCache:
+    """Least recently used cache of rendered previews with a byte cap.
+
+    Keys describe everything a preview depends on (image path, aspect
+    ratio, border size, border color and preview size), so returning to a
+    recent combination needs no render at all.
+    """
+
+    def __init__(self, max_bytes: int = PREVIEW_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        self._entries.move_to_end(key)
+        return entry[0]
+
+    def put(self, key, value, cost: int) -> None:
+        if key in self._entries:
+            self.total_bytes -= self._entries.pop(key)[1]
+        if cost > self.max_bytes:
+            return
+        self._entries[key] = (value, cost)
+        self.total_bytes += cost
+        while self.total_bytes > self.max_bytes:
+            _, (_, evicted) = self._entries.popitem(last=False)
+            self.total_bytes -= evicted
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.total_bytes = 0
+
+
+class PreviewWorker(QThread):
+    """Background thread that renders previews, latest request wins.
+
+    Requests replace any request that has not started rendering yet, so a
+    burst of slider or resize events results in at most one render in
+    flight plus the most recent state.
+    """
+
+    rendered = pyqtSignal(int, QImage, float)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._condition = threading.Condition()
+        self._pending = None
+        self._running = True
+        # Reduced copy of the current source image, see reduced_source()
+        self._reduced_key = None
+        self._reduced = None
+
+    def request(self, request: PreviewRequest) -> None:
+        with self._condition:
+            self._pending = request
+            self._condition.notify()
+
+    def stop(self) -> None:
+        with self._condition:
+            self._running = False
+            self._pending = None
+            self._condition.notify()
+        self.wait()
+
+    def reduced_source(self, request: PreviewRequest) -> QImage:
+        """Return a copy of the source reduced to twice the preview size.
+
+        Downscaling a full resolution photo dominates the render time, so it
+        is done once per image and preview size instead of once per render.
+        """
+        image = request.image
+        # Round the box up so small resizes reuse the reduced copy
+        box_width = -(-request.width * 2 // 256) * 256
+        box_height = -(-request.height * 2 // 256) * 256
+        if image.width() <= box_width and image.height() <= box_height:
+            return image
+        key = (image.cacheKey(), box_width, box_height)
+        if key != self._reduced_key:
+            self._reduced = image.scaled(
+                box_width, box_height, Qt.KeepAspectRatio, Qt.SmoothTransformation
+            )
+            self._reduced_key = key
+        return self._reduced
+
+    def run(self):
+        while True:
+            with self._condition:
+                while self._pending is None and self._running:
+                    self._condition.wait()
+                if not self._running:
+                    return
+                request = self._pending
+                self._pending = None
+
+            start = time.perf_counter()
+            try:
+                image = render_preview(request, self.reduced_source(request))
+            except Exception as e:
+                print(f"Error updating preview: {e}")
+                continue
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            self.rendered.emit(request.generation, image, elapsed_ms)
@@ -1,17 +1,26 @@
 from PyQt5.QtCore import QThread, pyqtSignal
-from PIL import Image, ImageOps
-import piexif
-import os
 import concurrent.futures
 
-from .utils import calculate_dimensions, BASE_SIZE
+from .isolation import IsolatedPipeline, isolation_enabled
+from .pipeline import FramingPipeline, worker_count
+from .profiling import SamplingProfiler, profiling_enabled
+from .writer import OutputWriter
 
 
 class ProcessWorker(QThread):
     """Thread worker that processes a list of images.
 
-    The number of worker threads can be limited by setting the
-    ``BORDERFRAME_WORKERS`` environment variable.
+    The per-image work is done by a
+    :class:`~borderframe.pipeline.FramingPipeline`. The number of worker
+    threads can be limited by setting the ``BORDERFRAME_WORKERS``
+    environment variable. When ``buffered_output`` is
+    enabled in the settings, workers encode into memory and an
+    :class:`~borderframe.writer.OutputWriter` writes the files. Setting
+    ``BORDERFRAME_PROFILE=1`` samples the worker threads and writes a
+    profile into ``output_dir`` when the run ends; ``profile_message`` then
+    says where. With ``BORDERFRAME_ISOLATE=1`` every image is framed in a
+    supervised child process, see :mod:`~borderframe.isolation`; the worker
+    threads only wait for the children then, so profiling is skipped.
     """
 
     progress = pyqtSignal(int, str)
@@ -24,16 +33,38 @@ class ProcessWorker(QThread):
         self.output_dir = output_dir
         self.settings = settings
         self.should_stop = False
-        env_value = os.environ.get("BORDERFRAME_WORKERS")
+        self.writer = None
+        self.pipeline = None
+        # Images copied unchanged by the passthrough fast path
+        self.copied = 0
+        # Where the profile went, or why there is none, for the summary
+        self.profile_message = None
         # Allow optional override of worker count via BORDERFRAME_WORKERS
-        if env_value and env_value.isdigit():
-            self.max_workers = max(1, int(env_value))
-        else:
-            self.max_workers = os.cpu_count() or 1
+        self.max_workers = worker_count()
 
     def run(self):
         errors = []
+        profiler = None
+        process = self.process_single_image
+        isolated = isolation_enabled()
+        if profiling_enabled() and isolated:
+            self.profile_message = (
+                "No profile was written: profiling does not cover images "
+                "framed in child processes (BORDERFRAME_ISOLATE)."
+            )
+        elif profiling_enabled():
+            profiler = SamplingProfiler()
+            process = profiler.track(process)
+            profiler.start()
         try:
+            self.writer = OutputWriter.from_settings(self.settings)
+            pipeline_class = IsolatedPipeline if isolated else FramingPipeline
+            self.pipeline = pipeline_class(
+                self.settings,
+                self.output_dir,
+                self.writer,
+                should_stop=lambda: self.should_stop,
+            )
             # Limit worker threads to keep the UI responsive
             max_workers = max(1, min(self.max_workers, len(self.images)))
 
@@ -43,7 +74,7 @@ class ProcessWorker(QThread):
                     if self.should_stop:
                         break
                     future = executor.submit(
-                        self.process_single_image,
+                        process,
                         image_path,
                         i,
                         len(self.images),
@@ -64,109 +95,28 @@ class ProcessWorker(QThread):
         except Exception as e:
             errors.append(f"Unexpected error: {str(e)}")
         finally:
+            if self.writer is not None:
+                errors.extend(self.writer.close(cancel=self.should_stop))
+                self.writer = None
+            if self.pipeline is not None:
+                self.copied = self.pipeline.copied
+                if isinstance(self.pipeline, IsolatedPipeline):
+                    self.pipeline.close()
+            if profiler is not None:
+                profiler.stop()
+                try:
+                    prof_path, _ = profiler.write(self.output_dir)
+                    self.profile_message = f"Profile written to {prof_path}"
+                except OSError as e:
+                    errors.append(f"Error writing profile: {str(e)}")
             self.finished.emit(errors)
 
     def process_single_image(self, image_path, index, total):
-        try:
-            if self.should_stop:
-                return None
-            base_filename = self.settings['base_filename']
-            aspect_ratio = self.settings['aspect_ratio']
-            user_border_px = self.settings['user_border_px']
-            save_format = self.settings['save_format']
-            quality = self.settings['quality']
-            preserve_metadata = self.settings['preserve_metadata']
-            border_color = self.settings['border_color']
-
-            with Image.open(image_path) as img:
-                img = ImageOps.exif_transpose(img)
-                icc_profile = img.info.get('icc_profile')
-
-                if img.mode in ('RGBA', 'LA'):
-                    background = Image.new('RGB', img.size, border_color)
-                    if img.mode == 'RGBA':
-                        background.paste(img, mask=img.split()[3])
-                    else:
-                        background.paste(img, mask=img.split()[1])
-                    img = background
-                elif img.mode != 'RGB':
-                    img = img.convert('RGB')
-
-                orig_width, orig_height = img.size
-                scaled_border = int(
-                    user_border_px * min(orig_width, orig_height) / BASE_SIZE
-                )
-                target_width, target_height = calculate_dimensions(
-                    orig_width,
-                    orig_height,
-                    scaled_border,
-                    aspect_ratio,
-                )
-
-                if scaled_border > 0:
-                    img = ImageOps.expand(img, border=scaled_border, fill=border_color)
-
-                current_width, current_height = img.size
-                if (target_width, target_height) != (current_width, current_height):
-                    result = Image.new('RGB', (target_width, target_height), border_color)
-                    paste_x = (target_width - current_width) // 2
-                    paste_y = (target_height - current_height) // 2
-                    result.paste(img, (paste_x, paste_y))
-                else:
-                    result = img
-
-                if base_filename:
-                    if total > 1:
-                        base_name = f"{base_filename}_{index+1}"
-                    else:
-                        base_name = base_filename
-                else:
-                    original_name = os.path.basename(image_path)
-                    base_name = os.path.splitext(original_name)[0] + "_processed"
-
-                if save_format == "JPEG":
-                    ext = ".jpg"
-                elif save_format == "TIFF":
-                    ext = ".tiff"
-                elif save_format == "PNG":
-                    ext = ".png"
-                else:
-                    ext = ".heif"
-
-                output_path = os.path.join(self.output_dir, base_name + ext)
-
-                exif_bytes = None
-                if preserve_metadata:
-                    try:
-                        exif_dict = piexif.load(image_path)
-                        gps_dict = exif_dict.get('GPS', {})
-                        new_exif = {'GPS': gps_dict}
-                        exif_bytes = piexif.dump(new_exif)
-                    except Exception:
-                        pass
-
-                save_args = {'format': save_format}
-                if icc_profile:
-                    save_args['icc_profile'] = icc_profile
-
-                if save_format == "JPEG":
-                    save_args.update({
-                        'quality': quality,
-                        'exif': exif_bytes,
-                        'optimize': True,
-                        'subsampling': 0,
-                    })
-                elif save_format == "HEIF":
-                    save_args.update({'quality': quality})
-                elif save_format == "PNG":
-                    save_args.update({'optimize': True})
-
-                result.save(output_path, **save_args)
-
-                return None
-
-        except Exception as e:
-            return f"Error processing {os.path.basename(image_path)}: {str(e)}"
+        return self.pipeline.process_file(image_path, index, total)
 
     def stop(self):
         self.should_stop = True
+        writer = self.writer
+        if writer is not None:
+            writer.cancel()
+
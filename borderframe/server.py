@@ -0,0 +1,437 @@
+"""Local HTTP job service built on the framing pipeline.
+
+One long-lived thread pool serves every client, so tools that need framing
+share warm workers instead of each starting a BorderFrame process. Only the
+standard library is used and PyQt5 is never imported.
+
+Endpoints:
+
+``POST /jobs``
+    JSON body ``{"paths": [...], "output_dir": "...", "settings": {...}}``.
+    Frames files on disk like the GUI does.
+``POST /frame?settings=<json>[&wait=1]``
+    The request body is an encoded image. The framed result is kept in
+    memory for ``/jobs/<id>/result``; with ``wait=1`` it is returned
+    directly.
+``GET /jobs/<id>`` and ``GET /jobs/<id>/result``
+    Job status as JSON, and the encoded output of an upload job.
+``GET /metrics``
+    Counters in the Prometheus text format.
+
+Path jobs read and write any file the server process can access, so the
+service binds to localhost by default and must not be exposed further. Web
+pages must not reach it either: requests whose ``Host`` or ``Origin`` names
+another machine are refused, which defeats DNS rebinding, and POST bodies
+must carry a content type that a plain HTML form cannot send.
+"""
+
+import concurrent.futures
+import json
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from urllib.parse import parse_qs, urlsplit
+
+from .pipeline import DEFAULT_SETTINGS, FramingPipeline, frame_bytes, worker_count
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+# Images accepted but not yet finished before new jobs are refused with 503
+DEFAULT_MAX_PENDING = 1024
+DEFAULT_MAX_UPLOAD_BYTES = 256 * 1024 * 1024
+# Finished jobs kept for status queries; the oldest are dropped first
+DEFAULT_MAX_FINISHED = 1000
+# Upload results held in memory before the oldest finished jobs are dropped
+DEFAULT_MAX_RESULT_BYTES = 512 * 1024 * 1024
+
+# Host names a browser uses for this machine; the bound host is also allowed
+LOCAL_HOSTS = ("localhost", "127.0.0.1", "::1")
+# Upload content types; none of them can be sent by an HTML form
+UPLOAD_CONTENT_TYPES = ("application/octet-stream", "image/")
+
+CONTENT_TYPES = {
+    "JPEG": "image/jpeg",
+    "PNG": "image/png",
+    "TIFF": "image/tiff",
+    "HEIF": "image/heif",
+}
+
+
+class ServiceBusy(Exception):
+    """Raised when accepting a job would exceed the pending image limit."""
+
+
+class Job:
+    """State of one submitted job; guarded by the owning service's lock."""
+
+    def __init__(self, kind: str, total: int, settings):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.total = total
+        self.settings = settings
+        self.status = "queued"
+        self.done = 0
+        self.errors = []
+        self.result = None
+        self.future = None
+        self.created = time.time()
+        self.finished = None
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "total": self.total,
+            "done": self.done,
+            "errors": list(self.errors),
+            "created": self.created,
+            "finished": self.finished,
+        }
+
+
+class JobService:
+    """Queue framing jobs onto one shared, long-lived worker pool."""
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        max_pending: int = DEFAULT_MAX_PENDING,
+        max_finished: int = DEFAULT_MAX_FINISHED,
+        max_result_bytes: int = DEFAULT_MAX_RESULT_BYTES,
+    ):
+        self.workers = workers or worker_count()
+        self.max_pending = max_pending
+        self.max_finished = max_finished
+        self.max_result_bytes = max_result_bytes
+        self.executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=self.workers, thread_name_prefix="borderframe"
+        )
+        self.started = time.time()
+        self._lock = threading.Lock()
+        self._jobs = OrderedDict()
+        self._pending = 0
+        # Futures not finished yet, cancelled by shutdown(wait=False)
+        self._futures = set()
+        self.metrics = {
+            "jobs_submitted_total": 0,
+            "jobs_completed_total": 0,
+            "jobs_failed_total": 0,
+            "jobs_rejected_total": 0,
+            "images_processed_total": 0,
+            "image_errors_total": 0,
+            "processing_seconds_total": 0.0,
+        }
+
+    def _accept(self, job: Job) -> None:
+        with self._lock:
+            if self._pending + job.total > self.max_pending:
+                self.metrics["jobs_rejected_total"] += 1
+                raise ServiceBusy(f"{self._pending} images pending")
+            self._pending += job.total
+            self._jobs[job.id] = job
+            self.metrics["jobs_submitted_total"] += 1
+
+    def submit_paths(self, paths, output_dir: str, settings) -> Job:
+        """Queue a job that frames ``paths`` into ``output_dir``."""
+        settings = {**DEFAULT_SETTINGS, **settings}
+        pipeline = FramingPipeline(settings, output_dir)
+        job = Job("paths", len(paths), settings)
+        self._accept(job)
+        for index, path in enumerate(paths):
+            self._submit(job, pipeline.process_file, path, index, len(paths))
+        if not paths:
+            self._finish_image(job, None, 0.0)
+        return job
+
+    def submit_bytes(self, data: bytes, settings) -> Job:
+        """Queue a job that frames an encoded image held in memory."""
+        job = Job("bytes", 1, {**DEFAULT_SETTINGS, **settings})
+        self._accept(job)
+        job.future = self._submit(job, self._frame_upload, job, data)
+        return job
+
+    def _submit(self, job: Job, func, *args) -> concurrent.futures.Future:
+        future = self.executor.submit(self._run, job, func, *args)
+        with self._lock:
+            self._futures.add(future)
+        # Outside the lock: the callback runs at once if the future is done
+        future.add_done_callback(self._forget)
+        return future
+
+    def _forget(self, future: concurrent.futures.Future) -> None:
+        with self._lock:
+            self._futures.discard(future)
+
+    def _frame_upload(self, job: Job, data: bytes):
+        try:
+            job.result = frame_bytes(data, job.settings)
+        except Exception as e:
+            return f"Error processing upload: {e}"
+        return None
+
+    def _run(self, job: Job, func, *args) -> None:
+        with self._lock:
+            job.status = "running"
+        start = time.perf_counter()
+        try:
+            error = func(*args)
+        except Exception as e:
+            error = f"Unexpected error: {e}"
+        self._finish_image(job, error, time.perf_counter() - start)
+
+    def _finish_image(self, job: Job, error, elapsed: float) -> None:
+        with self._lock:
+            self.metrics["processing_seconds_total"] += elapsed
+            if job.total:
+                job.done += 1
+                self._pending -= 1
+                self.metrics["images_processed_total"] += 1
+            if error:
+                job.errors.append(error)
+                self.metrics["image_errors_total"] += 1
+            if job.done < job.total:
+                return
+            job.status = "failed" if job.errors else "done"
+            job.finished = time.time()
+            key = "jobs_failed_total" if job.errors else "jobs_completed_total"
+            self.metrics[key] += 1
+            self._trim()
+
+    def _trim(self) -> None:
+        finished = [job for job in self._jobs.values() if job.finished]
+        count = len(finished)
+        result_bytes = sum(len(job.result or b"") for job in finished)
+        for job in finished:
+            if count <= self.max_finished and result_bytes <= self.max_result_bytes:
+                break
+            del self._jobs[job.id]
+            count -= 1
+            result_bytes -= len(job.result or b"")
+
+    def job(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def status(self, job: Job):
+        with self._lock:
+            return job.to_dict()
+
+    def metrics_text(self) -> str:
+        """Render the counters in the Prometheus text exposition format."""
+        with self._lock:
+            values = dict(self.metrics)
+            values["images_pending"] = self._pending
+            values["jobs_tracked"] = len(self._jobs)
+        values["workers"] = self.workers
+        values["uptime_seconds"] = time.time() - self.started
+        lines = []
+        for name, value in values.items():
+            kind = "counter" if name.endswith("_total") else "gauge"
+            lines.append(f"# TYPE borderframe_{name} {kind}")
+            lines.append(f"borderframe_{name} {value:g}")
+        return "\n".join(lines) + "\n"
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop the pool; unless ``wait``, images not started are dropped."""
+        if not wait:
+            with self._lock:
+                futures = list(self._futures)
+            for future in futures:
+                future.cancel()
+        self.executor.shutdown(wait=wait)
+
+
+class JobRequestHandler(BaseHTTPRequestHandler):
+    """Routes requests to the :class:`JobService` attached to the server."""
+
+    server_version = "BorderFrame"
+
+    @property
+    def service(self) -> JobService:
+        return self.server.service
+
+    def send_json(self, status: int, payload) -> None:
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def read_body(self) -> Optional[bytes]:
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            if length < 0:
+                raise ValueError(length)
+        except ValueError:
+            self.send_json(400, {"error": "invalid Content-Length"})
+            return None
+        if length > self.server.max_upload_bytes:
+            self.send_json(413, {"error": "request body too large"})
+            return None
+        return self.rfile.read(length)
+
+    def is_local_request(self) -> bool:
+        """Return False, after answering 403, for requests from web pages.
+
+        ``Host`` must name this machine and ``Origin``, sent by browsers,
+        must be absent or local too.
+        """
+        host = _host_name(self.headers.get("Host", ""))
+        origin = self.headers.get("Origin")
+        allowed = self.server.allowed_hosts
+        if host not in allowed or (
+            origin is not None and _host_name(urlsplit(origin).netloc) not in allowed
+        ):
+            self.send_json(403, {"error": "requests must come from this machine"})
+            return False
+        return True
+
+    def has_content_type(self, *accepted: str) -> bool:
+        """Return False, after answering 415, unless the body type is accepted."""
+        content_type = self.headers.get("Content-Type", "")
+        content_type = content_type.split(";")[0].strip().lower()
+        if not content_type.startswith(accepted):
+            self.send_json(
+                415, {"error": f"Content-Type must be {' or '.join(accepted)}"}
+            )
+            return False
+        return True
+
+    def do_POST(self):
+        url = urlsplit(self.path)
+        if not self.is_local_request():
+            return
+        if url.path == "/jobs":
+            accepted = ("application/json",)
+        else:
+            accepted = UPLOAD_CONTENT_TYPES
+        if not self.has_content_type(*accepted):
+            return
+        body = self.read_body()
+        if body is None:
+            return
+        try:
+            if url.path == "/jobs":
+                request = json.loads(body or b"{}")
+                paths = request["paths"]
+                output_dir = request["output_dir"]
+                if not isinstance(paths, list) or not os.path.isdir(output_dir):
+                    raise ValueError("paths must be a list and output_dir a directory")
+                job = self.service.submit_paths(
+                    paths, output_dir, request.get("settings") or {}
+                )
+            elif url.path == "/frame":
+                query = parse_qs(url.query)
+                settings = json.loads(query.get("settings", ["{}"])[0])
+                job = self.service.submit_bytes(body, settings)
+                if query.get("wait", ["0"])[0] not in ("", "0"):
+                    job.future.result()
+                    self.send_result(job)
+                    return
+            else:
+                self.send_json(404, {"error": "not found"})
+                return
+        except ServiceBusy as e:
+            self.send_json(503, {"error": f"service busy: {e}"})
+            return
+        except (KeyError, TypeError, ValueError, RuntimeError) as e:
+            self.send_json(400, {"error": f"invalid request: {e}"})
+            return
+        self.send_json(202, self.service.status(job))
+
+    def do_GET(self):
+        if not self.is_local_request():
+            return
+        parts = urlsplit(self.path).path.strip("/").split("/")
+        if parts == ["metrics"]:
+            body = self.service.metrics_text().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        if len(parts) in (2, 3) and parts[0] == "jobs":
+            job = self.service.job(parts[1])
+            if job is None:
+                self.send_json(404, {"error": "unknown job"})
+            elif len(parts) == 2:
+                self.send_json(200, self.service.status(job))
+            elif parts[2] == "result":
+                self.send_result(job)
+            else:
+                self.send_json(404, {"error": "not found"})
+            return
+        self.send_json(404, {"error": "not found"})
+
+    def send_result(self, job: Job) -> None:
+        if job.kind != "bytes":
+            self.send_json(400, {"error": "only upload jobs have a result body"})
+            return
+        if job.result is None:
+            status = 500 if job.finished else 409
+            self.send_json(status, self.service.status(job))
+            return
+        self.send_response(200)
+        self.send_header(
+            "Content-Type",
+            CONTENT_TYPES.get(job.settings["save_format"], "application/octet-stream"),
+        )
+        self.send_header("Content-Length", str(len(job.result)))
+        self.end_headers()
+        self.wfile.write(job.result)
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+
+def _host_name(netloc: str) -> str:
+    """Return the lower-case host of a ``Host`` header or URL netloc."""
+    netloc = netloc.rpartition("@")[2].strip().lower()
+    if netloc.startswith("["):
+        return netloc[1:].partition("]")[0]
+    return netloc.partition(":")[0]
+
+
+def create_server(
+    host: str = DEFAULT_HOST,
+    port: int = DEFAULT_PORT,
+    service: Optional[JobService] = None,
+    max_upload_bytes: int = DEFAULT_MAX_UPLOAD_BYTES,
+    quiet: bool = False,
+) -> ThreadingHTTPServer:
+    """Create (but do not start) the HTTP server for ``service``."""
+    server = ThreadingHTTPServer((host, port), JobRequestHandler)
+    server.daemon_threads = True
+    server.service = service or JobService()
+    server.max_upload_bytes = max_upload_bytes
+    server.quiet = quiet
+    server.allowed_hosts = set(LOCAL_HOSTS) | {_host_name(host)}
+    return server
+
+
+def serve(host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, workers=None) -> None:
+    """Run the job service until interrupted."""
+    # Load Pillow's format plugins once instead of on the first request
+    from PIL import Image
+
+    Image.init()
+    server = create_server(host, port, JobService(workers))
+    print(
+        f"BorderFrame service on http://{server.server_address[0]}:"
+        f"{server.server_address[1]} with {server.service.workers} workers"
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.service.shutdown(wait=False)
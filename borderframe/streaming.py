@@ -0,0 +1,192 @@
+"""Iterate over batch results as they finish, without Qt.
+
+:func:`iter_process` and :func:`aprocess` run the same per-image pipeline
+and thread pool as :class:`~borderframe.process_worker.ProcessWorker`, but
+hand back one :class:`ImageResult` per image in completion order instead of
+emitting Qt signals. ``paths`` may be any iterable, including a lazy
+generator: at most ``max_pending`` images are submitted ahead of the
+consumer, so a slow consumer holds back the workers rather than letting
+results pile up. Numbered outputs (``base_filename``) depend on the batch
+size, so they need a sized ``paths`` or an explicit ``total``. Stopping the
+iteration (``break``, ``close()`` or cancelling the task) cancels queued
+images and makes running ones stop before their next output.
+
+Outputs are written directly, never through the buffered
+:class:`~borderframe.writer.OutputWriter`, so every reported file is
+complete on disk when its result is yielded.
+"""
+
+import asyncio
+import concurrent.futures
+import os
+import threading
+import time
+from typing import AsyncIterator, Iterable, Iterator, NamedTuple, Optional, Tuple
+
+from .archive import is_member, member_size
+from .pipeline import DEFAULT_SETTINGS, FramingPipeline, worker_count
+
+# Images submitted ahead of the consumer, per worker
+PENDING_PER_WORKER = 2
+
+
+class ImageResult(NamedTuple):
+    """Outcome of framing one input image."""
+
+    index: int
+    path: str
+    outputs: Tuple[str, ...]
+    input_bytes: int
+    output_bytes: int
+    seconds: float
+    error: Optional[str]
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class _Batch:
+    """Pipeline, pool and stop flag shared by both iterator flavours."""
+
+    def __init__(self, paths, settings, output_dir, workers, max_pending, total):
+        settings = {**DEFAULT_SETTINGS, **settings}
+        if total is None and hasattr(paths, '__len__'):
+            total = len(paths)
+        if total is None:
+            if settings['base_filename']:
+                raise ValueError(
+                    "numbered outputs need a sized list of paths or an explicit total"
+                )
+            # Only numbered output names depend on the total
+            total = 0
+        self.total = total
+        self.stopping = threading.Event()
+        self.pipeline = FramingPipeline(
+            settings, output_dir, should_stop=self.stopping.is_set
+        )
+        self.workers = workers or worker_count()
+        self.max_pending = max_pending or self.workers * PENDING_PER_WORKER
+        self.items = enumerate(paths)
+        self.executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=self.workers, thread_name_prefix="borderframe"
+        )
+
+    def process(self, index: int, path: str) -> ImageResult:
+        start = time.perf_counter()
+        written = []
+        error = self.pipeline.process_file(path, index, self.total, written)
+        return ImageResult(
+            index,
+            path,
+            tuple(written),
+            _size(path),
+            sum(_size(output) for output in written),
+            time.perf_counter() - start,
+            error,
+        )
+
+    def next_items(self, pending: int):
+        """Yield ``(index, path)`` until ``max_pending`` would be exceeded."""
+        while pending < self.max_pending:
+            item = next(self.items, None)
+            if item is None:
+                return
+            pending += 1
+            yield item
+
+    def stop(self, pending, wait: bool) -> None:
+        """Cancel the ``pending`` futures that have not started and shut down."""
+        self.stopping.set()
+        for future in pending:
+            future.cancel()
+        self.executor.shutdown(wait=wait)
+
+
+def _size(path: str) -> int:
+    try:
+        if is_member(path):
+            return member_size(path)
+        return os.path.getsize(path)
+    except (OSError, KeyError):
+        return 0
+
+
+def iter_process(
+    paths: Iterable[str],
+    settings,
+    output_dir: str,
+    workers: Optional[int] = None,
+    max_pending: Optional[int] = None,
+    total: Optional[int] = None,
+) -> Iterator[ImageResult]:
+    """Frame ``paths`` into ``output_dir`` and yield results as they finish.
+
+    ``settings`` uses the GUI keys, with missing keys taken from
+    ``DEFAULT_SETTINGS``. ``workers`` defaults to ``BORDERFRAME_WORKERS`` or
+    the CPU count and ``max_pending`` to two images per worker. ``total``
+    defaults to ``len(paths)``; with ``base_filename`` set and an unsized
+    ``paths`` it is required, and ValueError is raised right away without
+    it. When the consumer stops early, running images are waited for before
+    returning.
+    """
+    return _iter_results(
+        _Batch(paths, settings, output_dir, workers, max_pending, total)
+    )
+
+
+def _iter_results(batch: _Batch) -> Iterator[ImageResult]:
+    pending = set()
+    try:
+        while True:
+            for index, path in batch.next_items(len(pending)):
+                pending.add(batch.executor.submit(batch.process, index, path))
+            if not pending:
+                return
+            done, pending = concurrent.futures.wait(
+                pending, return_when=concurrent.futures.FIRST_COMPLETED
+            )
+            for future in done:
+                yield future.result()
+    finally:
+        batch.stop(pending, wait=True)
+
+
+def aprocess(
+    paths: Iterable[str],
+    settings,
+    output_dir: str,
+    workers: Optional[int] = None,
+    max_pending: Optional[int] = None,
+    total: Optional[int] = None,
+) -> AsyncIterator[ImageResult]:
+    """Async version of :func:`iter_process` for asyncio services.
+
+    Images are framed on the worker threads, so the event loop stays free.
+    When the consumer stops early the loop is not blocked: running images
+    stop on their own before their next output.
+    """
+    return _aiter_results(
+        _Batch(paths, settings, output_dir, workers, max_pending, total)
+    )
+
+
+async def _aiter_results(batch: _Batch) -> AsyncIterator[ImageResult]:
+    loop = asyncio.get_running_loop()
+    pending = set()
+    try:
+        while True:
+            for index, path in batch.next_items(len(pending)):
+                pending.add(
+                    loop.run_in_executor(batch.executor, batch.process, index, path)
+                )
+            if not pending:
+                return
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for future in done:
+                yield future.result()
+    finally:
+        # Cancelling the asyncio futures cancels the pool's futures too
+        batch.stop(pending, wait=False)
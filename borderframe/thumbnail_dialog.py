@@ -199,10 +199,11 @@ class ThumbnailDialog(QDialog):
 
             del self.images[index]
             self.parent.selected_images = self.images
+            self.parent.preview_cache.clear()
 
             if len(self.images) == 0:
                 self.parent.current_preview_index = -1
-                self.parent.current_pixmap = None
+                self.parent.current_image = None
             elif was_current:
                 self.parent.current_preview_index = min(index, len(self.images) - 1)
             elif index < self.parent.current_preview_index:
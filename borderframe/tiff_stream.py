@@ -0,0 +1,436 @@
+"""Strip based framing for very large uncompressed TIFF files.
+
+Gigapixel archival scans do not fit in memory as a single Pillow image. For
+uncompressed, chunky (strip or tile organized) 8-bit RGB, grayscale or alpha
+TIFF inputs this module maps one band of rows at a time, composites it
+against the border color and writes the output TIFF band by band, one strip
+per band. Only the band being read is mapped, so an address space limit
+(see :mod:`~borderframe.isolation`) does not need to cover the whole file. The pixel data is written sequentially after the file
+header and the IFD follows it, so strips can be compressed as they go. Peak
+memory stays at a few bands regardless of the image size.
+"""
+
+import mmap
+import os
+import struct
+import zlib
+from typing import Callable, Optional
+
+from PIL import Image, ImageColor, TiffImagePlugin
+
+from .compositor import ALPHA_MODES, place
+from .geometry import calculate_dimensions, BASE_SIZE
+from .writer import create_temp_file, fsync_directory
+
+# Inputs with at least this many pixels take the streaming path.
+DEFAULT_STREAMING_THRESHOLD_MP = 256
+# Approximate size of one processing band (and one output strip).
+BAND_BYTES = 16 * 1024 * 1024
+
+# Source modes whose framed output matches the in-memory path exactly. Other
+# modes need a palette, keep 16 bits or a color conversion, and are decoded
+# by Pillow instead.
+STREAMED_MODES = ("RGB", "L") + ALPHA_MODES
+# zlib level used for the Pillow TIFF compression named by the encoder
+# effort. LZW has no encoder outside libtiff, so those outputs are Deflate
+# compressed instead; both are lossless.
+DEFLATE_LEVELS = {"tiff_lzw": 6, "tiff_adobe_deflate": 9, "tiff_deflate": 9}
+
+_TIFF_EXTENSIONS = (".tif", ".tiff")
+_CLASSIC_TIFF_LIMIT = 2 ** 32 - 1
+# Pixel data starts after the largest (BigTIFF) file header
+_DATA_START = 16
+
+# TIFF tag ids and field types used by the writer
+_SHORT, _LONG, _UNDEFINED, _LONG8 = 3, 4, 7, 16
+_TYPE_FORMATS = {_SHORT: "H", _LONG: "I", _UNDEFINED: "B", _LONG8: "Q"}
+
+
+class StripSource:
+    """Row access to an uncompressed TIFF without decoding the whole image."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.image = TiffImagePlugin.TiffImageFile(path)
+        tags = self.image.tag_v2
+        self.width, self.height = self.image.size
+        self.mode = self.image.mode
+        self.rawmode = self.image.tile[0][3][0]
+        self.icc_profile = self.image.info.get("icc_profile")
+
+        bits = tags.get(258, (1,))
+        bits = bits if isinstance(bits, tuple) else (bits,)
+        if len(bits) == 1:
+            bits = bits * tags.get(277, 1)
+        if any(b % 8 for b in bits):
+            raise ValueError("sub-byte samples are not supported")
+        self.pixel_bytes = sum(bits) // 8
+        self.row_bytes = self.width * self.pixel_bytes
+
+        if 322 in tags:  # TileWidth
+            self.tile_width = tags[322]
+            self.tile_height = tags[323]
+            self.offsets = tags[324]
+        else:
+            self.tile_width = self.width
+            self.tile_height = tags.get(278, self.height)
+            self.offsets = tags[273]
+
+        self._file = open(path, "rb")
+
+    @classmethod
+    def probe(cls, path: str) -> Optional["StripSource"]:
+        """Return a source for ``path`` if its layout can be streamed."""
+        try:
+            image = TiffImagePlugin.TiffImageFile(path)
+        except Exception:
+            return None
+        try:
+            tags = image.tag_v2
+            if (
+                tags.get(259, 1) != 1  # Compression
+                or tags.get(284, 1) != 1  # PlanarConfiguration
+                or tags.get(274, 1) != 1  # Orientation
+                or not image.tile
+                or image.tile[0][0] != "raw"
+            ):
+                return None
+        finally:
+            image.close()
+        try:
+            return cls(path)
+        except Exception:
+            return None
+
+    def band_limit(self, y: int) -> int:
+        """Return the end of the run of contiguous rows that starts at ``y``."""
+        if self.tile_width != self.width:
+            return self.height
+        return min(self.height, (y // self.tile_height + 1) * self.tile_height)
+
+    def read_band(self, y0: int, y1: int, copy: bool = True) -> "Image.Image":
+        """Return rows ``y0`` to ``y1`` as a Pillow image.
+
+        With ``copy=False`` rows inside one strip are returned as a read-only
+        image over a mapped window of the file, without copying, when no
+        unpacking is needed. The window is unmapped when the image is
+        released, which must happen before :meth:`close`.
+        """
+        if (
+            not copy
+            and self.rawmode == self.mode
+            and y1 <= self.band_limit(y0)
+            and self.tile_width == self.width
+        ):
+            strip, row_in_strip = divmod(y0, self.tile_height)
+            start = self.offsets[strip] + row_in_strip * self.row_bytes
+            view = self._window(start, start + (y1 - y0) * self.row_bytes)
+            return Image.frombuffer(
+                self.mode, (self.width, y1 - y0), view, "raw", self.rawmode, 0, 1
+            )
+
+        tiles_across = -(-self.width // self.tile_width)
+        tile_row_bytes = self.tile_width * self.pixel_bytes
+        # (destination, source, length) of every row segment in the band
+        segments = []
+        for y in range(y0, y1):
+            tile_row, row_in_tile = divmod(y, self.tile_height)
+            out = (y - y0) * self.row_bytes
+            for column in range(tiles_across):
+                x = column * self.tile_width
+                length = min(self.tile_width, self.width - x) * self.pixel_bytes
+                start = (
+                    self.offsets[tile_row * tiles_across + column]
+                    + row_in_tile * tile_row_bytes
+                )
+                segments.append((out + x * self.pixel_bytes, start, length))
+
+        band = bytearray((y1 - y0) * self.row_bytes)
+        low = min(start for _, start, _ in segments)
+        high = max(start + length for _, start, length in segments)
+        with self._window(low, high) as view:
+            for dest, start, length in segments:
+                band[dest:dest + length] = view[start - low:start - low + length]
+
+        return Image.frombuffer(
+            self.mode, (self.width, y1 - y0), band, "raw", self.rawmode, 0, 1
+        )
+
+    def release_rows(self, y0: int, y1: int) -> None:
+        """Nothing to release: windows are unmapped along with their band."""
+
+    def _window(self, start: int, end: int) -> memoryview:
+        """Map bytes ``start`` to ``end`` of the file and return a view of them.
+
+        The map is released together with the last view of it.
+        """
+        offset = start - start % mmap.ALLOCATIONGRANULARITY
+        window = mmap.mmap(
+            self._file.fileno(), end - offset, access=mmap.ACCESS_READ, offset=offset
+        )
+        return memoryview(window)[start - offset:end - offset]
+
+    def close(self):
+        self._file.close()
+        self.image.close()
+
+
+
+def should_stream(path: str, settings: dict) -> Optional[StripSource]:
+    """Return a :class:`StripSource` when ``path`` qualifies for streaming."""
+    if settings.get("save_format") != "TIFF":
+        return None
+    if settings.get("variants") or settings.get("responsive_widths"):
+        return None
+    if not path.lower().endswith(_TIFF_EXTENSIONS):
+        return None
+    threshold = settings.get(
+        "streaming_threshold_mp", DEFAULT_STREAMING_THRESHOLD_MP
+    ) * 1_000_000
+    source = StripSource.probe(path)
+    if source is not None and (
+        source.mode not in STREAMED_MODES or source.width * source.height < threshold
+    ):
+        source.close()
+        return None
+    return source
+
+
+class _StripWriter:
+    """Cut the output rows into strips of ``strip_bytes`` and write them.
+
+    Strips are Deflate compressed at ``level``, or written as they are when
+    ``level`` is None. The offset and size of every strip are recorded for
+    the IFD.
+    """
+
+    def __init__(self, file, strip_bytes: int, level: Optional[int]):
+        self.file = file
+        self.strip_bytes = strip_bytes
+        self.level = level
+        self.offsets = []
+        self.counts = []
+        self._pending = bytearray()
+
+    def write(self, data) -> None:
+        if self.level is None:
+            # Uncompressed strips are contiguous, so write without copying
+            position = self.file.tell()
+            self.file.write(data)
+            self._record_raw(position, len(data))
+            return
+        self._pending += data
+        while len(self._pending) >= self.strip_bytes:
+            self._emit(memoryview(self._pending)[:self.strip_bytes])
+            del self._pending[:self.strip_bytes]
+
+    def _record_raw(self, position: int, size: int) -> None:
+        if not self.offsets:
+            self.offsets.append(position)
+            self.counts.append(0)
+        while size:
+            count = min(size, self.strip_bytes - self.counts[-1])
+            if count == 0:
+                self.offsets.append(position)
+                self.counts.append(0)
+                continue
+            self.counts[-1] += count
+            position += count
+            size -= count
+
+    def _emit(self, strip) -> None:
+        data = zlib.compress(strip, self.level)
+        self.offsets.append(self.file.tell())
+        self.counts.append(len(data))
+        self.file.write(data)
+
+    def finish(self) -> None:
+        if self._pending:
+            self._emit(self._pending)
+            self._pending = bytearray()
+
+
+def frame_tiff_streaming(
+    source: StripSource,
+    output_path: str,
+    user_border_px: int,
+    aspect_ratio,
+    border_color: str,
+    fsync: str = "none",
+    should_stop: Callable[[], bool] = lambda: False,
+    compression: str = "raw",
+) -> bool:
+    """Frame ``source`` into ``output_path`` band by band.
+
+    ``compression`` is the Pillow name from the encoder preset; see
+    :data:`DEFLATE_LEVELS`. The output is written to a temporary file and
+    renamed into place, so a cancelled run (``should_stop`` returning True)
+    leaves nothing behind. Returns False when cancelled.
+    """
+    if compression != "raw" and compression not in DEFLATE_LEVELS:
+        raise ValueError(f"Unsupported TIFF compression for streaming: {compression}")
+    level = DEFLATE_LEVELS.get(compression)
+
+    width, height = source.width, source.height
+    scaled_border = int(user_border_px * min(width, height) / BASE_SIZE)
+    out_width, out_height = calculate_dimensions(
+        width, height, scaled_border, aspect_ratio
+    )
+    paste_x = (out_width - width) // 2
+    paste_y = (out_height - height) // 2
+
+    color = bytes(ImageColor.getrgb(border_color)[:3])
+    out_row_bytes = out_width * 3
+    band_rows = max(1, BAND_BYTES // max(out_row_bytes, source.row_bytes))
+    big = _needs_bigtiff(out_row_bytes * out_height, band_rows * out_row_bytes, source.icc_profile)
+
+    directory = os.path.dirname(output_path) or "."
+    fd, temp_path = create_temp_file(output_path)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            # The first IFD offset is filled in once the strips are written
+            f.write(_file_header(big, 0).ljust(_DATA_START, b"\0"))
+            strips = _StripWriter(f, band_rows * out_row_bytes, level)
+
+            border_band = color * (out_width * band_rows)
+            rows_written = 0
+
+            def write_border(rows):
+                nonlocal rows_written
+                while rows > 0:
+                    count = min(rows, band_rows)
+                    strips.write(memoryview(border_band)[:count * out_row_bytes])
+                    rows -= count
+                    rows_written += count
+
+            write_border(paste_y)
+
+            canvas = None
+            fill = ImageColor.getrgb(border_color)[:3]
+            for y0 in range(0, height, band_rows):
+                if should_stop():
+                    raise InterruptedError("cancelled")
+                y1 = min(y0 + band_rows, height)
+                if canvas is None or canvas.height != y1 - y0:
+                    canvas = Image.new("RGB", (out_width, y1 - y0), fill)
+                band = source.read_band(y0, y1)
+                if band.mode in ALPHA_MODES:
+                    # Alpha is blended with the canvas, so reset the previous band
+                    canvas.paste(fill, (paste_x, 0, paste_x + width, y1 - y0))
+                place(canvas, band, paste_x, 0)
+                strips.write(canvas.tobytes())
+                rows_written += y1 - y0
+
+            write_border(out_height - rows_written)
+            strips.finish()
+
+            # IFDs start on a word boundary
+            f.write(b"\0" * (f.tell() % 2))
+            ifd_offset = f.tell()
+            f.write(
+                _tiff_ifd(
+                    out_width,
+                    out_height,
+                    band_rows,
+                    strips.offsets,
+                    strips.counts,
+                    level is not None,
+                    source.icc_profile,
+                    big,
+                    ifd_offset,
+                )
+            )
+            f.seek(0)
+            f.write(_file_header(big, ifd_offset))
+
+            if fsync != "none":
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(temp_path, output_path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        if should_stop():
+            return False
+        raise
+    if fsync == "full":
+        fsync_directory(directory)
+    return True
+
+
+def _needs_bigtiff(data_size: int, strip_bytes: int, icc_profile=None) -> bool:
+    """Return True when an output of ``data_size`` pixel bytes needs BigTIFF.
+
+    Deflate can grow incompressible strips slightly, so the estimate allows
+    for that as well as for the IFD and strip tables.
+    """
+    strips = -(-data_size // strip_bytes)
+    worst_case = data_size + data_size // 1000 + strips * 64 + 65536
+    return worst_case + len(icc_profile or b"") > _CLASSIC_TIFF_LIMIT
+
+
+def _file_header(big: bool, ifd_offset: int) -> bytes:
+    if big:
+        return b"II+\0" + struct.pack("<HHQ", 8, 0, ifd_offset)
+    return b"II*\0" + struct.pack("<I", ifd_offset)
+
+
+def _tiff_ifd(
+    width: int,
+    height: int,
+    rows_per_strip: int,
+    offsets,
+    counts,
+    deflate: bool,
+    icc_profile,
+    big: bool,
+    ifd_offset: int,
+) -> bytes:
+    """Build the IFD of a chunky RGB TIFF, to be written at ``ifd_offset``.
+
+    Values that do not fit in their entry follow the IFD directly.
+    """
+    offset_type = _LONG8 if big else _LONG
+    tags = [
+        (256, _LONG, [width]),
+        (257, _LONG, [height]),
+        (258, _SHORT, [8, 8, 8]),
+        (259, _SHORT, [8 if deflate else 1]),
+        (262, _SHORT, [2]),
+        (273, offset_type, list(offsets)),
+        (277, _SHORT, [3]),
+        (278, _LONG, [rows_per_strip]),
+        (279, offset_type, list(counts)),
+        (284, _SHORT, [1]),
+    ]
+    if icc_profile:
+        tags.append((34675, _UNDEFINED, list(icc_profile)))
+
+    if big:
+        count_format, entry_size, inline = "<Q", 20, 8
+        entry_format, next_format = "<HHQ", "<Q"
+    else:
+        count_format, entry_size, inline = "<H", 12, 4
+        entry_format, next_format = "<HHI", "<I"
+
+    ifd_size = struct.calcsize(count_format) + entry_size * len(tags)
+    ifd_size += struct.calcsize(next_format)
+    extra_offset = ifd_offset + ifd_size
+    ifd = bytearray(struct.pack(count_format, len(tags)))
+    extra = bytearray()
+    for tag, field_type, values in tags:
+        payload = struct.pack(
+            "<%d%s" % (len(values), _TYPE_FORMATS[field_type]), *values
+        )
+        ifd += struct.pack(entry_format, tag, field_type, len(values))
+        if len(payload) <= inline:
+            ifd += payload.ljust(inline, b"\0")
+        else:
+            ifd += struct.pack(next_format, extra_offset + len(extra))
+            extra += payload
+            if len(extra) % 2:
+                extra += b"\0"
+    ifd += struct.pack(next_format, 0)
+    return bytes(ifd + extra)
@@ -1,68 +1,66 @@
 """Utility functions for BorderFrame."""
 
-from typing import Optional, Tuple
-
-from PIL import Image, ImageOps
 from PyQt5.QtGui import QPixmap, QImage
 
-# Base size used for scaling the user provided border width. This keeps
-# borders visually consistent across images of different resolutions.
-BASE_SIZE = 1000
+# Geometry helpers live in the Qt-free geometry module; re-exported here for
+# the GUI code and existing imports.
+from .geometry import (  # noqa: F401
+    ASPECT_RATIOS,
+    BASE_SIZE,
+    calculate_dimensions,
+    resolve_aspect_ratio,
+    scaled_source_size,
+)
 
-try:  # Pillow < 10
-    from PIL.ImageQt import ImageQt  # type: ignore
-    _HAS_IMAGEQT = True
-except Exception:  # pragma: no cover - fallback for newer Pillow versions
-    ImageQt = None  # type: ignore
-    _HAS_IMAGEQT = False
+# Pillow modes that map directly onto a QImage format, with the raw mode used
+# to export their pixels and the bytes per pixel of that raw mode.
+_QIMAGE_FORMATS = {
+    "RGB": ("RGB", 3, "Format_RGB888"),
+    "RGBA": ("RGBA", 4, "Format_RGBA8888"),
+    "L": ("L", 1, "Format_Grayscale8"),
+}
 
 
-def calculate_dimensions(
-    img_width: int,
-    img_height: int,
-    border_size: int,
-    aspect_ratio: Optional[Tuple[int, int]],
-    user_px: Optional[int] = None,
-) -> Tuple[int, int]:
-    """Calculate new dimensions for adding a border while respecting an optional
-    aspect ratio.
+def pil_to_qimage(img: "Image.Image") -> QImage:
+    """Wrap the pixels of ``img`` in a QImage with a single export copy.
 
-    If ``user_px`` is provided, it is scaled to an actual border width using
-    ``BASE_SIZE`` so borders have a consistent appearance regardless of the
-    image resolution.
+    Opaque images use ``Format_RGB888`` (or ``Format_Grayscale8``) so they
+    take three (or one) bytes per pixel instead of four. The QImage refers to
+    the exported bytes directly; PyQt5 keeps a reference to that buffer for
+    the lifetime of the QImage.
     """
+    if img.mode not in _QIMAGE_FORMATS:
+        has_alpha = "A" in img.mode or "transparency" in img.info
+        img = img.convert("RGBA" if has_alpha else "RGB")
+    rawmode, pixel_bytes, format_name = _QIMAGE_FORMATS[img.mode]
+    data = img.tobytes("raw", rawmode)
+    return QImage(
+        data,
+        img.width,
+        img.height,
+        img.width * pixel_bytes,
+        getattr(QImage, format_name),
+    )
+
+
+def load_qimage(path: str) -> QImage:
+    """Load image as QImage applying EXIF orientation if present.
 
-    if user_px is not None:
-        border_size = int(user_px * min(img_width, img_height) / BASE_SIZE)
-    if aspect_ratio is None:
-        new_width = img_width + (border_size * 2)
-        new_height = img_height + (border_size * 2)
-    else:
-        target_ratio = aspect_ratio[0] / aspect_ratio[1]
-        min_width = img_width + (border_size * 2)
-        min_height = img_height + (border_size * 2)
-        current_ratio = min_width / min_height
+    Unlike a QPixmap, the result can be used from worker threads. ``path``
+    may name a member of a ZIP or TAR archive.
+    """
+    # Pillow is imported on first use to keep it out of application startup
+    from PIL import Image, ImageOps
 
-        if current_ratio > target_ratio:
-            new_width = min_width
-            new_height = int(new_width / target_ratio)
-            new_height = max(new_height, min_height)
-        else:
-            new_height = min_height
-            new_width = int(new_height * target_ratio)
-            new_width = max(new_width, min_width)
+    from .archive import image_source
+    from .heif import ensure_heif
 
-    return new_width, new_height
+    ensure_heif(path)
+    with image_source(path) as source, Image.open(source) as img:
+        img = ImageOps.exif_transpose(img)
+        return pil_to_qimage(img)
 
 
 def load_pixmap(path: str) -> QPixmap:
     """Load image as QPixmap applying EXIF orientation if present."""
-    with Image.open(path) as img:
-        img = ImageOps.exif_transpose(img)
-        rgba = img.convert("RGBA")
-        if _HAS_IMAGEQT:
-            qimage = ImageQt(rgba)  # type: ignore[misc]
-        else:  # pragma: no cover - fallback when ImageQt is unavailable
-            data = rgba.tobytes("raw", "RGBA")
-            qimage = QImage(data, rgba.width, rgba.height, QImage.Format_RGBA8888)
-        return QPixmap.fromImage(qimage)
+    return QPixmap.fromImage(load_qimage(path))
@@ -0,0 +1,375 @@
+"""Watch-folder daemon that frames new images as they arrive.
+
+A single watcher thread notices files in the input folder, waits until
+their size and modification time stop changing, and hands them to a fixed
+pool of worker threads through a bounded queue. When the queue is full the
+watcher blocks, so a burst of thousands of files is worked off at the pool's
+pace instead of piling up in memory.
+
+On Linux the watcher uses inotify (through ctypes, no extra dependency) and
+only stats files it was told about. Elsewhere it polls with ``os.scandir``,
+listing a directory again only when its modification time changes, plus a
+full rescan every ``RESCAN_SECONDS`` as a safety net.
+"""
+
+import ctypes
+import ctypes.util
+import os
+import queue
+import select
+import struct
+import sys
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from .isolation import IsolatedPipeline, isolation_enabled
+from .pipeline import IMAGE_EXTENSIONS, FramingPipeline, worker_count
+from .writer import OutputWriter
+
+DEFAULT_QUEUE_SIZE = 64
+# Seconds a file's size and mtime must stay unchanged before it is framed
+DEFAULT_SETTLE_SECONDS = 1.0
+DEFAULT_POLL_SECONDS = 1.0
+RESCAN_SECONDS = 30.0
+# Name patterns of files that are still being written by common tools
+PARTIAL_SUFFIXES = (".tmp", ".part", ".crdownload", ".partial", "~")
+
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_Q_OVERFLOW = 0x00004000
+_IN_ISDIR = 0x40000000
+_IN_NONBLOCK = 0o4000
+_IN_CLOEXEC = 0o2000000
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+def is_candidate(name: str) -> bool:
+    """Return True for image files that are not hidden or partial downloads."""
+    lower = name.lower()
+    return (
+        not name.startswith(".")
+        and not lower.endswith(PARTIAL_SUFFIXES)
+        and lower.endswith(IMAGE_EXTENSIONS)
+    )
+
+
+class _Inotify:
+    """Minimal ctypes binding to Linux inotify."""
+
+    MASK = _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE | _IN_MOVED_FROM
+
+    def __init__(self):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or None, use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = (ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32)
+        self.fd = libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.watches: Dict[int, str] = {}
+        self.paths = set()
+
+    def add_watch(self, path: str) -> None:
+        wd = self._add_watch(self.fd, os.fsencode(path), self.MASK)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"cannot watch {path}")
+        self.watches[wd] = path
+        self.paths.add(path)
+
+    def read(self, timeout: float):
+        """Yield ``(directory, name, mask)`` for events within ``timeout``."""
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b"\0")
+            offset += length
+            yield self.watches.get(wd), os.fsdecode(name), mask
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+class WatchDaemon:
+    """Frame images dropped into ``input_dir`` until :meth:`stop` is called.
+
+    ``settings`` uses the same keys as the GUI. ``base_filename`` is ignored
+    because its numbering only makes sense within one batch; outputs keep
+    the source names with a ``_processed`` suffix, in the same subfolder
+    when ``recursive`` is set. ``isolate`` frames every image in a
+    supervised child process with the given ``image_timeout`` and
+    ``memory_limit``, see :mod:`~borderframe.isolation`; it defaults to
+    ``BORDERFRAME_ISOLATE``.
+    """
+
+    def __init__(
+        self,
+        input_dir: str,
+        output_dir: str,
+        settings,
+        workers: Optional[int] = None,
+        queue_size: int = DEFAULT_QUEUE_SIZE,
+        settle_seconds: float = DEFAULT_SETTLE_SECONDS,
+        poll_seconds: float = DEFAULT_POLL_SECONDS,
+        recursive: bool = False,
+        use_inotify: Optional[bool] = None,
+        process_existing: bool = True,
+        isolate: Optional[bool] = None,
+        image_timeout: Optional[float] = None,
+        memory_limit: Optional[int] = None,
+        log=print,
+    ):
+        self.input_dir = os.path.abspath(input_dir)
+        self.output_dir = os.path.abspath(output_dir)
+        if self.output_dir == self.input_dir or (
+            recursive and self.output_dir.startswith(self.input_dir + os.sep)
+        ):
+            raise ValueError("the output folder must be outside the watched folder")
+        self.settings = {**settings, "base_filename": ""}
+        self.workers = workers or worker_count()
+        self.settle_seconds = settle_seconds
+        self.poll_seconds = poll_seconds
+        self.recursive = recursive
+        if use_inotify is None:
+            use_inotify = sys.platform.startswith("linux")
+        self.use_inotify = use_inotify
+        self.process_existing = process_existing
+        self.isolate = isolation_enabled() if isolate is None else isolate
+        self.image_timeout = image_timeout
+        self.memory_limit = memory_limit
+        self.log = log
+
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.stopping = threading.Event()
+        # path -> (size, mtime_ns, time the signature was first seen)
+        self._candidates: Dict[str, Tuple[int, int, float]] = {}
+        # directory -> name -> (size, mtime_ns) of files already queued;
+        # entries go when the file is deleted or moved away
+        self._done: Dict[str, Dict[str, Tuple[int, int]]] = {}
+        self._dir_mtimes: Dict[str, int] = {}
+        self._subdirs: Dict[str, list] = {}
+        self._lock = threading.Lock()
+        self.processed = 0
+        self.failed = 0
+
+    def stop(self) -> None:
+        self.stopping.set()
+
+    def run(self) -> None:
+        """Watch and process until :meth:`stop` is called or on Ctrl+C."""
+        writer = OutputWriter.from_settings(self.settings)
+        if self.isolate:
+            pipeline = IsolatedPipeline(
+                self.settings,
+                self.output_dir,
+                writer,
+                should_stop=self.stopping.is_set,
+                timeout=self.image_timeout,
+                memory_limit=self.memory_limit,
+                input_root=self.input_dir,
+            )
+        else:
+            pipeline = FramingPipeline(
+                self.settings,
+                self.output_dir,
+                writer,
+                should_stop=self.stopping.is_set,
+                input_root=self.input_dir,
+            )
+        threads = [
+            threading.Thread(
+                target=self._work, args=(pipeline,), name=f"borderframe-{i}", daemon=True
+            )
+            for i in range(self.workers)
+        ]
+        for thread in threads:
+            thread.start()
+
+        watcher = None
+        if self.use_inotify:
+            try:
+                watcher = _Inotify()
+            except (OSError, AttributeError) as e:
+                self.log(f"inotify unavailable ({e}), polling instead")
+
+        try:
+            self._watch(watcher)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stopping.set()
+            for thread in threads:
+                thread.join()
+            if watcher is not None:
+                watcher.close()
+            if isinstance(pipeline, IsolatedPipeline):
+                pipeline.close()
+            if writer is not None:
+                for error in writer.close():
+                    self.log(error)
+
+    def _watch(self, watcher: Optional[_Inotify]) -> None:
+        mode = "inotify" if watcher else "polling"
+        self.log(
+            f"Watching {self.input_dir} ({mode}), writing to {self.output_dir} "
+            f"with {self.workers} workers"
+        )
+        self._scan(watcher, initial=True)
+        last_rescan = time.monotonic()
+        tick = min(self.poll_seconds, self.settle_seconds / 2 or self.poll_seconds)
+        while not self.stopping.is_set():
+            if watcher is not None:
+                self._read_events(watcher, tick)
+            else:
+                self.stopping.wait(tick)
+                self._scan(None)
+            if time.monotonic() - last_rescan >= RESCAN_SECONDS:
+                self._dir_mtimes.clear()
+                self._scan(watcher)
+                last_rescan = time.monotonic()
+            self._enqueue_settled()
+
+    def _read_events(self, watcher: _Inotify, timeout: float) -> None:
+        for directory, name, mask in watcher.read(timeout):
+            if mask & _IN_Q_OVERFLOW:
+                # Events were dropped by the kernel; fall back to a rescan
+                self._dir_mtimes.clear()
+                self._scan(watcher)
+            elif directory is None:
+                continue
+            elif mask & (_IN_DELETE | _IN_MOVED_FROM):
+                self._forget(os.path.join(directory, name), watcher, mask & _IN_ISDIR)
+            elif mask & _IN_ISDIR:
+                if self.recursive and mask & (_IN_CREATE | _IN_MOVED_TO):
+                    self._scan_dir(os.path.join(directory, name), watcher)
+            elif is_candidate(name):
+                self._observe(os.path.join(directory, name))
+
+    def _scan(self, watcher: Optional[_Inotify], initial: bool = False) -> None:
+        self._scan_dir(self.input_dir, watcher, initial)
+
+    def _scan_dir(
+        self, directory: str, watcher: Optional[_Inotify], initial: bool = False
+    ) -> None:
+        if watcher is not None and directory not in watcher.paths:
+            watcher.add_watch(directory)
+        try:
+            mtime = os.stat(directory).st_mtime_ns
+        except OSError:
+            return
+        # An unchanged directory has no new entries, so it is not listed again
+        if self._dir_mtimes.get(directory) == mtime:
+            for subdir in self._subdirs.get(directory, ()):
+                self._scan_dir(subdir, watcher, initial)
+            return
+        self._dir_mtimes[directory] = mtime
+        try:
+            entries = list(os.scandir(directory))
+        except OSError:
+            return
+        subdirs = []
+        names = set()
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                if self.recursive and entry.path != self.output_dir:
+                    subdirs.append(entry.path)
+            elif entry.is_file() and is_candidate(entry.name):
+                names.add(entry.name)
+                if initial and not self.process_existing:
+                    stat = entry.stat()
+                    self._mark_done(entry.path, (stat.st_size, stat.st_mtime_ns))
+                else:
+                    self._observe(entry.path)
+        # Forget files that were deleted or moved away since the last listing
+        done = self._done.get(directory)
+        if done:
+            for name in done.keys() - names:
+                del done[name]
+        self._subdirs[directory] = subdirs
+        for subdir in subdirs:
+            self._scan_dir(subdir, watcher, initial)
+
+    def _observe(self, path: str) -> None:
+        if path not in self._candidates:
+            self._candidates[path] = (-1, -1, time.monotonic())
+
+    def _mark_done(self, path: str, signature: Tuple[int, int]) -> None:
+        directory, name = os.path.split(path)
+        self._done.setdefault(directory, {})[name] = signature
+
+    def _is_done(self, path: str, signature: Tuple[int, int]) -> bool:
+        directory, name = os.path.split(path)
+        return self._done.get(directory, {}).get(name) == signature
+
+    def _forget(self, path: str, watcher: Optional[_Inotify], is_dir: bool) -> None:
+        """Drop what is remembered about a file or folder that went away."""
+        if not is_dir:
+            directory, name = os.path.split(path)
+            self._done.get(directory, {}).pop(name, None)
+            return
+        prefix = path + os.sep
+        known = set(self._done) | set(self._dir_mtimes)
+        if watcher is not None:
+            known |= watcher.paths
+        for directory in known:
+            if directory == path or directory.startswith(prefix):
+                self._done.pop(directory, None)
+                self._dir_mtimes.pop(directory, None)
+                self._subdirs.pop(directory, None)
+                if watcher is not None:
+                    # The kernel drops the watch; a folder created in its
+                    # place must be watched again
+                    watcher.paths.discard(directory)
+
+    def _enqueue_settled(self) -> None:
+        now = time.monotonic()
+        for path, (size, mtime_ns, since) in list(self._candidates.items()):
+            if self.stopping.is_set():
+                return
+            try:
+                stat = os.stat(path)
+            except OSError:
+                del self._candidates[path]
+                continue
+            signature = (stat.st_size, stat.st_mtime_ns)
+            if self._is_done(path, signature):
+                del self._candidates[path]
+            elif signature != (size, mtime_ns):
+                self._candidates[path] = signature + (now,)
+            elif now - since >= self.settle_seconds and stat.st_size > 0:
+                del self._candidates[path]
+                self._mark_done(path, signature)
+                self._put(path)
+
+    def _put(self, path: str) -> None:
+        # Blocks while the queue is full; this is the backpressure
+        while not self.stopping.is_set():
+            try:
+                self.queue.put(path, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+
+    def _work(self, pipeline: FramingPipeline) -> None:
+        while not self.stopping.is_set():
+            try:
+                path = self.queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            error = pipeline.process_file(path, 0, 1)
+            with self._lock:
+                if error:
+                    self.failed += 1
+                else:
+                    self.processed += 1
+            self.log(error or f"Framed {os.path.relpath(path, self.input_dir)}")
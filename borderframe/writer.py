@@ -0,0 +1,222 @@
+"""Output writer stage for BorderFrame.
+
+Processing workers can encode results into memory and hand the buffers to an
+``OutputWriter``. A small pool of writer threads then performs large
+sequential writes into a temporary file next to the destination and
+atomically renames it into place, so cancelled or failed batches never leave
+partial images behind.
+"""
+
+import os
+import queue
+import tempfile
+import threading
+from typing import Callable, List, Optional
+
+# ``none`` leaves flushing to the OS, ``file`` fsyncs every written file and
+# ``full`` additionally fsyncs the containing directory after the rename.
+FSYNC_POLICIES = ("none", "file", "full")
+
+DEFAULT_WRITER_THREADS = 2
+DEFAULT_MAX_QUEUED_BYTES = 256 * 1024 * 1024
+# Size of the individual ``write`` calls issued per output file.
+WRITE_CHUNK_SIZE = 8 * 1024 * 1024
+
+
+def _read_umask() -> int:
+    """Return the process umask, without changing it where possible.
+
+    Linux reports it in ``/proc/self/status``. Elsewhere it can only be read
+    by setting it, which is done once, when this module is first imported.
+    """
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("Umask:"):
+                    return int(line.split()[1], 8)
+    except (OSError, ValueError, IndexError):
+        pass
+    umask = os.umask(0o022)
+    os.umask(umask)
+    return umask
+
+
+# Temporary files are created with mode 0600; renamed outputs get the
+# permissions a regular ``open`` would have given them.
+_UMASK = _read_umask()
+# Called with the path of every temporary file, see ``report_temp_files``
+_temp_file_listener: Optional[Callable[[str], None]] = None
+
+
+class OutputWriter:
+    """Write encoded images to disk from a dedicated pool of threads.
+
+    ``submit`` blocks while more than ``max_queued_bytes`` are waiting to be
+    written, which keeps memory bounded when encoding outpaces the disk.
+    """
+
+    def __init__(
+        self,
+        writers: int = DEFAULT_WRITER_THREADS,
+        fsync: str = "none",
+        max_queued_bytes: int = DEFAULT_MAX_QUEUED_BYTES,
+    ):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"Unknown fsync policy: {fsync}")
+        self.fsync = fsync
+        self.max_queued_bytes = max(1, int(max_queued_bytes))
+        self.queued_bytes = 0
+        self.errors: List[str] = []
+        self.cancelled = False
+        self._queue: "queue.Queue" = queue.Queue()
+        self._condition = threading.Condition()
+        self._threads = [
+            threading.Thread(target=self._run, name=f"borderframe-writer-{i}", daemon=True)
+            for i in range(max(1, int(writers)))
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    @classmethod
+    def from_settings(cls, settings: dict) -> Optional["OutputWriter"]:
+        """Create a writer when ``buffered_output`` is enabled in ``settings``."""
+        if not settings.get("buffered_output"):
+            return None
+        return cls(
+            writers=settings.get("writer_threads", DEFAULT_WRITER_THREADS),
+            fsync=settings.get("fsync_policy", "none"),
+            max_queued_bytes=settings.get("max_queued_bytes", DEFAULT_MAX_QUEUED_BYTES),
+        )
+
+    def submit(self, output_path: str, data) -> None:
+        """Queue ``data`` (bytes or a buffer) to be written to ``output_path``."""
+        size = len(data)
+        with self._condition:
+            # A single buffer larger than the bound is still accepted once the
+            # queue has drained, otherwise it could never be written.
+            while (
+                not self.cancelled
+                and self.queued_bytes > 0
+                and self.queued_bytes + size > self.max_queued_bytes
+            ):
+                self._condition.wait()
+            if self.cancelled:
+                return
+            self.queued_bytes += size
+        self._queue.put((output_path, data, size))
+
+    def close(self, cancel: bool = False) -> List[str]:
+        """Finish (or discard, if ``cancel``) queued writes and stop the pool."""
+        if cancel:
+            self.cancel()
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
+        return list(self.errors)
+
+    def cancel(self) -> None:
+        """Drop all queued writes and abort files that are being written."""
+        with self._condition:
+            self.cancelled = True
+            self._condition.notify_all()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            output_path, data, size = item
+            try:
+                if not self.cancelled:
+                    self._write(output_path, data)
+            except Exception as e:
+                with self._condition:
+                    self.errors.append(
+                        f"Error writing {os.path.basename(output_path)}: {str(e)}"
+                    )
+            finally:
+                with self._condition:
+                    self.queued_bytes -= size
+                    self._condition.notify_all()
+
+    def _write(self, output_path: str, data) -> None:
+        write_file(output_path, data, self.fsync, lambda: self.cancelled)
+
+
+def write_file(
+    output_path: str,
+    data,
+    fsync: str = "none",
+    cancelled: Optional[Callable[[], bool]] = None,
+) -> None:
+    """Write ``data`` to ``output_path`` through a temporary file and a rename.
+
+    ``cancelled`` is polled between chunks; once it returns True the
+    temporary file is removed and nothing is written.
+    """
+    directory = os.path.dirname(output_path) or "."
+    fd, temp_path = create_temp_file(output_path)
+    try:
+        view = memoryview(data).cast("B")
+        with os.fdopen(fd, "wb") as f:
+            for start in range(0, len(view), WRITE_CHUNK_SIZE):
+                if cancelled is not None and cancelled():
+                    raise InterruptedError("cancelled")
+                f.write(view[start:start + WRITE_CHUNK_SIZE])
+            if fsync != "none":
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(temp_path, output_path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        if cancelled is not None and cancelled():
+            return
+        raise
+    if fsync == "full":
+        fsync_directory(directory)
+
+
+def create_temp_file(output_path: str):
+    """Create a hidden temporary file next to ``output_path``.
+
+    Returns ``(fd, temp_path)``; the file is meant to be renamed over
+    ``output_path`` with ``os.replace`` once complete.
+    """
+    fd, temp_path = tempfile.mkstemp(
+        prefix="." + os.path.basename(output_path) + ".",
+        suffix=".tmp",
+        dir=os.path.dirname(output_path) or ".",
+    )
+    if _temp_file_listener is not None:
+        _temp_file_listener(temp_path)
+    try:
+        os.fchmod(fd, 0o666 & ~_UMASK)
+    # No fchmod on Windows, nor permissions on some filesystems
+    except (AttributeError, OSError):  # pragma: no cover
+        pass
+    return fd, temp_path
+
+
+def report_temp_files(listener: Optional[Callable[[str], None]]) -> None:
+    """Call ``listener`` with every temporary file this process creates.
+
+    Worker processes use it so their parent can remove the files of a
+    worker it had to kill mid-write. Pass None to stop reporting.
+    """
+    global _temp_file_listener
+    _temp_file_listener = listener
+
+
+def fsync_directory(directory: str) -> None:
+    """Flush directory metadata so a completed rename survives a crash."""
+    if not hasattr(os, "O_DIRECTORY"):  # pragma: no cover - Windows
+        return
+    fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
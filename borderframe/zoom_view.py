@@ -0,0 +1,145 @@
+from typing import Iterator, Optional, Tuple
+
+from PyQt5.QtCore import QRectF, Qt
+from PyQt5.QtGui import QColor, QImage, QPainter
+from PyQt5.QtWidgets import QWidget
+
+from .preview_worker import PreviewCache
+from .utils import calculate_dimensions
+
+# Zoom choices for the preview; None fits the whole frame in the window.
+ZOOM_LEVELS = {"Fit": None, "50%": 0.5, "100%": 1.0, "200%": 2.0}
+TILE_SIZE = 256
+# Enough 256x256 tiles to cover a 4K screen several times over
+TILE_CACHE_BYTES = 96 * 1024 * 1024
+
+
+def visible_tiles(
+    x: int, y: int, width: int, height: int, tile_size: int = TILE_SIZE
+) -> Iterator[Tuple[int, int]]:
+    """Yield the (column, row) of every tile intersecting the given rect."""
+    if width <= 0 or height <= 0:
+        return
+    for row in range(y // tile_size, (y + height - 1) // tile_size + 1):
+        for column in range(x // tile_size, (x + width - 1) // tile_size + 1):
+            yield column, row
+
+
+def source_region(
+    tile_x: int,
+    tile_y: int,
+    tile_width: int,
+    tile_height: int,
+    zoom: float,
+    image_rect: Tuple[int, int, int, int],
+) -> Optional[Tuple[float, float, float, float, float, float, float, float]]:
+    """Map a tile of the zoomed frame onto the source image.
+
+    ``image_rect`` is the (x, y, width, height) of the source inside the
+    framed canvas. Returns the target rect inside the tile followed by the
+    source rect, both as (x, y, width, height), or None for a tile that
+    only shows border.
+    """
+    left = max(tile_x / zoom, image_rect[0])
+    top = max(tile_y / zoom, image_rect[1])
+    right = min((tile_x + tile_width) / zoom, image_rect[0] + image_rect[2])
+    bottom = min((tile_y + tile_height) / zoom, image_rect[1] + image_rect[3])
+    if right <= left or bottom <= top:
+        return None
+    return (
+        left * zoom - tile_x,
+        top * zoom - tile_y,
+        (right - left) * zoom,
+        (bottom - top) * zoom,
+        left - image_rect[0],
+        top - image_rect[1],
+        right - left,
+        bottom - top,
+    )
+
+
+class TiledFrameView(QWidget):
+    """Framed image at a fixed zoom, rendered tile by tile while painting.
+
+    Only tiles in the exposed area are rendered, straight from the full
+    resolution source, so no full size framed image is ever built. Rendered
+    tiles are kept in a PreviewCache keyed by image, settings and position.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.tile_cache = PreviewCache(TILE_CACHE_BYTES)
+        self.image = None
+        self.settings = None
+        self.zoom = 1.0
+        self.border_color = "#FFFFFF"
+        self.image_rect = (0, 0, 0, 0)
+
+    def set_frame(
+        self,
+        image: Optional[QImage],
+        user_px: int,
+        aspect_ratio: Optional[Tuple[int, int]],
+        border_color: str,
+        zoom: float,
+    ) -> None:
+        self.image = image
+        if image is None:
+            self.settings = None
+            self.setFixedSize(0, 0)
+            self.update()
+            return
+
+        width, height = image.width(), image.height()
+        new_width, new_height = calculate_dimensions(
+            width, height, user_px, aspect_ratio, user_px
+        )
+        self.image_rect = (
+            (new_width - width) // 2,
+            (new_height - height) // 2,
+            width,
+            height,
+        )
+        self.zoom = zoom
+        self.border_color = border_color
+        self.settings = (image.cacheKey(), user_px, aspect_ratio, border_color, zoom)
+        self.setFixedSize(
+            max(1, round(new_width * zoom)), max(1, round(new_height * zoom))
+        )
+        self.update()
+
+    def render_tile(self, column: int, row: int) -> QImage:
+        x, y = column * TILE_SIZE, row * TILE_SIZE
+        tile = QImage(
+            min(TILE_SIZE, self.width() - x),
+            min(TILE_SIZE, self.height() - y),
+            QImage.Format_RGB32,
+        )
+        tile.fill(QColor(self.border_color))
+        region = source_region(
+            x, y, tile.width(), tile.height(), self.zoom, self.image_rect
+        )
+        if region is not None:
+            painter = QPainter(tile)
+            # Downscaled views are smoothed; 100% and above show exact pixels
+            if self.zoom < 1:
+                painter.setRenderHint(QPainter.SmoothPixmapTransform)
+            painter.drawImage(QRectF(*region[:4]), self.image, QRectF(*region[4:]))
+            painter.end()
+        return tile
+
+    def paintEvent(self, event):
+        if self.settings is None:
+            return
+        exposed = event.rect()
+        painter = QPainter(self)
+        for column, row in visible_tiles(
+            exposed.x(), exposed.y(), exposed.width(), exposed.height()
+        ):
+            key = (self.settings, column, row)
+            tile = self.tile_cache.get(key)
+            if tile is None:
+                tile = self.render_tile(column, row)
+                self.tile_cache.put(key, tile, tile.width() * tile.height() * 4)
+            painter.drawImage(column * TILE_SIZE, row * TILE_SIZE, tile)
+        painter.end()
@@ -1,10 +1,30 @@
+import os
 import sys
-from PyQt5.QtWidgets import QApplication
-
-from borderframe.image_processor import ImageProcessor
 
 
 def main():
+    args = sys.argv[1:]
+    # Arguments starting with "-" other than --help are Qt options
+    if args and (args[0] in ("-h", "--help") or not args[0].startswith("-")):
+        # Subcommands run headless and never import PyQt5
+        from borderframe.cli import main as cli_main
+
+        sys.exit(cli_main(args))
+
+    if "--profile" in args:
+        # Profile every processing batch started from the GUI
+        sys.argv.remove("--profile")
+        os.environ["BORDERFRAME_PROFILE"] = "1"
+
+    if "--isolate" in args:
+        # Frame every image in a supervised worker process
+        sys.argv.remove("--isolate")
+        os.environ["BORDERFRAME_ISOLATE"] = "1"
+
+    from PyQt5.QtWidgets import QApplication
+
+    from borderframe.image_processor import ImageProcessor
+
     app = QApplication(sys.argv)
     window = ImageProcessor()
     window.show()
@@ -0,0 +1,76 @@
+"""Shared test setup: headless Qt stubs and optional image library stubs.
+
+PyQt5 is always replaced, so GUI modules import without a display. Pillow,
+piexif and numpy are only stubbed when they are not installed; tests that
+frame real images request the ``pillow`` fixture and are skipped without it.
+"""
+
+import importlib
+import sys
+import types
+
+import pytest
+
+
+def _stub_qt():
+    qtwidgets = types.ModuleType("PyQt5.QtWidgets")
+    for cls in [
+        "QApplication", "QMainWindow", "QPushButton", "QFileDialog", "QVBoxLayout",
+        "QHBoxLayout", "QWidget", "QLabel", "QComboBox", "QSlider", "QColorDialog",
+        "QScrollArea", "QGridLayout", "QLineEdit", "QFrame", "QSizePolicy",
+        "QCheckBox", "QProgressDialog", "QMessageBox", "QDialog",
+    ]:
+        setattr(qtwidgets, cls, type(cls, (), {}))
+
+    qtcore = types.ModuleType("PyQt5.QtCore")
+    for cls in ["Qt", "QTimer", "QSize", "QThread", "QObject", "QRectF"]:
+        setattr(qtcore, cls, type(cls, (), {}))
+    qtcore.pyqtSignal = lambda *a, **k: None
+
+    qtgui = types.ModuleType("PyQt5.QtGui")
+    for cls in ["QPixmap", "QImage", "QPainter", "QColor", "QIntValidator", "QFont"]:
+        setattr(qtgui, cls, type(cls, (), {}))
+
+    sys.modules.setdefault("PyQt5", types.ModuleType("PyQt5"))
+    sys.modules["PyQt5.QtWidgets"] = qtwidgets
+    sys.modules["PyQt5.QtCore"] = qtcore
+    sys.modules["PyQt5.QtGui"] = qtgui
+
+
+def _installed(name: str) -> bool:
+    try:
+        importlib.import_module(name)
+    except ImportError:
+        return False
+    return True
+
+
+def _stub_pillow():
+    sys.modules["PIL"] = types.ModuleType("PIL")
+    for name in ("Image", "ImageOps", "ImageColor", "TiffImagePlugin"):
+        sys.modules[f"PIL.{name}"] = types.ModuleType(f"PIL.{name}")
+    imageqt = types.ModuleType("PIL.ImageQt")
+    imageqt.ImageQt = type("ImageQt", (), {})
+    sys.modules["PIL.ImageQt"] = imageqt
+    exif_tags = types.ModuleType("PIL.ExifTags")
+    exif_tags.TAGS = {}
+    sys.modules["PIL.ExifTags"] = exif_tags
+
+
+_stub_qt()
+PILLOW_INSTALLED = _installed("PIL.Image")
+if not PILLOW_INSTALLED:
+    _stub_pillow()
+for _name in ("piexif", "numpy"):
+    if not _installed(_name):
+        sys.modules[_name] = types.ModuleType(_name)
+
+
+@pytest.fixture
+def pillow():
+    """Return the real ``PIL.Image`` module, skipping the test without Pillow."""
+    if not PILLOW_INSTALLED:
+        pytest.skip("Pillow is not installed")
+    from PIL import Image
+
+    return Image
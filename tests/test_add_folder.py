@@ -0,0 +1,30 @@
+import zipfile
+
+from borderframe import image_processor
+from borderframe.image_processor import ImageProcessor
+from borderframe.pipeline import IMAGE_EXTENSIONS
+
+
+def test_add_folder_picks_up_every_pipeline_extension(tmp_path, monkeypatch):
+    names = [f"img{ext}" for ext in IMAGE_EXTENSIONS] + ["notes.txt"]
+    for name in names:
+        (tmp_path / name).write_bytes(b"x")
+    with zipfile.ZipFile(tmp_path / "set.zip", "w") as archive:
+        archive.writestr("inside.tif", b"x")
+        archive.writestr("inside.txt", b"x")
+
+    class FileDialog:
+        @staticmethod
+        def getExistingDirectory(*args):
+            return str(tmp_path)
+
+    monkeypatch.setattr(image_processor, "QFileDialog", FileDialog)
+    proc = ImageProcessor.__new__(ImageProcessor)
+    proc.selected_images = []
+    proc.preview_cache = {}
+    for name in ("load_current_image", "update_navigation_buttons", "update_format_default"):
+        setattr(proc, name, lambda: None)
+    proc.add_folder()
+
+    found = sorted(path[len(str(tmp_path)) + 1:] for path in proc.selected_images)
+    assert found == sorted(names[:-1] + ["set.zip!/inside.tif"])
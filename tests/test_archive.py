@@ -0,0 +1,159 @@
+import io
+import os
+import tarfile
+import zipfile
+
+import pytest
+
+from borderframe import archive
+from borderframe.archive import ArchiveWriter, archive_members, open_member
+from borderframe.batch import collect_inputs, shard_archive_path
+
+IMAGES = (".jpg", ".png")
+
+
+def make_zip(path):
+    with zipfile.ZipFile(path, "w") as z:
+        z.writestr("d/stored.jpg", b"S" * 1000)
+        z.writestr("deflated.png", b"D" * 5000, compress_type=zipfile.ZIP_DEFLATED)
+        z.writestr("notes.txt", b"not an image")
+        z.writestr("../escape.jpg", b"E")
+    return str(path)
+
+
+def make_tar(path, mode="w"):
+    with tarfile.open(path, mode) as t:
+        for name, data in (("a.jpg", b"A" * 700), ("sub/b.png", b"B" * 300)):
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            t.addfile(info, io.BytesIO(data))
+    return str(path)
+
+
+def test_zip_members_are_listed_and_read_in_place(tmp_path):
+    path = make_zip(tmp_path / "set.zip")
+    members = archive_members(path, IMAGES)
+    assert members == [path + "!/d/stored.jpg", path + "!/deflated.png"]
+
+    with open_member(members[0]) as f:
+        assert f.read(4) == b"SSSS"
+        f.seek(0)
+        assert f.read() == b"S" * 1000
+    with open_member(members[1]) as f:
+        assert f.read() == b"D" * 5000
+    assert archive.member_size(members[1]) == 5000
+
+
+def test_tar_members_are_listed_and_read(tmp_path):
+    path = make_tar(tmp_path / "set.tar")
+    members = archive_members(path, IMAGES)
+    assert members == [path + "!/a.jpg", path + "!/sub/b.png"]
+    with open_member(members[1]) as f:
+        f.seek(-2, io.SEEK_END)
+        assert f.read() == b"BB"
+
+
+@pytest.mark.parametrize("name, mode", [("set.tar.gz", "w:gz"), ("set.tar.xz", "w:xz")])
+def test_compressed_tar_inputs_are_refused(tmp_path, name, mode):
+    path = make_tar(tmp_path / name, mode)
+    with pytest.raises(ValueError, match="compressed TAR"):
+        archive_members(path, IMAGES)
+    with pytest.raises(ValueError, match="compressed TAR"):
+        open_member(path + "!/a.jpg")
+    with pytest.raises(ValueError, match="compressed TAR"):
+        collect_inputs([str(tmp_path)])
+
+
+def test_member_paths_need_an_existing_archive(tmp_path):
+    path = make_tar(tmp_path / "set.tar")
+    assert archive.split_member(path + "!/sub/b.png") == (path, "sub/b.png")
+    assert not archive.is_member(str(tmp_path / "plain!/b.png"))
+    assert not archive.is_member(str(tmp_path / "missing.zip!/b.png"))
+    with pytest.raises(FileNotFoundError):
+        open_member(path + "!/nothing.jpg")
+
+
+def test_damaged_archives_raise_value_error(tmp_path):
+    path = tmp_path / "broken.zip"
+    path.write_bytes(b"not a zip")
+    with pytest.raises(ValueError):
+        archive_members(str(path), IMAGES)
+
+
+def test_archive_writer_collects_outputs_in_a_zip(tmp_path):
+    source = tmp_path / "source.jpg"
+    source.write_bytes(b"copied as is")
+    target = tmp_path / "out.zip"
+    writer = ArchiveWriter(str(target), root=str(tmp_path))
+    writer.submit(str(tmp_path / "one_processed.jpg"), memoryview(b"framed"))
+    writer.add_file(str(tmp_path / "two_processed.jpg"), str(source))
+    assert writer.close() == []
+
+    with zipfile.ZipFile(target) as z:
+        assert sorted(z.namelist()) == ["one_processed.jpg", "two_processed.jpg"]
+        assert z.read("one_processed.jpg") == b"framed"
+        assert z.read("two_processed.jpg") == b"copied as is"
+    # Only the finished archive is left behind
+    assert sorted(os.listdir(tmp_path)) == ["out.zip", "source.jpg"]
+
+
+def test_archive_writer_streams_a_tar(tmp_path):
+    stream = io.BytesIO()
+    writer = ArchiveWriter(stream, archive_type="gz")
+    writer.submit("a_processed.png", b"x" * 10)
+    with open_member(make_zip(tmp_path / "in.zip") + "!/d/stored.jpg") as member:
+        writer.add_file("b_processed.jpg", member)
+    assert writer.close() == []
+
+    stream.seek(0)
+    with tarfile.open(fileobj=stream) as t:
+        assert sorted(t.getnames()) == ["a_processed.png", "b_processed.jpg"]
+        assert t.extractfile("b_processed.jpg").read() == b"S" * 1000
+
+
+@pytest.mark.parametrize("name", ["out.zip", "out.tar"])
+def test_archive_writer_refuses_duplicate_names(tmp_path, name):
+    writer = ArchiveWriter(str(tmp_path / name), root=str(tmp_path))
+    writer.add_file(str(tmp_path / "a_processed.jpg"), io.BytesIO(b"first"))
+    with pytest.raises(ValueError):
+        writer.add_file(str(tmp_path / "a_processed.jpg"), io.BytesIO(b"second"))
+    writer.submit(str(tmp_path / "a_processed.jpg"), b"third")
+    assert writer.close() == [
+        "Error writing a_processed.jpg: a_processed.jpg is already in the archive"
+    ]
+
+    if name == "out.zip":
+        with zipfile.ZipFile(tmp_path / name) as z:
+            assert z.namelist() == ["a_processed.jpg"]
+            assert z.read("a_processed.jpg") == b"first"
+    else:
+        with tarfile.open(tmp_path / name) as t:
+            assert t.getnames() == ["a_processed.jpg"]
+
+
+def test_unknown_archive_type_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        ArchiveWriter(str(tmp_path / "out.rar"))
+
+
+def test_batch_inputs_include_archive_members(tmp_path):
+    folder = tmp_path / "in"
+    folder.mkdir()
+    (folder / "loose.jpg").write_bytes(b"x")
+    make_tar(folder / "nested.tar")
+    zip_path = make_zip(tmp_path / "set.zip")
+
+    root, relative = collect_inputs([str(folder), zip_path])
+    assert root == str(tmp_path)
+    assert relative == [
+        "in/loose.jpg",
+        "in/nested.tar!/a.jpg",
+        "in/nested.tar!/sub/b.png",
+        "set.zip!/d/stored.jpg",
+        "set.zip!/deflated.png",
+    ]
+
+
+def test_sharded_runs_write_one_archive_each():
+    assert shard_archive_path("out/framed.zip", (1, 1)) == "out/framed.zip"
+    assert shard_archive_path("out/framed.tar.gz", (2, 3)) == "out/framed-2-of-3.tar.gz"
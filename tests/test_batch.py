@@ -0,0 +1,158 @@
+import json
+import os
+import zipfile
+
+import pytest
+
+from borderframe import batch
+from borderframe.pipeline import DEFAULT_SETTINGS
+
+
+class RecordingPipeline:
+    calls = []
+    copied = 0
+
+    def __init__(self, settings, output_dir, writer, **kwargs):
+        pass
+
+    def process_file(self, image_path, index, total):
+        RecordingPipeline.calls.append((os.path.basename(image_path), index, total))
+        return "Error processing bad.jpg: broken" if image_path.endswith("bad.jpg") else None
+
+
+def make_inputs(tmp_path, count=30):
+    for i in range(count):
+        folder = tmp_path / "archive" / f"day{i % 3}"
+        folder.mkdir(parents=True, exist_ok=True)
+        (folder / f"img{i}.jpg").write_bytes(b"x")
+    (tmp_path / "archive" / "notes.txt").write_bytes(b"x")
+    return str(tmp_path / "archive")
+
+
+def test_parse_shard():
+    assert batch.parse_shard("2/4") == (2, 4)
+    for value in ("0/4", "5/4", "2", "a/b"):
+        with pytest.raises(ValueError):
+            batch.parse_shard(value)
+
+
+def test_shard_of_is_stable_and_spread():
+    assert batch.shard_of("2023/IMG_0001.jpg", 4) == batch.shard_of("2023/IMG_0001.jpg", 4)
+    shards = {batch.shard_of(f"day/img{i}.jpg", 4) for i in range(100)}
+    assert shards == {1, 2, 3, 4}
+
+
+def test_collect_inputs_sorted_relative_paths(tmp_path):
+    root, relative = batch.collect_inputs([make_inputs(tmp_path, 6)])
+    assert root == str(tmp_path / "archive")
+    assert relative == sorted(relative)
+    assert relative[0] == "day0/img0.jpg"
+    assert len(relative) == 6
+
+
+def test_shards_partition_inputs_and_merge(tmp_path, monkeypatch):
+    monkeypatch.setattr(batch, "FramingPipeline", RecordingPipeline)
+    RecordingPipeline.calls = []
+    archive = make_inputs(tmp_path)
+    (tmp_path / "archive" / "day0" / "bad.jpg").write_bytes(b"x")
+    out = tmp_path / "out"
+    out.mkdir()
+    manifests = []
+    for k in (1, 2, 3):
+        summary = batch.run_batch(
+            [archive], str(out), {"base_filename": "job"}, shard=(k, 3),
+            workers=2, log=lambda message: None,
+        )
+        manifests.append(summary["manifest"])
+
+    indices = [index for _, index, _ in RecordingPipeline.calls]
+    assert sorted(indices) == list(range(31))
+    assert {total for _, _, total in RecordingPipeline.calls} == {31}
+
+    report = batch.merge_manifests(manifests)
+    assert report["total"] == 31
+    assert report["ok"] == 30
+    assert report["errors"] == [
+        {"path": "day0/bad.jpg", "error": "Error processing bad.jpg: broken"}
+    ]
+    assert report["missing_images"] == 0
+    assert report["consistent"]
+
+    partial = batch.merge_manifests(manifests[:2] + manifests[:1])
+    assert partial["missing_shards"] == [3]
+    assert partial["duplicate_shards"] == [1]
+
+
+@pytest.mark.parametrize("output", ["out", "out.zip"])
+def test_equal_file_names_in_different_folders_do_not_collide(
+    pillow, tmp_path, output
+):
+    for folder, color in (("a", (255, 0, 0)), ("b/c", (0, 0, 255))):
+        (tmp_path / "in" / folder).mkdir(parents=True)
+        pillow.new("RGB", (20, 10), color).save(tmp_path / "in" / folder / "IMG_0001.png")
+    with zipfile.ZipFile(tmp_path / "in" / "more.zip", "w") as archive:
+        archive.write(tmp_path / "in" / "a" / "IMG_0001.png", "IMG_0001.png")
+    if output == "out":
+        (tmp_path / "out").mkdir()
+    settings = dict(DEFAULT_SETTINGS, save_format="PNG")
+    summaries = [
+        batch.run_batch(
+            [str(tmp_path / "in")], str(tmp_path / output), settings,
+            shard=(k, 2), workers=2, log=lambda message: None,
+        )
+        for k in (1, 2)
+    ]
+    assert sum(summary["ok"] for summary in summaries) == 3
+
+    expected = ["a/IMG_0001_processed.png", "b/c/IMG_0001_processed.png",
+                "more.zip/IMG_0001_processed.png"]
+    if output == "out":
+        names = [
+            os.path.relpath(os.path.join(folder, name), tmp_path / "out").replace(os.sep, "/")
+            for folder, _, files in os.walk(tmp_path / "out")
+            for name in files
+            if name.endswith(".png")
+        ]
+        with pillow.open(tmp_path / "out" / "b" / "c" / "IMG_0001_processed.png") as img:
+            assert img.getpixel((5, 5)) == (0, 0, 255)
+    else:
+        names = []
+        for summary in summaries:
+            with zipfile.ZipFile(summary["archive"]) as archive:
+                names.extend(archive.namelist())
+    assert sorted(names) == expected
+
+
+class IsolatedRecordingPipeline(RecordingPipeline):
+    restarts = 0
+
+    def close(self):
+        pass
+
+
+@pytest.mark.parametrize("isolate", [False, True])
+def test_profile_is_skipped_for_isolated_runs(tmp_path, monkeypatch, isolate):
+    monkeypatch.setattr(batch, "FramingPipeline", RecordingPipeline)
+    monkeypatch.setattr(batch, "IsolatedPipeline", IsolatedRecordingPipeline)
+    archive = make_inputs(tmp_path, count=3)
+    (tmp_path / "out").mkdir()
+    messages = []
+    summary = batch.run_batch(
+        [archive], str(tmp_path / "out"), {}, workers=1, log=messages.append,
+        profile=True, isolate=isolate,
+    )
+    if isolate:
+        assert "profile" not in summary
+        assert "Profiling is skipped: images are framed in child processes" in messages
+    else:
+        assert os.path.isfile(summary["profile"])
+
+
+def test_truncated_manifest_counts_as_unfinished(tmp_path):
+    path = tmp_path / "manifest.jsonl"
+    header = {"shard": 1, "shards": 1, "total": 2, "settings": {}}
+    record = {"index": 0, "path": "a.jpg", "ok": True}
+    path.write_text(json.dumps(header) + "\n" + json.dumps(record) + "\n{\"ind")
+    report = batch.merge_manifests([str(path)])
+    assert report["unfinished_shards"] == [1]
+    assert report["missing_images"] == 1
@@ -1,47 +1,3 @@
-import types
-import sys
-
-# Stub PyQt5 modules so main.py can be imported without PyQt5 installed
-qtwidgets = types.ModuleType('PyQt5.QtWidgets')
-for cls in [
-    'QApplication', 'QMainWindow', 'QPushButton', 'QFileDialog', 'QVBoxLayout',
-    'QHBoxLayout', 'QWidget', 'QLabel', 'QComboBox', 'QSlider', 'QColorDialog',
-    'QScrollArea', 'QGridLayout', 'QLineEdit', 'QFrame', 'QSizePolicy',
-    'QCheckBox', 'QProgressDialog', 'QMessageBox', 'QDialog'
-]:
-    setattr(qtwidgets, cls, type(cls, (), {}))
-
-qtcore = types.ModuleType('PyQt5.QtCore')
-for cls in ['Qt', 'QTimer', 'QSize', 'QThread', 'QObject']:
-    setattr(qtcore, cls, type(cls, (), {}))
-# pyqtSignal is called at import time; use callable stub
-def pyqtSignal(*args, **kwargs):
-    return None
-qtcore.pyqtSignal = pyqtSignal
-
-qtgui = types.ModuleType('PyQt5.QtGui')
-for cls in ['QPixmap', 'QImage', 'QPainter', 'QColor', 'QIntValidator', 'QFont']:
-    setattr(qtgui, cls, type(cls, (), {}))
-
-sys.modules.setdefault('PyQt5', types.ModuleType('PyQt5'))
-sys.modules['PyQt5.QtWidgets'] = qtwidgets
-sys.modules['PyQt5.QtCore'] = qtcore
-sys.modules['PyQt5.QtGui'] = qtgui
-
-# Stub PIL and numpy modules
-pil_module = types.ModuleType('PIL')
-sys.modules['PIL'] = pil_module
-sys.modules['PIL.Image'] = types.ModuleType('PIL.Image')
-sys.modules['PIL.ImageOps'] = types.ModuleType('PIL.ImageOps')
-imageqt_module = types.ModuleType('PIL.ImageQt')
-imageqt_module.ImageQt = type('ImageQt', (), {})
-sys.modules['PIL.ImageQt'] = imageqt_module
-exif_tags = types.ModuleType('PIL.ExifTags')
-exif_tags.TAGS = {}
-sys.modules['PIL.ExifTags'] = exif_tags
-sys.modules['piexif'] = types.ModuleType('piexif')
-sys.modules['numpy'] = types.ModuleType('numpy')
-
 from borderframe.image_processor import ImageProcessor
 from borderframe.utils import BASE_SIZE
 
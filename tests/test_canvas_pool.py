@@ -0,0 +1,88 @@
+import types
+
+import pytest
+
+from borderframe import compositor, pipeline
+from borderframe.compositor import CanvasPool, FrameGeometry, FramePlan
+
+
+class FakeCanvas:
+    def __init__(self, mode, size, fill):
+        self.mode = mode
+        self.size = size
+        self.pastes = []
+
+    def paste(self, img, box, mask=None):
+        self.pastes.append((img, box))
+
+
+class FakeSource:
+    def __init__(self, mode, width, height):
+        self.mode = mode
+        self.width = width
+        self.height = height
+        self.size = (width, height)
+
+
+@pytest.fixture
+def fake_image(monkeypatch):
+    monkeypatch.setattr(compositor, "Image", types.SimpleNamespace(new=FakeCanvas))
+
+
+def plan(width, height, fill=(255, 255, 255)):
+    return FramePlan(FrameGeometry(width, height, 10, 20), "RGB", fill)
+
+
+def test_pool_reuses_canvas_per_plan_and_size(fake_image):
+    pool = CanvasPool(max_bytes=10_000)
+    first, reused = pool.acquire(plan(20, 30), (10, 10))
+    assert not reused
+    again, reused = pool.acquire(plan(20, 30), (10, 10))
+    assert reused and again is first
+    # Same canvas size but a different pasted size must not share pixels
+    other, reused = pool.acquire(plan(20, 30), (12, 10))
+    assert not reused and other is not first
+    _, reused = pool.acquire(plan(20, 30, fill=(0, 0, 0)), (10, 10))
+    assert not reused
+
+
+def test_pool_evicts_oldest_and_skips_oversized(fake_image):
+    pool = CanvasPool(max_bytes=20 * 30 * 4 * 2)
+    pool.acquire(plan(20, 30), (1, 1))
+    pool.acquire(plan(20, 30), (2, 2))
+    pool.acquire(plan(20, 30), (3, 3))
+    assert len(pool) == 2
+    assert not pool.acquire(plan(20, 30), (1, 1))[1]
+    pool.acquire(plan(200, 300), (1, 1))
+    assert len(pool) == 2
+    assert pool.total_bytes <= pool.max_bytes
+
+
+def test_alpha_sources_clear_reused_canvas(fake_image, monkeypatch):
+    placed = []
+    monkeypatch.setattr(compositor, "place", lambda canvas, img, x, y: placed.append(img))
+    pool = CanvasPool()
+    source = FakeSource("RGBA", 8, 6)
+    for _ in range(2):
+        canvas = compositor.composite_plan(source, plan(20, 30), pool)
+    # Only the second, reused canvas is refilled, and only the pasted area
+    assert canvas.pastes == [((255, 255, 255), (10, 20, 18, 26))]
+    compositor.composite_plan(FakeSource("RGB", 8, 6), plan(20, 30), pool)
+    assert len(placed) == 3
+
+
+def test_pipeline_plans_each_shape_once(monkeypatch):
+    calls = []
+    monkeypatch.setattr(
+        pipeline, "plan_frame", lambda *args: calls.append(args) or args
+    )
+    framing = pipeline.FramingPipeline(dict(pipeline.DEFAULT_SETTINGS))
+    variant = framing.variants[0]
+    for _ in range(3):
+        framing.plan(FakeSource("RGB", 40, 30), 0, variant, False)
+    framing.plan(FakeSource("RGB", 30, 40), 0, variant, False)
+    assert len(calls) == 2
+    assert framing.canvas_pool() is framing.canvas_pool()
+    assert pipeline.FramingPipeline(
+        dict(pipeline.DEFAULT_SETTINGS, canvas_pool_bytes=0)
+    ).canvas_pool() is None
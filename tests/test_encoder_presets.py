@@ -0,0 +1,46 @@
+import pytest
+
+from borderframe.encoders import ENCODER_EFFORTS, build_save_args
+
+
+def test_default_effort_keeps_the_original_encoder_options():
+    assert build_save_args("PNG", None) == {"format": "PNG", "optimize": True}
+    assert build_save_args("JPEG", 95) == {
+        "format": "JPEG", "optimize": True, "subsampling": 0, "quality": 95
+    }
+    assert build_save_args("TIFF", None) == {"format": "TIFF", "compression": "raw"}
+    assert build_save_args("HEIF", 80) == {"format": "HEIF", "quality": 80}
+
+
+def test_png_levels_increase_with_effort():
+    efforts = ("fast", "balanced", "smallest")
+    levels = [build_save_args("PNG", None, e)["compress_level"] for e in efforts]
+    assert levels == [1, 6, 9]
+
+
+def test_jpeg_presets():
+    fast = build_save_args("JPEG", 95, "fast")
+    assert fast["quality"] == 95 and not fast["optimize"]
+    smallest = build_save_args("JPEG", 80, "smallest", exif_bytes=b"exif")
+    assert smallest["progressive"] and smallest["subsampling"] == 2
+    assert smallest["exif"] == b"exif"
+    # Missing EXIF must not be passed to the encoder
+    assert "exif" not in build_save_args("JPEG", 80, "balanced")
+
+
+def test_tiff_compression_and_icc():
+    compressions = [build_save_args("TIFF", None, e)["compression"] for e in ENCODER_EFFORTS]
+    assert compressions == ["raw", "raw", "tiff_lzw", "tiff_adobe_deflate"]
+    assert build_save_args("TIFF", None, icc_profile=b"icc")["icc_profile"] == b"icc"
+
+
+def test_heif_params_are_copied():
+    args = build_save_args("HEIF", 80, "fast")
+    assert args["quality"] == 80 and args["chroma"] == 420
+    args["enc_params"]["preset"] = "changed"
+    assert build_save_args("HEIF", 80, "fast")["enc_params"]["preset"] == "ultrafast"
+
+
+def test_unknown_effort():
+    with pytest.raises(ValueError):
+        build_save_args("PNG", None, "extreme")
@@ -1,11 +1,9 @@
-import types
-import sys
-
-# Stub PyQt5 modules for headless testing
-qtwidgets = types.ModuleType("PyQt5.QtWidgets")
+from borderframe.image_processor import ImageProcessor
 
 
 class QComboBox:
+    """Minimal combo box so the format default can be tested headless."""
+
     def __init__(self):
         self.items = []
         self.current_index = -1
@@ -37,60 +35,6 @@ class QComboBox:
         pass
 
 
-for cls in [
-    "QApplication",
-    "QMainWindow",
-    "QPushButton",
-    "QFileDialog",
-    "QVBoxLayout",
-    "QHBoxLayout",
-    "QWidget",
-    "QLabel",
-    "QSlider",
-    "QColorDialog",
-    "QScrollArea",
-    "QGridLayout",
-    "QLineEdit",
-    "QFrame",
-    "QSizePolicy",
-    "QCheckBox",
-    "QProgressDialog",
-    "QMessageBox",
-    "QDialog",
-]:
-    setattr(qtwidgets, cls, type(cls, (), {}))
-qtwidgets.QComboBox = QComboBox
-
-qtcore = types.ModuleType("PyQt5.QtCore")
-for cls in ["Qt", "QTimer", "QSize", "QThread", "QObject"]:
-    setattr(qtcore, cls, type(cls, (), {}))
-qtcore.pyqtSignal = lambda *a, **k: None
-
-qtgui = types.ModuleType("PyQt5.QtGui")
-for cls in ["QPixmap", "QImage", "QPainter", "QColor", "QIntValidator", "QFont"]:
-    setattr(qtgui, cls, type(cls, (), {}))
-
-sys.modules.setdefault("PyQt5", types.ModuleType("PyQt5"))
-sys.modules["PyQt5.QtWidgets"] = qtwidgets
-sys.modules["PyQt5.QtCore"] = qtcore
-sys.modules["PyQt5.QtGui"] = qtgui
-
-# Stub other modules
-sys.modules["PIL"] = types.ModuleType("PIL")
-sys.modules["PIL.Image"] = types.ModuleType("PIL.Image")
-sys.modules["PIL.ImageOps"] = types.ModuleType("PIL.ImageOps")
-imageqt_module = types.ModuleType("PIL.ImageQt")
-imageqt_module.ImageQt = type("ImageQt", (), {})
-sys.modules["PIL.ImageQt"] = imageqt_module
-exif_tags = types.ModuleType("PIL.ExifTags")
-exif_tags.TAGS = {}
-sys.modules["PIL.ExifTags"] = exif_tags
-sys.modules["piexif"] = types.ModuleType("piexif")
-sys.modules["numpy"] = types.ModuleType("numpy")
-
-from borderframe.image_processor import ImageProcessor
-
-
 def get_processor():
     proc = ImageProcessor.__new__(ImageProcessor)
     proc.selected_images = []
@@ -0,0 +1,196 @@
+import concurrent.futures
+import os
+import struct
+import sys
+import threading
+import time
+import zipfile
+
+import pytest
+
+from borderframe import isolation, tiff_stream
+from borderframe.archive import ArchiveWriter
+from borderframe.isolation import IsolatedPipeline
+from borderframe.pipeline import DEFAULT_SETTINGS
+
+
+class FakePipeline:
+    """Runs in the worker processes; behaves according to the file name."""
+
+    copied = 0
+
+    def __init__(self, settings, output_dir, writer, **kwargs):
+        self.output_dir = output_dir
+        self.writer = writer
+
+    def process_file(self, image_path, index, total, written=None):
+        name = os.path.basename(image_path)
+        try:
+            if name.startswith("hang"):
+                time.sleep(60)
+            elif name.startswith("crash"):
+                os._exit(3)
+            elif name.startswith("hog"):
+                bytearray(1024 ** 3)
+            elif name.startswith("stream"):
+                return self.stream(image_path)
+            output_path = os.path.join(self.output_dir, name + ".out")
+            self.writer.submit(output_path, memoryview(f"framed {index}".encode()))
+            written.append(output_path)
+            return None
+        except Exception as e:
+            return f"Error processing {name}: {str(e) or type(e).__name__}"
+
+    def stream(self, image_path):
+        """Frame a TIFF strip by strip and hang after the first strips."""
+        tiff_stream.BAND_BYTES = 1000
+        bands = []
+
+        def should_stop():
+            bands.append(None)
+            if len(bands) == 3:
+                open(os.path.join(self.output_dir, "writing"), "w").close()
+                time.sleep(60)
+            return False
+
+        source = tiff_stream.StripSource(image_path)
+        output_path = os.path.join(self.output_dir, "framed.tiff")
+        try:
+            tiff_stream.frame_tiff_streaming(
+                source, output_path, 10, None, "#ffffff", should_stop=should_stop
+            )
+        finally:
+            source.close()
+
+
+def make_pipeline(tmp_path, writer=None, **kwargs):
+    kwargs.setdefault("timeout", 10)
+    kwargs.setdefault("memory_limit", 0)
+    return IsolatedPipeline({}, str(tmp_path), writer, factory=FakePipeline, **kwargs)
+
+
+def test_hanging_and_crashing_images_fail_alone(tmp_path):
+    pipeline = make_pipeline(tmp_path, timeout=2)
+    names = ["a.jpg", "hang.tif", "crash.heic", "b.jpg"]
+    try:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
+            errors = list(
+                executor.map(
+                    lambda item: pipeline.process_file(str(tmp_path / item[1]), item[0], 4),
+                    enumerate(names),
+                )
+            )
+        # The next image after a killed worker gets a fresh one
+        assert pipeline.process_file(str(tmp_path / "c.jpg"), 4, 5) is None
+    finally:
+        pipeline.close()
+
+    assert errors[0] is None and errors[3] is None
+    assert errors[1] == "Error processing hang.tif: timed out after 2 s"
+    assert errors[2] == "Error processing crash.heic: worker process exited with code 3"
+    assert pipeline.restarts == 2
+    assert (tmp_path / "a.jpg.out").read_bytes() == b"framed 0"
+    assert (tmp_path / "c.jpg.out").read_bytes() == b"framed 4"
+    assert not (tmp_path / "hang.tif.out").exists()
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="RLIMIT_AS is not available")
+def test_memory_limit_turns_runaway_allocation_into_an_error(tmp_path):
+    pipeline = make_pipeline(tmp_path, memory_limit=512 * 1024 ** 2)
+    try:
+        error = pipeline.process_file(str(tmp_path / "hog.tif"), 0, 2)
+        written = []
+        assert pipeline.process_file(str(tmp_path / "a.jpg"), 1, 2, written) is None
+    finally:
+        pipeline.close()
+    assert error == "Error processing hog.tif: MemoryError"
+    assert written == [str(tmp_path / "a.jpg.out")]
+
+
+def test_cancelling_kills_the_running_worker(tmp_path):
+    stop = threading.Event()
+    pipeline = make_pipeline(tmp_path, should_stop=stop.is_set)
+    threading.Timer(1.5, stop.set).start()
+    started = time.monotonic()
+    try:
+        assert pipeline.process_file(str(tmp_path / "hang.tif"), 0, 1) is None
+    finally:
+        pipeline.close()
+    assert time.monotonic() - started < 10
+    assert pipeline.restarts == 0
+
+
+def test_killed_worker_leaves_no_partial_streamed_output(pillow, tmp_path):
+    source = tmp_path / "stream.tif"
+    pillow.new("RGB", (100, 100), (255, 0, 0)).save(source)
+    out = tmp_path / "out"
+    out.mkdir()
+    pipeline = make_pipeline(out, timeout=3)
+    try:
+        error = pipeline.process_file(str(source), 0, 1)
+    finally:
+        pipeline.close()
+    assert error == "Error processing stream.tif: timed out after 3 s"
+    assert os.listdir(out) == ["writing"]
+
+
+def write_sparse_tiff(path, width, height):
+    """Write a black one-strip RGB TIFF without allocating its pixels."""
+    tags = [
+        (256, 4, 1, width),
+        (257, 4, 1, height),
+        (258, 3, 3, 122),  # BitsPerSample, stored after the IFD
+        (259, 3, 1, 1),
+        (262, 3, 1, 2),
+        (273, 4, 1, 128),
+        (277, 3, 1, 3),
+        (278, 4, 1, height),
+        (279, 4, 1, width * height * 3),
+    ]
+    with open(path, "wb") as f:
+        f.write(b"II*\0" + struct.pack("<IH", 8, len(tags)))
+        for tag, field_type, count, value in tags:
+            f.write(struct.pack("<HHII", tag, field_type, count, value))
+        f.write(struct.pack("<I3H", 0, 8, 8, 8).ljust(128 - 118, b"\0"))
+        f.truncate(128 + width * height * 3)
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="RLIMIT_AS is not available")
+def test_streamed_tiff_may_be_larger_than_the_memory_limit(pillow, tmp_path):
+    source = tmp_path / "big.tif"
+    write_sparse_tiff(source, 9000, 9000)
+    out = tmp_path / "out"
+    out.mkdir()
+    settings = dict(DEFAULT_SETTINGS, save_format="TIFF", streaming_threshold_mp=1)
+    pipeline = IsolatedPipeline(
+        settings, str(out), timeout=120, memory_limit=200 * 1024 ** 2
+    )
+    assert os.path.getsize(source) > pipeline.memory_limit
+    written = []
+    try:
+        assert pipeline.process_file(str(source), 0, 1, written) is None
+    finally:
+        pipeline.close()
+    assert written == [str(out / "big_processed.tiff")]
+    with pillow.open(written[0]) as img:
+        assert img.size == (9000, 9000)
+
+
+def test_outputs_go_through_the_parent_writer(tmp_path):
+    target = tmp_path / "out.zip"
+    writer = ArchiveWriter(str(target), root=str(tmp_path))
+    pipeline = make_pipeline(tmp_path, writer)
+    try:
+        assert pipeline.process_file(str(tmp_path / "a.jpg"), 0, 1) is None
+    finally:
+        pipeline.close()
+    assert writer.close() == []
+    with zipfile.ZipFile(target) as z:
+        assert z.namelist() == ["a.jpg.out"]
+
+
+def test_isolation_env(monkeypatch):
+    monkeypatch.setenv(isolation.ISOLATE_ENV, "1")
+    assert isolation.isolation_enabled()
+    monkeypatch.setenv(isolation.ISOLATE_ENV, "off")
+    assert not isolation.isolation_enabled()
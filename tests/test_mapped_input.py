@@ -0,0 +1,139 @@
+import os
+import struct
+
+import pytest
+
+from borderframe import mapped_input, pipeline
+from borderframe.mapped_input import BmpSource, open_mapped
+from borderframe.pipeline import DEFAULT_SETTINGS, FramingPipeline
+
+PIXEL_BYTES = {"RGB": 3, "RGBA": 4, "L": 1, "LA": 2}
+
+
+def write_bmp(path, width, height, bits=24, compression=0, pixel_bytes=None):
+    stride = (bits * width + 31) // 32 * 4
+    pixels = pixel_bytes if pixel_bytes is not None else b"\x10" * stride * abs(height)
+    header = struct.pack("<2sIHHI", b"BM", 54 + len(pixels), 0, 0, 54)
+    dib = struct.pack(
+        "<IiiHHIIiiII", 40, width, height, 1, bits, compression, len(pixels), 0, 0, 0, 0
+    )
+    path.write_bytes(header + dib + pixels)
+    return str(path)
+
+
+def test_bmp_layout_is_read_from_header(tmp_path):
+    source = BmpSource.probe(write_bmp(tmp_path / "a.bmp", 5, 4))
+    assert (source.width, source.height, source.rawmode) == (5, 4, "BGR")
+    assert source.stride == 16
+    assert source.bottom_up
+    # Bottom-up rows: the top band is stored last
+    assert source._span(0, 1) == (54 + 3 * 16, 54 + 4 * 16)
+    assert source.band_limit(0) == 4
+    source.close()
+
+    top_down = BmpSource.probe(write_bmp(tmp_path / "b.bmp", 5, -4, bits=32))
+    assert (top_down.height, top_down.rawmode, top_down.stride) == (4, "BGRX", 20)
+    assert top_down._span(1, 3) == (54 + 20, 54 + 60)
+    top_down.close()
+
+
+def test_unsupported_bmp_files_are_decoded_normally(tmp_path):
+    assert BmpSource.probe(write_bmp(tmp_path / "rle.bmp", 4, 4, bits=8, compression=1)) is None
+    assert BmpSource.probe(write_bmp(tmp_path / "pal.bmp", 4, 4, bits=8)) is None
+    short = write_bmp(tmp_path / "short.bmp", 64, 64, pixel_bytes=b"\0" * 10)
+    assert BmpSource.probe(short) is None
+    (tmp_path / "fake.bmp").write_bytes(b"GIF89a" + b"\0" * 60)
+    assert BmpSource.probe(str(tmp_path / "fake.bmp")) is None
+
+
+def test_open_mapped_dispatches_on_extension(tmp_path, monkeypatch):
+    probed = []
+    monkeypatch.setattr(
+        mapped_input.StripSource, "probe", classmethod(lambda cls, path: probed.append(path))
+    )
+    assert open_mapped(str(tmp_path / "scan.TIFF")) is None
+    assert probed == [str(tmp_path / "scan.TIFF")]
+    assert open_mapped(str(tmp_path / "photo.jpg")) is None
+    source = open_mapped(write_bmp(tmp_path / "ok.bmp", 3, 3))
+    assert isinstance(source, BmpSource)
+    source.close()
+
+
+def pattern(pillow, mode, width=61, height=47):
+    data = bytes(
+        (x * 7 + y * 13 + c * 61) % 256
+        for y in range(height)
+        for x in range(width)
+        for c in range(PIXEL_BYTES[mode])
+    )
+    return pillow.frombytes(mode, (width, height), data)
+
+
+def frame_both_ways(path, tmp_path, monkeypatch):
+    """Frame ``path`` from its map and decoded, and return both outputs."""
+    framed = []
+
+    def counting_frame_mapped(source, *args):
+        framed.append(source)
+        return mapped_input.frame_mapped(source, *args)
+
+    monkeypatch.setattr(pipeline, "frame_mapped", counting_frame_mapped)
+    # Several bands per image, and bands that end at strip boundaries
+    monkeypatch.setattr(mapped_input, "BAND_BYTES", 2000)
+    outputs = []
+    for mapped in (True, False):
+        out = tmp_path / f"mapped-{mapped}"
+        out.mkdir()
+        settings = dict(
+            DEFAULT_SETTINGS,
+            save_format="PNG",
+            aspect_ratio="4:5",
+            user_border_px=40,
+            border_color="#336699",
+            mapped_inputs=mapped,
+        )
+        written = []
+        assert FramingPipeline(settings, str(out)).process_file(path, 0, 1, written) is None
+        outputs.append(written[0])
+    assert len(framed) == 1
+    return outputs
+
+
+def assert_same_pixels(pillow, first, second):
+    with pillow.open(first) as a, pillow.open(second) as b:
+        assert (a.mode, a.size) == (b.mode, b.size)
+        assert a.tobytes() == b.tobytes()
+
+
+@pytest.mark.parametrize("top_down", [False, True])
+def test_mapped_bmp_matches_decoded_output(pillow, tmp_path, monkeypatch, top_down):
+    image = pattern(pillow, "RGB")
+    if top_down:
+        stride = (24 * image.width + 31) // 32 * 4
+        rows = image.tobytes("raw", "BGR")
+        row_bytes = image.width * 3
+        pixels = b"".join(
+            rows[y * row_bytes:(y + 1) * row_bytes].ljust(stride, b"\0")
+            for y in range(image.height)
+        )
+        path = write_bmp(tmp_path / "in.bmp", image.width, -image.height, pixel_bytes=pixels)
+    else:
+        path = str(tmp_path / "in.bmp")
+        image.save(path)
+    assert BmpSource.probe(path).bottom_up is not top_down
+    assert_same_pixels(pillow, *frame_both_ways(path, tmp_path, monkeypatch))
+
+
+@pytest.mark.parametrize("mode", ["RGB", "LA", "L", "RGBA"])
+def test_mapped_strip_tiff_matches_decoded_output(pillow, tmp_path, monkeypatch, mode):
+    from PIL import TiffImagePlugin, features
+
+    if not features.check("libtiff"):
+        pytest.skip("multi-strip TIFFs are written with libtiff")
+    monkeypatch.setattr(TiffImagePlugin, "WRITE_LIBTIFF", True)
+    path = str(tmp_path / "in.tif")
+    pattern(pillow, mode).save(path, strip_size=1000)
+    with pillow.open(path) as img:
+        assert img.mode == mode
+        assert len(img.tag_v2[273]) > 1
+    assert_same_pixels(pillow, *frame_both_ways(path, tmp_path, monkeypatch))
@@ -0,0 +1,58 @@
+import os
+
+import pytest
+
+from borderframe import writer as writer_module
+from borderframe.writer import OutputWriter
+
+
+def test_writes_files_atomically(tmp_path):
+    writer = OutputWriter(writers=2, fsync="full")
+    for i in range(5):
+        writer.submit(str(tmp_path / f"out_{i}.jpg"), bytes([i]) * 1000)
+    assert writer.close() == []
+    assert sorted(os.listdir(tmp_path)) == [f"out_{i}.jpg" for i in range(5)]
+    assert (tmp_path / "out_3.jpg").read_bytes() == bytes([3]) * 1000
+
+
+def test_queue_bound_is_released(tmp_path):
+    writer = OutputWriter(writers=1, max_queued_bytes=10)
+    # Each buffer exceeds the bound, so submissions are serialized
+    for i in range(3):
+        writer.submit(str(tmp_path / f"big_{i}.png"), b"x" * 100)
+    assert writer.close() == []
+    assert writer.queued_bytes == 0
+    assert len(os.listdir(tmp_path)) == 3
+
+
+def test_cancel_discards_pending_writes(tmp_path):
+    writer = OutputWriter(writers=1)
+    writer.cancel()
+    writer.submit(str(tmp_path / "late.jpg"), b"data")
+    writer.close()
+    assert os.listdir(tmp_path) == []
+
+
+def test_write_errors_are_reported(tmp_path):
+    writer = OutputWriter(writers=1)
+    writer.submit(str(tmp_path / "missing" / "out.jpg"), b"data")
+    errors = writer.close()
+    assert len(errors) == 1
+    assert errors[0].startswith("Error writing out.jpg")
+
+
+def test_settings_toggle_and_validation():
+    assert OutputWriter.from_settings({"buffered_output": False}) is None
+    with pytest.raises(ValueError):
+        OutputWriter(fsync="sometimes")
+
+
+@pytest.mark.skipif(os.name != "posix", reason="POSIX permissions")
+def test_outputs_get_regular_permissions(tmp_path):
+    umask = os.umask(0o027)
+    os.umask(umask)
+    writer = OutputWriter(writers=1)
+    writer.submit(str(tmp_path / "out.jpg"), b"data")
+    assert writer.close() == []
+    assert os.stat(tmp_path / "out.jpg").st_mode & 0o777 == 0o666 & ~umask
+    assert writer_module._read_umask() == umask
@@ -0,0 +1,102 @@
+import os
+
+from borderframe import passthrough
+from borderframe.pipeline import DEFAULT_SETTINGS, FramingPipeline, output_variants
+
+
+class FakeImage:
+    def __init__(self, format="JPEG", mode="RGB", exif=None, info=None, n_frames=1):
+        self.format = format
+        self.mode = mode
+        self.info = info or {}
+        self.n_frames = n_frames
+        self._exif = exif or {}
+
+    def getexif(self):
+        return self._exif
+
+
+def noop(**settings):
+    settings = dict(DEFAULT_SETTINGS, **settings)
+    return passthrough.is_noop(settings, output_variants(settings))
+
+
+def test_only_borderless_original_aspect_settings_are_noop():
+    assert noop()
+    assert noop(save_format="PNG")
+    assert not noop(user_border_px=10)
+    assert not noop(aspect_ratio="1:1")
+    assert not noop(responsive_widths=[800])
+    assert not noop(variants=[{"save_format": "PNG"}])
+    assert not noop(passthrough=False)
+
+
+def test_can_copy_requires_unchanged_output():
+    assert passthrough.can_copy(FakeImage(), "JPEG", False)
+    assert passthrough.can_copy(FakeImage(exif={0x0112: 1, 0x011A: 72}), "JPEG", False)
+    assert passthrough.can_copy(FakeImage("PNG", "I;16"), "PNG", False)
+    assert not passthrough.can_copy(FakeImage(), "PNG", False)
+    assert not passthrough.can_copy(FakeImage(exif={0x0112: 6}), "JPEG", True)
+    assert not passthrough.can_copy(FakeImage("PNG", "RGBA"), "PNG", False)
+    assert not passthrough.can_copy(FakeImage("JPEG", "CMYK"), "JPEG", False)
+    assert not passthrough.can_copy(
+        FakeImage("PNG", "RGB", info={"transparency": 0}), "PNG", False
+    )
+    assert not passthrough.can_copy(FakeImage("TIFF", n_frames=3), "TIFF", False)
+
+
+def test_metadata_is_only_copied_when_preserved():
+    gps = FakeImage(exif={0x0112: 1, 0x8825: 26})
+    assert not passthrough.can_copy(gps, "JPEG", False)
+    assert passthrough.can_copy(gps, "JPEG", True)
+    xmp = FakeImage(info={"xmp": b"<x:xmpmeta/>"})
+    assert not passthrough.can_copy(xmp, "JPEG", False)
+
+
+def test_metadata_that_framing_drops_is_never_copied():
+    # Camera model, the Exif IFD with maker notes, and GPS
+    full = FakeImage(exif={0x0110: "Camera", 0x8769: 200, 0x8825: 26})
+    assert not passthrough.can_copy(full, "JPEG", True)
+    # Framing only writes GPS data into JPEG output
+    gps = FakeImage("PNG", exif={0x8825: 26})
+    assert not passthrough.can_copy(gps, "PNG", True)
+    for info in ({"xmp": b"<x:xmpmeta/>"}, {"XML:com.adobe.xmp": "<x:xmpmeta/>"}):
+        assert not passthrough.can_copy(FakeImage("PNG", info=info), "PNG", True)
+    xmp = FakeImage(exif={0x8825: 26}, info={"xmp": b"<x:xmpmeta/>"})
+    assert not passthrough.can_copy(xmp, "JPEG", True)
+
+
+def test_camera_jpeg_is_reencoded_even_when_metadata_is_preserved(pillow, tmp_path):
+    exif = pillow.Exif()
+    exif[0x0110] = "Camera"
+    pillow.new("RGB", (8, 8)).save(tmp_path / "in.jpg", exif=exif)
+    with pillow.open(tmp_path / "in.jpg") as img:
+        assert not passthrough.can_copy(img, "JPEG", True)
+
+
+def test_real_tiff_is_copied_byte_for_byte(pillow, tmp_path):
+    pillow.new("RGB", (8, 8), (10, 20, 30)).save(
+        tmp_path / "scan.tif", compression="tiff_lzw", dpi=(300, 300)
+    )
+    tagged = pillow.new("RGB", (8, 8)).getexif()
+    tagged[0x0131] = "Scanner software"
+    pillow.new("RGB", (8, 8)).save(tmp_path / "tagged.tif", exif=tagged)
+    out = tmp_path / "out"
+    out.mkdir()
+    settings = dict(DEFAULT_SETTINGS, save_format="TIFF", user_border_px=0)
+    pipeline = FramingPipeline(settings, str(out))
+    for index, name in enumerate(("scan.tif", "tagged.tif")):
+        assert pipeline.process_file(str(tmp_path / name), index, 2) is None
+    assert pipeline.copied == 1
+    assert (out / "scan_processed.tiff").read_bytes() == (tmp_path / "scan.tif").read_bytes()
+
+
+def test_copy_file_is_exact_and_leaves_no_temp_files(tmp_path):
+    source = tmp_path / "in.jpg"
+    data = os.urandom(3 * 1024 * 1024 + 17)
+    source.write_bytes(data)
+    out = tmp_path / "out"
+    out.mkdir()
+    passthrough.copy_file(str(source), str(out / "in_processed.jpg"), fsync="full")
+    assert (out / "in_processed.jpg").read_bytes() == data
+    assert os.listdir(out) == ["in_processed.jpg"]
@@ -0,0 +1,66 @@
+import os
+
+import pytest
+
+from borderframe.heif import is_heif_header
+from borderframe.pipeline import DEFAULT_SETTINGS, FramingPipeline, output_variants
+
+
+def test_single_output_from_top_level_settings():
+    settings = dict(DEFAULT_SETTINGS, aspect_ratio="4:5", user_border_px=20)
+    (variant,) = output_variants(settings)
+    assert variant["aspect_ratio"] == (4, 5)
+    assert variant["user_border_px"] == 20
+    assert variant["encoder_effort"] == "standard"
+    assert variant["suffix"] == ""
+
+
+def test_variants_fall_back_to_top_level_settings():
+    settings = dict(
+        DEFAULT_SETTINGS,
+        variants=[{"aspect_ratio": "1:1"}, {"aspect_ratio": None, "suffix": "_raw"}],
+    )
+    square, raw = output_variants(settings)
+    assert square["aspect_ratio"] == (1, 1)
+    assert square["suffix"] == "_1x1"
+    assert square["save_format"] == "JPEG"
+    assert raw["suffix"] == "_raw"
+
+
+def test_variants_never_share_an_output_name(pillow, tmp_path):
+    settings = dict(
+        DEFAULT_SETTINGS,
+        save_format="PNG",
+        variants=[
+            {"aspect_ratio": "1:1", "user_border_px": 10},
+            {"aspect_ratio": "1:1", "user_border_px": 40},
+            {"aspect_ratio": "1:1", "save_format": "JPEG"},
+        ],
+    )
+    assert [v["suffix"] for v in output_variants(settings)] == ["_1x1", "_1x1_2", "_1x1"]
+
+    pillow.new("RGB", (20, 10), (255, 0, 0)).save(tmp_path / "a.png")
+    out = tmp_path / "out"
+    out.mkdir()
+    written = []
+    pipeline = FramingPipeline(settings, str(out))
+    assert pipeline.process_file(str(tmp_path / "a.png"), 0, 1, written) is None
+    assert sorted(os.path.basename(path) for path in written) == [
+        "a_processed_1x1.jpg", "a_processed_1x1.png", "a_processed_1x1_2.png"
+    ]
+    assert sorted(os.listdir(out)) == sorted(os.path.basename(path) for path in written)
+
+
+def test_explicit_suffixes_must_not_collide():
+    settings = dict(
+        DEFAULT_SETTINGS,
+        variants=[{"suffix": "_web"}, {"aspect_ratio": "4:5", "suffix": "_web"}],
+    )
+    with pytest.raises(ValueError):
+        output_variants(settings)
+
+
+def test_heif_header_detection():
+    assert is_heif_header(b"\x00\x00\x00\x18ftypheic\x00\x00\x00\x00")
+    assert is_heif_header(memoryview(b"\x00\x00\x00\x1cftypmif1"))
+    assert not is_heif_header(b"\xff\xd8\xff\xe0\x00\x10JFIF\x00")
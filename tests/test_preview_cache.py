@@ -0,0 +1,31 @@
+from borderframe.preview_worker import PreviewCache
+
+
+def test_returns_cached_previews():
+    cache = PreviewCache(max_bytes=100)
+    key = ("a.jpg", (4, 5), 20, "#FFFFFF", 800, 600)
+    cache.put(key, "preview", 10)
+    assert cache.get(key) == "preview"
+    assert cache.get(("a.jpg", (1, 1), 20, "#FFFFFF", 800, 600)) is None
+
+
+def test_evicts_least_recently_used_within_byte_cap():
+    cache = PreviewCache(max_bytes=30)
+    for name in "abc":
+        cache.put(name, name.upper(), 10)
+    cache.get("a")
+    cache.put("d", "D", 10)
+    assert cache.get("b") is None
+    assert cache.get("a") == "A"
+    assert cache.total_bytes == 30
+
+
+def test_replacing_and_oversized_entries():
+    cache = PreviewCache(max_bytes=30)
+    cache.put("a", "A", 10)
+    cache.put("a", "A2", 20)
+    assert cache.total_bytes == 20
+    cache.put("huge", "H", 31)
+    assert cache.get("huge") is None
+    cache.clear()
+    assert len(cache) == 0 and cache.total_bytes == 0
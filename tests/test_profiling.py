@@ -0,0 +1,54 @@
+import pstats
+import threading
+import time
+
+from borderframe import profiling
+
+
+def busy_loop(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        sum(range(1000))
+
+
+def idle_wait(event):
+    event.wait()
+
+
+def test_profiling_enabled_reads_environment(monkeypatch):
+    monkeypatch.delenv(profiling.PROFILE_ENV, raising=False)
+    assert not profiling.profiling_enabled()
+    for value in ("0", "off", "false"):
+        monkeypatch.setenv(profiling.PROFILE_ENV, value)
+        assert not profiling.profiling_enabled()
+    monkeypatch.setenv(profiling.PROFILE_ENV, "1")
+    assert profiling.profiling_enabled()
+
+
+def test_samples_from_worker_threads_are_merged(tmp_path):
+    profiler = profiling.SamplingProfiler(interval=0.001)
+    tracked = profiler.track(busy_loop)
+    # Threads outside tracked calls are not sampled
+    untracked = threading.Event()
+    idle = threading.Thread(target=idle_wait, args=(untracked,))
+    idle.start()
+    profiler.start()
+    workers = [threading.Thread(target=tracked, args=(0.2,)) for _ in range(2)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    profiler.stop()
+    untracked.set()
+    idle.join()
+
+    prof_path, summary_path = profiler.write(str(tmp_path), top=5, name="run")
+    assert prof_path == str(tmp_path / "run.prof")
+    stats = pstats.Stats(prof_path).stats
+    names = {name for _, _, name in stats}
+    assert "busy_loop" in names
+    assert "idle_wait" not in names
+    assert "_bootstrap" not in names
+    busy = next(value for key, value in stats.items() if key[2] == "busy_loop")
+    assert busy[3] > 0.1
+    assert "Hot functions by own time" in (tmp_path / "run.txt").read_text()
@@ -0,0 +1,77 @@
+import io
+import os
+
+from borderframe.compositor import composite, frame_geometry
+from borderframe.pipeline import DEFAULT_SETTINGS, FramingPipeline, frame_bytes
+
+
+def encode(image, format, **params):
+    buffer = io.BytesIO()
+    image.save(buffer, format=format, **params)
+    return buffer.getvalue()
+
+
+def test_composite_centers_image_and_flattens_alpha(pillow):
+    img = pillow.new("RGBA", (200, 100), (255, 0, 0, 255))
+    img.paste((0, 0, 255, 0), (0, 0, 10, 100))
+    framed = composite(img, frame_geometry(200, 100, 0, (1, 1)), "#00FF00")
+    assert framed.mode == "RGB"
+    assert framed.size == (200, 200)
+    assert framed.getpixel((100, 10)) == (0, 255, 0)
+    assert framed.getpixel((100, 100)) == (255, 0, 0)
+    # Transparent source pixels show the border color
+    assert framed.getpixel((5, 100)) == (0, 255, 0)
+
+
+def test_composite_keeps_16_bit_when_asked(pillow):
+    img = pillow.new("I;16", (100, 100), 40000)
+    framed = composite(img, frame_geometry(100, 100, 100, None), "#FFFFFF", True)
+    assert framed.mode == "I;16"
+    assert framed.size == (120, 120)
+    assert framed.getpixel((60, 60)) == 40000
+    assert framed.getpixel((0, 0)) == 65535
+
+
+def test_frame_bytes_adds_scaled_border(pillow):
+    data = encode(pillow.new("RGB", (400, 200), (10, 20, 30)), "PNG")
+    output = frame_bytes(data, {"user_border_px": 100, "save_format": "PNG"})
+    with pillow.open(io.BytesIO(output)) as framed:
+        assert framed.format == "PNG"
+        assert framed.size == (440, 240)
+        assert framed.getpixel((0, 0)) == (255, 255, 255)
+        assert framed.getpixel((220, 120)) == (10, 20, 30)
+
+
+def test_frame_bytes_applies_exif_orientation(pillow):
+    exif = pillow.Exif()
+    exif[0x0112] = 6
+    data = encode(pillow.new("RGB", (300, 100), (200, 0, 0)), "JPEG", exif=exif)
+    output = frame_bytes(data, {"aspect_ratio": "Original", "user_border_px": 0})
+    with pillow.open(io.BytesIO(output)) as framed:
+        assert framed.format == "JPEG"
+        assert framed.size == (100, 300)
+
+
+def test_process_file_writes_framed_output(pillow, tmp_path):
+    source = tmp_path / "photo.png"
+    pillow.new("L", (100, 100), 50).save(source)
+    settings = dict(DEFAULT_SETTINGS, aspect_ratio="2:1", save_format="PNG")
+    written = []
+    pipeline = FramingPipeline(settings, str(tmp_path / "out"))
+    os.makedirs(tmp_path / "out")
+
+    assert pipeline.process_file(str(source), 0, 1, written) is None
+    assert written == [str(tmp_path / "out" / "photo_processed.png")]
+    with pillow.open(written[0]) as framed:
+        assert framed.size == (200, 100)
+        assert framed.getpixel((0, 50)) == (255, 255, 255)
+        assert framed.getpixel((100, 50)) == (50, 50, 50)
+
+
+def test_process_file_reports_undecodable_input(pillow, tmp_path):
+    source = tmp_path / "broken.jpg"
+    source.write_bytes(b"not an image")
+    pipeline = FramingPipeline(dict(DEFAULT_SETTINGS), str(tmp_path))
+    error = pipeline.process_file(str(source), 0, 1)
+    assert error.startswith("Error processing broken.jpg: ")
+    assert not [name for name in os.listdir(tmp_path) if "processed" in name]
@@ -0,0 +1,21 @@
+from borderframe.utils import calculate_dimensions, scaled_source_size
+
+
+def test_level_matches_target_width():
+    for target in (4096, 2048, 1080, 640):
+        width, height = scaled_source_size(7728, 5152, target, None, 21)
+        framed = calculate_dimensions(width, height, 0, None, 21)
+        assert framed[0] == target
+
+
+def test_level_with_aspect_ratio():
+    width, height = scaled_source_size(6000, 4000, 1080, (4, 5), 30)
+    assert calculate_dimensions(width, height, 0, (4, 5), 30)[0] == 1080
+    assert abs(width / height - 1.5) < 0.01
+
+
+def test_unreachable_width_returns_closest():
+    # Two-pixel border steps make odd widths unreachable for some sizes
+    width, height = scaled_source_size(100, 100, 51, None, 100)
+    framed_width = calculate_dimensions(width, height, 0, None, 100)[0]
+    assert abs(framed_width - 51) <= 1
@@ -0,0 +1,139 @@
+import json
+import socket
+import threading
+import time
+import urllib.error
+import urllib.request
+
+import pytest
+
+from borderframe import server
+
+
+class FakePipeline:
+    def __init__(self, settings, output_dir=None, **kwargs):
+        self.output_dir = output_dir
+
+    def process_file(self, image_path, index, total):
+        if image_path.endswith("bad.jpg"):
+            return "Error processing bad.jpg: broken"
+        return None
+
+
+@pytest.fixture
+def service_url(monkeypatch):
+    monkeypatch.setattr(server, "frame_bytes", lambda data, settings: data[::-1])
+    monkeypatch.setattr(server, "FramingPipeline", FakePipeline)
+    httpd = server.create_server(
+        port=0, service=server.JobService(workers=2, max_pending=3), quiet=True
+    )
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+    httpd.service.shutdown()
+
+
+def request(url, data=None, method="GET", headers=None):
+    if headers is None and data is not None:
+        content_type = "application/json" if "/jobs" in url else "image/jpeg"
+        headers = {"Content-Type": content_type}
+    req = urllib.request.Request(url, data=data, method=method, headers=headers or {})
+    try:
+        with urllib.request.urlopen(req) as response:
+            return response.status, response.read()
+    except urllib.error.HTTPError as e:
+        return e.code, e.read()
+
+
+def wait_for(url, job_id):
+    for _ in range(100):
+        status = json.loads(request(f"{url}/jobs/{job_id}")[1])
+        if status["finished"]:
+            return status
+        time.sleep(0.01)
+    raise AssertionError("job did not finish")
+
+
+def test_upload_job_result(service_url):
+    status, body = request(f"{service_url}/frame", b"abc", "POST")
+    assert status == 202
+    job = wait_for(service_url, json.loads(body)["id"])
+    assert job["status"] == "done"
+    assert request(f"{service_url}/jobs/{job['id']}/result") == (200, b"cba")
+    assert request(f"{service_url}/frame?wait=1", b"xyz", "POST") == (200, b"zyx")
+
+
+def test_path_job_reports_errors(service_url, tmp_path):
+    payload = {"paths": ["ok.jpg", "bad.jpg"], "output_dir": str(tmp_path)}
+    status, body = request(f"{service_url}/jobs", json.dumps(payload).encode(), "POST")
+    assert status == 202
+    job = wait_for(service_url, json.loads(body)["id"])
+    assert job["status"] == "failed"
+    assert job["done"] == 2
+    assert job["errors"] == ["Error processing bad.jpg: broken"]
+
+
+def test_rejects_invalid_and_oversized_jobs(service_url, tmp_path):
+    status, _ = request(f"{service_url}/jobs", b'{"paths": []}', "POST")
+    assert status == 400
+    payload = {"paths": ["a.jpg"] * 4, "output_dir": str(tmp_path)}
+    status, _ = request(f"{service_url}/jobs", json.dumps(payload).encode(), "POST")
+    assert status == 503
+    assert request(f"{service_url}/jobs/unknown")[0] == 404
+
+
+def test_metrics(service_url):
+    request(f"{service_url}/frame?wait=1", b"abc", "POST")
+    status, body = request(f"{service_url}/metrics")
+    assert status == 200
+    assert "borderframe_jobs_completed_total 1" in body.decode()
+    assert "borderframe_jobs_rejected_total 0" in body.decode()
+
+
+def test_rejects_requests_web_pages_can_send(service_url, tmp_path):
+    payload = json.dumps({"paths": ["a.jpg"], "output_dir": str(tmp_path)}).encode()
+    for content_type in ("text/plain", "application/x-www-form-urlencoded"):
+        headers = {"Content-Type": content_type}
+        assert request(f"{service_url}/jobs", payload, "POST", headers)[0] == 415
+        assert request(f"{service_url}/frame", b"abc", "POST", headers)[0] == 415
+
+    json_type = {"Content-Type": "application/json"}
+    evil_origin = dict(json_type, Origin="https://example.com")
+    assert request(f"{service_url}/jobs", payload, "POST", evil_origin)[0] == 403
+    rebound = dict(json_type, Host="attacker.example:8765")
+    assert request(f"{service_url}/jobs", payload, "POST", rebound)[0] == 403
+    assert request(f"{service_url}/metrics", headers={"Host": "attacker.example"})[0] == 403
+
+    local_origin = dict(json_type, Origin="http://localhost:8765")
+    assert request(f"{service_url}/jobs", payload, "POST", local_origin)[0] == 202
+
+
+def test_invalid_content_length_is_a_bad_request(service_url):
+    host = service_url.split("//")[1]
+    address, port = host.rsplit(":", 1)
+    with socket.create_connection((address, int(port))) as sock:
+        sock.sendall(
+            b"POST /frame HTTP/1.1\r\nHost: " + host.encode() + b"\r\n"
+            b"Content-Type: image/jpeg\r\nContent-Length: lots\r\n\r\n"
+        )
+        assert sock.recv(1024).startswith(b"HTTP/1.0 400")
+
+
+def test_shutdown_without_waiting_drops_queued_images(monkeypatch):
+    started = []
+
+    def slow_frame(data, settings):
+        started.append(data)
+        time.sleep(0.2)
+        return data
+
+    monkeypatch.setattr(server, "frame_bytes", slow_frame)
+    service = server.JobService(workers=1)
+    jobs = [service.submit_bytes(bytes([i]), {}) for i in range(4)]
+    time.sleep(0.05)
+    service.shutdown(wait=False)
+    jobs[0].future.result(timeout=5)
+    assert started == [b"\0"]
+    assert all(job.future.cancelled() for job in jobs[1:])
@@ -0,0 +1,41 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LAZY_MODULES = ("PIL", "piexif", "pillow_heif")
+
+
+def loaded_after(statement):
+    """Run ``statement`` in a fresh interpreter and list lazily loaded modules."""
+    code = (
+        f"import sys; {statement}; "
+        f"print(','.join(m for m in {LAZY_MODULES + ('PyQt5',)!r} if m in sys.modules))"
+    )
+    # A subprocess, because the other tests replace PyQt5 and PIL with stubs
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=ROOT,
+        env=dict(os.environ, QT_QPA_PLATFORM="offscreen"),
+        capture_output=True,
+        text=True,
+    )
+    for name in ("PyQt5", "PIL"):
+        if f"No module named '{name}'" in result.stderr:
+            pytest.skip(f"{name} is not installed")
+    assert result.returncode == 0, result.stderr
+    return set(filter(None, result.stdout.strip().split(",")))
+
+
+def test_package_import_is_lazy():
+    assert loaded_after("import borderframe") == set()
+
+
+def test_gui_startup_defers_image_libraries():
+    assert loaded_after("import borderframe.image_processor") == {"PyQt5"}
+
+
+def test_pipeline_does_not_import_qt():
+    assert "PyQt5" not in loaded_after("import borderframe.pipeline")
@@ -0,0 +1,154 @@
+import asyncio
+import os
+import threading
+import time
+
+import pytest
+
+from borderframe import streaming
+
+
+class FakePipeline:
+    """Writes one small file per input; inputs named "bad" fail."""
+
+    active = 0
+    peak = 0
+    totals = []
+    lock = threading.Lock()
+
+    def __init__(self, settings, output_dir, should_stop=None):
+        self.settings = settings
+        self.output_dir = output_dir
+        self.should_stop = should_stop
+
+    def process_file(self, image_path, index, total, written=None):
+        cls = type(self)
+        with cls.lock:
+            cls.totals.append(total)
+            cls.active += 1
+            cls.peak = max(cls.peak, cls.active)
+        try:
+            name = os.path.basename(image_path)
+            # Later inputs finish first so completion order differs
+            time.sleep(0.02 * (3 - index % 3))
+            if name.startswith("bad"):
+                return f"{name}: broken"
+            if self.should_stop():
+                return None
+            output = os.path.join(self.output_dir, name + ".out")
+            with open(output, "wb") as f:
+                f.write(b"x" * 10)
+            written.append(output)
+            return None
+        finally:
+            with cls.lock:
+                cls.active -= 1
+
+
+@pytest.fixture
+def fake(monkeypatch):
+    FakePipeline.active = FakePipeline.peak = 0
+    monkeypatch.setattr(streaming, "FramingPipeline", FakePipeline)
+    return FakePipeline
+
+
+def make_inputs(tmp_path, names):
+    paths = []
+    for name in names:
+        path = tmp_path / name
+        path.write_bytes(b"abcd")
+        paths.append(str(path))
+    return paths
+
+
+def test_iter_process_yields_every_result_with_sizes(tmp_path, fake):
+    paths = make_inputs(tmp_path, ["a.jpg", "b.jpg", "bad.jpg"])
+    out = tmp_path / "out"
+    out.mkdir()
+    results = list(streaming.iter_process(paths, {}, str(out), workers=3))
+
+    assert sorted(r.index for r in results) == [0, 1, 2]
+    by_name = {os.path.basename(r.path): r for r in results}
+    assert by_name["a.jpg"].ok
+    assert by_name["a.jpg"].outputs == (str(out / "a.jpg.out"),)
+    assert by_name["a.jpg"].input_bytes == 4
+    assert by_name["a.jpg"].output_bytes == 10
+    assert by_name["bad.jpg"].error == "bad.jpg: broken"
+    assert by_name["bad.jpg"].outputs == ()
+
+
+def test_iter_process_yields_in_completion_order(tmp_path, fake):
+    paths = make_inputs(tmp_path, ["a.jpg", "b.jpg", "c.jpg"])
+    results = list(streaming.iter_process(paths, {}, str(tmp_path), workers=3))
+    assert [r.index for r in results] == [2, 1, 0]
+
+
+def test_iter_process_bounds_pending_images(tmp_path, fake):
+    consumed = []
+
+    def lazy_paths():
+        for path in make_inputs(tmp_path, [f"{i}.jpg" for i in range(12)]):
+            consumed.append(path)
+            yield path
+
+    results = streaming.iter_process(
+        lazy_paths(), {}, str(tmp_path), workers=2, max_pending=3
+    )
+    next(results)
+    # Only the images queued ahead of the consumer have been pulled
+    assert len(consumed) <= 4
+    rest = list(results)
+    assert len(rest) == 11
+    assert fake.peak <= 2
+
+
+def test_iter_process_cancels_when_consumer_stops(tmp_path, fake):
+    paths = make_inputs(tmp_path, [f"{i}.jpg" for i in range(20)])
+    out = tmp_path / "out"
+    out.mkdir()
+    results = streaming.iter_process(paths, {}, str(out), workers=2)
+    next(results)
+    results.close()
+
+    assert fake.active == 0
+    assert len(os.listdir(out)) < 20
+
+
+def test_numbered_outputs_need_a_known_total(tmp_path, fake):
+    paths = make_inputs(tmp_path, ["a.jpg", "b.jpg"])
+    settings = {"base_filename": "trip"}
+    with pytest.raises(ValueError):
+        streaming.iter_process(iter(paths), settings, str(tmp_path))
+    with pytest.raises(ValueError):
+        streaming.aprocess(iter(paths), settings, str(tmp_path))
+
+    fake.totals = []
+    list(streaming.iter_process(iter(paths), settings, str(tmp_path), total=2))
+    assert fake.totals == [2, 2]
+    assert len(list(streaming.iter_process(iter(paths), {}, str(tmp_path)))) == 2
+
+
+def test_aprocess_yields_results(tmp_path, fake):
+    paths = make_inputs(tmp_path, ["a.jpg", "bad.jpg", "c.jpg"])
+
+    async def collect():
+        return [r async for r in streaming.aprocess(paths, {}, str(tmp_path), workers=3)]
+
+    results = asyncio.run(collect())
+    assert [r.index for r in results] == [2, 1, 0]
+    assert [r.ok for r in results] == [True, False, True]
+
+
+def test_aprocess_stops_early(tmp_path, fake):
+    paths = make_inputs(tmp_path, [f"{i}.jpg" for i in range(20)])
+    out = tmp_path / "out"
+    out.mkdir()
+
+    async def first():
+        async for result in streaming.aprocess(paths, {}, str(out), workers=2):
+            return result
+
+    assert asyncio.run(first()) is not None
+    time.sleep(0.1)
+    assert fake.active == 0
+    assert len(os.listdir(out)) < 20
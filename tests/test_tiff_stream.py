@@ -0,0 +1,171 @@
+import os
+import struct
+
+import pytest
+
+from borderframe import tiff_stream
+from borderframe.pipeline import DEFAULT_SETTINGS, FramingPipeline
+from borderframe.tiff_stream import should_stream
+
+PIXEL_BYTES = {"RGB": 3, "RGBA": 4, "L": 1, "LA": 2}
+STREAM_ALWAYS = {"save_format": "TIFF", "streaming_threshold_mp": 0}
+
+
+def pattern(pillow, mode, size):
+    width, height = size
+    data = bytes(
+        (x * 7 + y * 13 + c * 61) % 256
+        for y in range(height)
+        for x in range(width)
+        for c in range(PIXEL_BYTES[mode])
+    )
+    return pillow.frombytes(mode, size, data)
+
+
+def frame(path, output_dir, streamed, **overrides):
+    settings = dict(
+        DEFAULT_SETTINGS,
+        save_format="TIFF",
+        aspect_ratio="4:5",
+        user_border_px=40,
+        border_color="#336699",
+        mapped_inputs=False,
+        # The regular path never streams; the streamed one always does
+        streaming_threshold_mp=0 if streamed else 10 ** 6,
+        **overrides,
+    )
+    os.makedirs(output_dir, exist_ok=True)
+    written = []
+    error = FramingPipeline(settings, str(output_dir)).process_file(
+        str(path), 0, 1, written
+    )
+    assert error is None
+    (output,) = written
+    return output
+
+
+def assert_same_pixels(pillow, first, second):
+    with pillow.open(first) as a, pillow.open(second) as b:
+        assert a.mode == b.mode
+        assert a.size == b.size
+        assert a.tobytes() == b.tobytes()
+
+
+def write_tiled_tiff(path, image, tile=16):
+    """Write ``image`` (RGB) as an uncompressed tiled TIFF."""
+    width, height = image.size
+    tiles = [
+        image.crop((x, y, x + tile, y + tile)).tobytes()
+        for y in range(0, height, tile)
+        for x in range(0, width, tile)
+    ]
+    entries = 11
+    # Header, IFD, then the values that do not fit in an entry, then tiles
+    bits_offset = 8 + 2 + entries * 12 + 4
+    offsets_offset = bits_offset + 6
+    counts_offset = offsets_offset + 4 * len(tiles)
+    data_start = counts_offset + 4 * len(tiles)
+    offsets = [data_start + i * len(tiles[0]) for i in range(len(tiles))]
+    ifd = [
+        (256, 4, 1, width),
+        (257, 4, 1, height),
+        (258, 3, 3, bits_offset),
+        (259, 3, 1, 1),
+        (262, 3, 1, 2),
+        (277, 3, 1, 3),
+        (284, 3, 1, 1),
+        (322, 3, 1, tile),
+        (323, 3, 1, tile),
+        (324, 4, len(tiles), offsets_offset),
+        (325, 4, len(tiles), counts_offset),
+    ]
+    with open(path, "wb") as f:
+        f.write(b"II*\0" + struct.pack("<I", 8))
+        f.write(struct.pack("<H", entries))
+        for tag, field_type, count, value in ifd:
+            if field_type == 3 and count == 1:
+                value = struct.pack("<H", value).ljust(4, b"\0")
+            else:
+                value = struct.pack("<I", value)
+            f.write(struct.pack("<HHI", tag, field_type, count) + value)
+        f.write(struct.pack("<I", 0))
+        f.write(struct.pack("<3H", 8, 8, 8))
+        f.write(struct.pack(f"<{len(tiles)}I", *offsets))
+        f.write(struct.pack(f"<{len(tiles)}I", *[len(t) for t in tiles]))
+        for tile_data in tiles:
+            f.write(tile_data)
+
+
+@pytest.mark.parametrize("mode", ["RGB", "RGBA", "L", "LA"])
+def test_streamed_output_matches_regular_path(pillow, tmp_path, mode):
+    source = tmp_path / "scan.tif"
+    pattern(pillow, mode, (61, 43)).save(source, tiffinfo={278: 7})
+    assert should_stream(str(source), STREAM_ALWAYS)
+
+    regular = frame(source, tmp_path / "regular", streamed=False)
+    streamed = frame(source, tmp_path / "streamed", streamed=True)
+    assert_same_pixels(pillow, regular, streamed)
+
+
+@pytest.mark.parametrize(
+    "effort, compression",
+    [
+        ("standard", "raw"),
+        ("fast", "raw"),
+        ("balanced", "tiff_adobe_deflate"),
+        ("smallest", "tiff_adobe_deflate"),
+    ],
+)
+def test_streamed_output_is_compressed_per_effort(
+    pillow, tmp_path, monkeypatch, effort, compression
+):
+    # Several strips, some border only and some cut across border and image
+    monkeypatch.setattr(tiff_stream, "BAND_BYTES", 1000)
+    source = tmp_path / "scan.tif"
+    pattern(pillow, "RGB", (80, 50)).save(source)
+
+    regular = frame(source, tmp_path / "regular", False, encoder_effort=effort)
+    streamed = frame(source, tmp_path / "streamed", True, encoder_effort=effort)
+    assert_same_pixels(pillow, regular, streamed)
+    with pillow.open(streamed) as img:
+        assert img.info["compression"] == compression
+
+
+def test_tiled_input_matches_regular_path(pillow, tmp_path):
+    source = tmp_path / "tiled.tif"
+    write_tiled_tiff(source, pattern(pillow, "RGB", (50, 37)))
+    with pillow.open(source) as img:
+        assert img.tile[0][1][2:] == (16, 16)
+    assert should_stream(str(source), STREAM_ALWAYS)
+
+    regular = frame(source, tmp_path / "regular", streamed=False)
+    streamed = frame(source, tmp_path / "streamed", streamed=True)
+    assert_same_pixels(pillow, regular, streamed)
+
+
+def test_bigtiff_output_matches_regular_path(pillow, tmp_path, monkeypatch):
+    monkeypatch.setattr(tiff_stream, "_CLASSIC_TIFF_LIMIT", 0)
+    source = tmp_path / "scan.tif"
+    pattern(pillow, "RGB", (40, 64)).save(source, tiffinfo={278: 5})
+
+    regular = frame(source, tmp_path / "regular", streamed=False)
+    streamed = frame(source, tmp_path / "streamed", streamed=True)
+    with open(streamed, "rb") as f:
+        assert f.read(4) == b"II+\0"
+    assert_same_pixels(pillow, regular, streamed)
+
+
+@pytest.mark.parametrize("mode", ["P", "I;16"])
+def test_palette_and_16_bit_inputs_are_not_streamed(pillow, tmp_path, mode):
+    source = tmp_path / "scan.tif"
+    img = pattern(pillow, "L", (30, 20))
+    if mode == "P":
+        img = img.convert("P")
+    else:
+        img = img.convert("I").point(lambda v: v * 257).convert("I;16")
+    img.save(source)
+    assert should_stream(str(source), STREAM_ALWAYS) is None
+
+    output = frame(source, tmp_path / "out", streamed=True)
+    with pillow.open(output) as framed:
+        assert framed.mode == ("I;16" if mode == "I;16" else "RGB")
@@ -0,0 +1,150 @@
+import os
+import threading
+import time
+
+import pytest
+
+from borderframe import watch
+from borderframe.pipeline import DEFAULT_SETTINGS
+
+
+class RecordingPipeline:
+    processed = []
+
+    def __init__(self, settings, output_dir, writer, should_stop, **kwargs):
+        self.settings = settings
+
+    def process_file(self, image_path, index, total):
+        RecordingPipeline.processed.append(image_path)
+        return None
+
+
+def test_candidate_names():
+    assert watch.is_candidate("IMG_0001.JPG")
+    assert watch.is_candidate("scan.tif")
+    assert not watch.is_candidate(".IMG_0001.jpg.abc123.tmp")
+    assert not watch.is_candidate("IMG_0002.jpg.part")
+    assert not watch.is_candidate("notes.txt")
+
+
+def test_output_folder_must_be_outside_input(tmp_path):
+    with pytest.raises(ValueError):
+        watch.WatchDaemon(str(tmp_path), str(tmp_path), {})
+    with pytest.raises(ValueError):
+        watch.WatchDaemon(str(tmp_path), str(tmp_path / "out"), {}, recursive=True)
+
+
+@pytest.mark.parametrize("use_inotify", [False, True])
+def test_frames_settled_files_once(tmp_path, monkeypatch, use_inotify):
+    monkeypatch.setattr(watch, "FramingPipeline", RecordingPipeline)
+    RecordingPipeline.processed = []
+    source = tmp_path / "in"
+    source.mkdir()
+    (source / "old.jpg").write_bytes(b"old")
+    daemon = watch.WatchDaemon(
+        str(source),
+        str(tmp_path / "out"),
+        {"base_filename": "x"},
+        workers=2,
+        queue_size=2,
+        settle_seconds=0.1,
+        poll_seconds=0.05,
+        use_inotify=use_inotify,
+        process_existing=False,
+        log=lambda message: None,
+    )
+    thread = threading.Thread(target=daemon.run)
+    thread.start()
+    try:
+        time.sleep(0.2)
+        for i in range(10):
+            (source / f"new_{i}.jpg").write_bytes(b"data")
+        (source / "skip.txt").write_bytes(b"text")
+        deadline = time.monotonic() + 5
+        while len(RecordingPipeline.processed) < 10 and time.monotonic() < deadline:
+            time.sleep(0.05)
+        time.sleep(0.3)
+    finally:
+        daemon.stop()
+        thread.join()
+    names = sorted(os.path.basename(path) for path in RecordingPipeline.processed)
+    assert names == sorted(f"new_{i}.jpg" for i in range(10))
+    assert daemon.settings["base_filename"] == ""
+    assert daemon.processed == 10
+
+
+def run_daemon(daemon, until, timeout=5):
+    thread = threading.Thread(target=daemon.run)
+    thread.start()
+    try:
+        deadline = time.monotonic() + timeout
+        while not until() and time.monotonic() < deadline:
+            time.sleep(0.05)
+    finally:
+        daemon.stop()
+        thread.join()
+
+
+@pytest.mark.parametrize("use_inotify", [False, True])
+def test_recursive_outputs_keep_subfolders(pillow, tmp_path, use_inotify):
+    source = tmp_path / "in"
+    for folder, color in (("a", (255, 0, 0)), ("b", (0, 0, 255))):
+        (source / folder).mkdir(parents=True)
+        pillow.new("RGB", (8, 8), color).save(source / folder / "IMG_0001.png")
+    out = tmp_path / "out"
+    daemon = watch.WatchDaemon(
+        str(source),
+        str(out),
+        {**DEFAULT_SETTINGS, "save_format": "PNG"},
+        workers=2,
+        settle_seconds=0.1,
+        poll_seconds=0.05,
+        recursive=True,
+        use_inotify=use_inotify,
+        log=lambda message: None,
+    )
+    run_daemon(daemon, lambda: daemon.processed + daemon.failed >= 2)
+    assert daemon.processed == 2
+    with pillow.open(out / "a" / "IMG_0001_processed.png") as img:
+        assert img.getpixel((4, 4)) == (255, 0, 0)
+    with pillow.open(out / "b" / "IMG_0001_processed.png") as img:
+        assert img.getpixel((4, 4)) == (0, 0, 255)
+
+
+@pytest.mark.parametrize("use_inotify", [False, True])
+def test_deleted_files_are_forgotten(tmp_path, monkeypatch, use_inotify):
+    monkeypatch.setattr(watch, "FramingPipeline", RecordingPipeline)
+    source = tmp_path / "in"
+    (source / "sub").mkdir(parents=True)
+    for name in ("one.jpg", "sub/two.jpg"):
+        (source / name).write_bytes(b"x")
+    daemon = watch.WatchDaemon(
+        str(source),
+        str(tmp_path / "out"),
+        {},
+        workers=1,
+        settle_seconds=0.1,
+        poll_seconds=0.05,
+        recursive=True,
+        use_inotify=use_inotify,
+        process_existing=False,
+        log=lambda message: None,
+    )
+    seen = []
+
+    def remembered():
+        return sum(len(names) for names in daemon._done.values())
+
+    def forgotten():
+        if not seen and remembered() == 2:
+            seen.append(True)
+            os.remove(source / "one.jpg")
+            os.remove(source / "sub" / "two.jpg")
+            # Folder mtimes may not change within their resolution
+            os.utime(source, ns=(1, 1))
+            os.utime(source / "sub", ns=(1, 1))
+        return seen and remembered() == 0
+
+    run_daemon(daemon, forgotten)
+    assert seen
+    assert remembered() == 0
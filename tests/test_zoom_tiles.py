@@ -0,0 +1,25 @@
+from borderframe.zoom_view import source_region, visible_tiles
+
+
+def test_visible_tiles_cover_exposed_rect():
+    assert list(visible_tiles(0, 0, 256, 256)) == [(0, 0)]
+    assert list(visible_tiles(250, 10, 20, 300)) == [(0, 0), (1, 0), (0, 1), (1, 1)]
+    assert list(visible_tiles(0, 0, 0, 100)) == []
+
+
+def test_border_only_tile_has_no_source():
+    # Image of 1000x800 centered at (100, 50) in the frame
+    assert source_region(0, 0, 64, 64, 1.0, (100, 50, 1000, 800)) is None
+
+
+def test_source_region_at_full_resolution():
+    region = source_region(0, 0, 256, 256, 1.0, (100, 50, 1000, 800))
+    assert region == (100, 50, 156, 206, 0, 0, 156, 206)
+
+
+def test_source_region_when_zoomed():
+    region = source_region(512, 256, 256, 256, 2.0, (100, 50, 1000, 800))
+    # Tile covers frame pixels 256..384 x 128..256
+    assert region == (0, 0, 256, 256, 156, 78, 128, 128)
+    region = source_region(0, 0, 256, 256, 0.5, (100, 50, 1000, 800))
+    assert region == (50, 25, 206, 231, 0, 0, 412, 462)